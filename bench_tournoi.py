@@ -0,0 +1,396 @@
+"""Banc de charge de la couche de données de tournoi.py.
+
+Crée (ou recrée) une base MySQL dédiée, y génère des tournois synthétiques
+(équipes, joueurs, droits payés, tirage, calendrier, scores, statistiques)
+puis mesure les fonctions chaudes sous plusieurs utilisateurs simultanés :
+
+    get_classement, get_matchs, rechercher_global     lectures
+    enregistrer_score                                 écriture
+    effectuer_tirage, generer_matchs_groupes          mesurées à la création
+
+Chaque exécution enregistre ses résultats (p50, p95, p99, débit) dans
+bench_resultats/bench-<date>.json et les compare à l'exécution précédente.
+
+    python bench_tournoi.py                                  # base tournois_bench
+    python bench_tournoi.py --equipes 64 --utilisateurs 16 --sans-cache
+    python bench_tournoi.py --reutiliser --reference bench_resultats/bench-20261018-101500.json
+
+La base doit contenir « bench » dans son nom : elle est supprimée à chaque
+exécution (sauf --reutiliser).
+"""
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+import numpy as np
+from mysql.connector import Error
+
+PRENOMS = ["Adama", "Bakary", "Cheick", "Daouda", "Élie", "Fousseni", "Gaoussou", "Hamed",
+           "Issa", "Jean", "Karim", "Lassina", "Moussa", "Nouhoum", "Oumar", "Pascal",
+           "Rachid", "Salif", "Tidiane", "Yacouba", "Zoumana"]
+NOMS = ["Bamba", "Coulibaly", "Diallo", "Diarra", "Doumbia", "Fofana", "Koné", "Keïta",
+        "Ouattara", "Sanogo", "Sidibé", "Touré", "Traoré", "Yao"]
+VILLES = ["Abidjan", "Bouaké", "Daloa", "Korhogo", "Man", "San-Pédro", "Yamoussoukro",
+          "Gagnoa", "Odienné", "Séguéla", "Bondoukou", "Divo"]
+POSTES = ["Gardien", "Défenseur", "Milieu", "Attaquant"]
+
+def centiles(durees):
+    """Statistiques d'une liste de durées (secondes) en millisecondes."""
+    if not durees:
+        return {'n': 0}
+    ms = np.array(durees) * 1000
+    return {
+        'n': len(ms),
+        'moyenne_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+# ----------------- Base de test -----------------
+def preparer_base(db_config, reutiliser):
+    """Crée la base de test (supprimée d'abord sauf `reutiliser`) et applique les migrations."""
+    import schema
+
+    nom = db_config['database']
+    if 'bench' not in nom:
+        raise SystemExit(f"Refus de travailler sur « {nom} » : le nom de la base doit contenir « bench »")
+    serveur = {k: v for k, v in db_config.items() if k != 'database'}
+    conn = mysql.connector.connect(**serveur)
+    try:
+        cursor = conn.cursor()
+        if not reutiliser:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{nom}`")
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{nom}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        cursor.close()
+    finally:
+        conn.close()
+
+    conn = mysql.connector.connect(**db_config)
+    try:
+        schema.migrer(conn)
+    finally:
+        conn.close()
+
+def semer_tournoi(conn, alea, numero, nb_equipes, nb_joueurs):
+    """Insère un tournoi en cours avec ses équipes, joueurs et droits payés ; retourne son id."""
+    cursor = conn.cursor()
+    debut = date.today()
+    cursor.execute("""
+        INSERT INTO tournois (nom, date_creation, equipes_par_groupe, equipes_qualifiees,
+                              date_debut, date_fin, lieu, description, statut)
+        VALUES (%s, %s, 4, 2, %s, %s, %s, %s, 'en_cours')
+    """, (f"Coupe bench {numero}", datetime.now(), debut, debut + timedelta(days=30),
+          alea.choice(VILLES), "Tournoi synthétique du banc de charge"))
+    tournoi_id = cursor.lastrowid
+
+    noms_equipes = [f"{alea.choice(VILLES)} FC {numero}-{i}" for i in range(1, nb_equipes + 1)]
+    cursor.executemany("INSERT INTO equipes (nom, tournoi_id) VALUES (%s, %s)",
+                       [(nom, tournoi_id) for nom in noms_equipes])
+    cursor.execute("SELECT id FROM equipes WHERE tournoi_id=%s ORDER BY id", (tournoi_id,))
+    equipes_ids = [row[0] for row in cursor.fetchall()]
+
+    cursor.executemany("""
+        INSERT INTO droits_match (tournoi_id, equipe_id, montant, paye, date_paiement, date_limite)
+        VALUES (%s, %s, %s, TRUE, %s, %s)
+    """, [(tournoi_id, equipe_id, 50000, datetime.now(), debut + timedelta(days=7)) for equipe_id in equipes_ids])
+
+    cursor.executemany(
+        "INSERT INTO joueurs (equipe_id, nom, numero, poste) VALUES (%s, %s, %s, %s)",
+        [(equipe_id, f"{alea.choice(PRENOMS)} {alea.choice(NOMS)}", n, POSTES[0] if n == 1 else POSTES[1 + (n - 2) % 3])
+         for equipe_id in equipes_ids for n in range(1, nb_joueurs + 1)]
+    )
+    conn.commit()
+    cursor.close()
+    return tournoi_id
+
+def semer_stats(conn, alea, tournoi_id):
+    """Statistiques de joueurs pour les matchs terminés du tournoi."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT m.id, j.id
+        FROM matchs m
+        JOIN joueurs j ON j.equipe_id IN (m.equipe1_id, m.equipe2_id)
+        WHERE m.tournoi_id=%s AND m.statut='terminé'
+    """, (tournoi_id,))
+    lignes = [
+        (match_id, joueur_id, alea.choices([0, 0, 0, 1, 2], k=1)[0], alea.randint(0, 1),
+         1 if alea.random() < 0.05 else 0, 0, False)
+        for match_id, joueur_id in cursor.fetchall()
+    ]
+    for i in range(0, len(lignes), 1000):
+        cursor.executemany("""
+            INSERT INTO stats_joueurs (match_id, joueur_id, buts, passes_decisives,
+                                       cartons_jaunes, cartons_rouges, homme_du_match)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, lignes[i:i + 1000])
+    conn.commit()
+    cursor.close()
+    return len(lignes)
+
+def semer(args, tournoi, alea):
+    """Génère les tournois ; retourne (tournois_ids, matchs_ids, termes, mesures de création)."""
+    creation = {'effectuer_tirage': [], 'generer_matchs_groupes': [], 'enregistrer_score': []}
+    conn = mysql.connector.connect(**tournoi.DB_CONFIG)
+    try:
+        tournois_ids = []
+        for numero in range(1, args.tournois + 1):
+            tournoi_id = semer_tournoi(conn, alea, numero, args.equipes, args.joueurs)
+            tournois_ids.append(tournoi_id)
+
+            debut = time.perf_counter()
+            ok, message, _ = tournoi.effectuer_tirage(tournoi_id)
+            creation['effectuer_tirage'].append(time.perf_counter() - debut)
+            if not ok:
+                raise SystemExit(f"Tirage impossible pour le tournoi {tournoi_id} : {message}")
+
+            debut = time.perf_counter()
+            if not tournoi.generer_matchs_groupes(tournoi_id, nb_terrains=args.terrains):
+                raise SystemExit(f"Calendrier impossible pour le tournoi {tournoi_id}")
+            creation['generer_matchs_groupes'].append(time.perf_counter() - debut)
+
+            matchs = tournoi.get_matchs(tournoi_id)
+            for match in alea.sample(matchs, int(len(matchs) * args.joues)):
+                debut = time.perf_counter()
+                if not tournoi.enregistrer_score(match[0], alea.randint(0, 4), alea.randint(0, 4)):
+                    raise SystemExit(f"Score non enregistré pour le match {match[0]}")
+                creation['enregistrer_score'].append(time.perf_counter() - debut)
+            semer_stats(conn, alea, tournoi_id)
+
+        ok, message = tournoi.reconstruire_stats_joueurs()
+        if not ok:
+            raise SystemExit(message)
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM matchs WHERE tournoi_id IN ({})".format(", ".join(["%s"] * len(tournois_ids))),
+                       tournois_ids)
+        matchs_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT nom FROM joueurs ORDER BY RAND() LIMIT 20")
+        termes = [row[0].split()[-1][:4] for row in cursor.fetchall()] + VILLES[:5]
+        cursor.close()
+    finally:
+        conn.close()
+    return tournois_ids, matchs_ids, termes, creation
+
+# ----------------- Charge -----------------
+class EchecOperation(Exception):
+    """Appel terminé sans exception mais avec la valeur d'échec de la fonction."""
+
+def exiger(resultat, message):
+    """Les fonctions de tournoi.py absorbent leurs erreurs (pool épuisé, interblocage) et
+    renvoient [], {} ou False : sur une base semée, c'est un échec, pas un appel rapide."""
+    if not resultat:
+        raise EchecOperation(message)
+    return resultat
+
+def operations(tournoi, tournois_ids, matchs_ids, termes):
+    """{nom: fonction(alea)} des opérations chaudes, et poids du scénario mixte."""
+    ops = {
+        'get_classement': lambda alea: exiger(
+            tournoi.get_classement(alea.choice(tournois_ids)), "classement vide"),
+        'get_matchs': lambda alea: exiger(
+            tournoi.get_matchs(alea.choice(tournois_ids)), "aucun match"),
+        # {} seulement si l'index n'a pas pu être chargé ; sinon un dict avec 'total'
+        'rechercher_global': lambda alea: exiger(
+            tournoi.rechercher_global(alea.choice(termes)), "index de recherche indisponible"),
+        'enregistrer_score': lambda alea: exiger(tournoi.enregistrer_score(
+            alea.choice(matchs_ids), alea.randint(0, 4), alea.randint(0, 4)), "score non enregistré"),
+    }
+    poids_mixte = {'get_classement': 40, 'get_matchs': 30, 'rechercher_global': 20, 'enregistrer_score': 10}
+    return ops, poids_mixte
+
+def lancer_charge(ops, choix, utilisateurs, iterations, graine):
+    """`utilisateurs` threads font chacun `iterations` appels tirés de `choix`.
+
+    Retourne {opération: statistiques} plus une entrée '_total' avec le débit.
+    """
+    durees = {nom: [] for nom in set(choix)}
+    erreurs = {nom: 0 for nom in durees}
+    lock = threading.Lock()
+
+    def utilisateur(indice):
+        alea = random.Random(graine + indice)
+        locales = {nom: [] for nom in durees}
+        echecs = {nom: 0 for nom in durees}
+        for _ in range(iterations):
+            nom = alea.choice(choix)
+            debut = time.perf_counter()
+            try:
+                ops[nom](alea)
+            except Exception:
+                # Exception ou valeur d'échec : ni l'un ni l'autre n'entre dans les latences
+                echecs[nom] += 1
+                continue
+            locales[nom].append(time.perf_counter() - debut)
+        with lock:
+            for nom in durees:
+                durees[nom].extend(locales[nom])
+                erreurs[nom] += echecs[nom]
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=utilisateurs) as executeur:
+        list(executeur.map(utilisateur, range(utilisateurs)))
+    duree = time.perf_counter() - debut
+
+    resultats = {}
+    for nom, liste in durees.items():
+        resultats[nom] = centiles(liste)
+        resultats[nom]['erreurs'] = erreurs[nom]
+        resultats[nom]['debit_par_s'] = round(len(liste) / duree, 2) if duree else 0.0
+    total = sum(len(liste) for liste in durees.values())
+    resultats['_total'] = {'n': total, 'duree_s': round(duree, 3),
+                           'debit_par_s': round(total / duree, 2) if duree else 0.0}
+    return resultats
+
+# ----------------- Résultats -----------------
+def version_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def derniere_reference(dossier, exclure=None):
+    fichiers = sorted(f for f in glob.glob(os.path.join(dossier, "bench-*.json")) if f != exclure)
+    return fichiers[-1] if fichiers else None
+
+def comparer(actuel, reference, seuil):
+    """Lignes (scénario, opération, p95 réf., p95 actuel, ratio, erreurs réf., erreurs, régression).
+
+    Une hausse des erreurs est une régression, même si la latence baisse.
+    """
+    lignes = []
+    for scenario, ops in actuel['resultats'].items():
+        for nom, stats in ops.items():
+            ancien = reference['resultats'].get(scenario, {}).get(nom)
+            if nom == '_total' or not ancien:
+                continue
+            p95_ref, p95 = ancien.get('p95_ms'), stats.get('p95_ms')
+            ratio = p95 / p95_ref if p95 is not None and p95_ref else None
+            erreurs_ref, erreurs = ancien.get('erreurs', 0), stats.get('erreurs', 0)
+            regression = (ratio is not None and ratio > seuil) or erreurs > erreurs_ref
+            lignes.append((scenario, nom, p95_ref, p95, ratio, erreurs_ref, erreurs, regression))
+    return lignes
+
+def afficher(resultats):
+    print(f"{'scénario':<20} {'opération':<24} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'débit/s':>9} {'erreurs':>8}")
+    for scenario, ops in resultats.items():
+        for nom, stats in sorted(ops.items()):
+            if nom == '_total':
+                print(f"{scenario:<20} {'(total)':<24} {stats['n']:>6} {'':>9} {'':>9} {'':>9} "
+                      f"{stats['debit_par_s']:>9.1f}")
+            elif stats['n']:
+                print(f"{scenario:<20} {nom:<24} {stats['n']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                      f"{stats['p99_ms']:>9.2f} {stats.get('debit_par_s', 0):>9.1f} {stats.get('erreurs', 0):>8}")
+            else:
+                print(f"{scenario:<20} {nom:<24} {0:>6} {'-':>9} {'-':>9} {'-':>9} {0:>9.1f} "
+                      f"{stats.get('erreurs', 0):>8}")
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Banc de charge de la couche de données des tournois")
+    parser.add_argument('--base', default=os.environ.get('TOURNOI_BENCH_DB', 'tournois_bench'),
+                        help="base MySQL de test (doit contenir « bench »)")
+    parser.add_argument('--tournois', type=int, default=4)
+    parser.add_argument('--equipes', type=int, default=32, help="équipes par tournoi")
+    parser.add_argument('--joueurs', type=int, default=15, help="joueurs par équipe")
+    parser.add_argument('--terrains', type=int, default=4)
+    parser.add_argument('--joues', type=float, default=0.6, help="part des matchs déjà joués")
+    parser.add_argument('--utilisateurs', type=int, default=8, help="utilisateurs simultanés")
+    parser.add_argument('--iterations', type=int, default=200, help="appels par utilisateur et scénario")
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--sans-cache', action='store_true', help="désactiver le cache des lectures")
+    parser.add_argument('--reutiliser', action='store_true', help="garder la base existante sans la régénérer")
+    parser.add_argument('--resultats', default='bench_resultats', help="dossier des résultats JSON")
+    parser.add_argument('--reference', default=None, help="résultat à comparer (défaut : le précédent)")
+    parser.add_argument('--seuil', type=float, default=1.2, help="ratio de p95 signalé comme régression")
+    args = parser.parse_args(argv)
+
+    # tournoi.py lit sa configuration à l'import
+    os.environ['TOURNOI_DB_NAME'] = args.base
+    os.environ.setdefault('TOURNOI_POOL_SIZE', str(args.utilisateurs))
+    import tournoi
+
+    if args.sans_cache:
+        tournoi.CACHE_CONFIG['maxsize'] = 0
+    alea = random.Random(args.graine)
+
+    try:
+        if args.reutiliser:
+            preparer_base(tournoi.DB_CONFIG, reutiliser=True)
+            conn = mysql.connector.connect(**tournoi.DB_CONFIG)
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM tournois")
+            tournois_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT id FROM matchs")
+            matchs_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT nom FROM joueurs ORDER BY RAND() LIMIT 20")
+            termes = [row[0].split()[-1][:4] for row in cursor.fetchall()] + VILLES[:5]
+            conn.close()
+            creation = {}
+            if not matchs_ids:
+                raise SystemExit("Base vide : relancer sans --reutiliser")
+        else:
+            print(f"Génération de {args.tournois} tournoi(s) de {args.equipes} équipes dans {args.base}...")
+            preparer_base(tournoi.DB_CONFIG, reutiliser=False)
+            tournois_ids, matchs_ids, termes, creation = semer(args, tournoi, alea)
+
+        ops, poids_mixte = operations(tournoi, tournois_ids, matchs_ids, termes)
+        resultats = {}
+        if creation:
+            resultats['creation'] = {nom: centiles(durees) for nom, durees in creation.items()}
+        for nom in ops:
+            print(f"Scénario {nom}...")
+            resultats[nom] = lancer_charge(ops, [nom], args.utilisateurs, args.iterations, args.graine)
+        print("Scénario mixte...")
+        choix_mixte = [nom for nom, poids in poids_mixte.items() for _ in range(poids)]
+        resultats['mixte'] = lancer_charge(ops, choix_mixte, args.utilisateurs, args.iterations, args.graine)
+    except Error as e:
+        print(f"Erreur MySQL : {e}")
+        return 1
+
+    actuel = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'git': version_git(),
+        'parametres': {k: v for k, v in vars(args).items() if k not in ('resultats', 'reference')},
+        'pool': tournoi.get_pool().stats(),
+        'resultats': resultats,
+    }
+    afficher(resultats)
+
+    os.makedirs(args.resultats, exist_ok=True)
+    fichier = os.path.join(args.resultats, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    reference = args.reference or derniere_reference(args.resultats, exclure=fichier)
+    with open(fichier, 'w', encoding='utf-8') as f:
+        json.dump(actuel, f, ensure_ascii=False, indent=2, default=str)
+    print(f"Résultats enregistrés dans {fichier}")
+
+    if reference:
+        with open(reference, encoding='utf-8') as f:
+            precedent = json.load(f)
+        if precedent.get('parametres') != actuel['parametres']:
+            print("Attention : paramètres différents de la référence, comparaison indicative")
+        lignes = comparer(actuel, precedent, args.seuil)
+        print(f"\nComparaison avec {reference} ({precedent.get('git') or '?'}) :")
+        for scenario, nom, ancien, nouveau, ratio, erreurs_ref, erreurs, regression in lignes:
+            alerte = "  RÉGRESSION" if regression else ""
+            latence = (f"p95 {ancien:>9.2f} -> {nouveau:>9.2f} ms  x{ratio:.2f}" if ratio is not None
+                       else f"p95 {ancien or '-':>9} -> {nouveau or '-':>9} ms")
+            print(f"{scenario:<20} {nom:<24} {latence}  erreurs {erreurs_ref} -> {erreurs}{alerte}")
+        if any(l[7] for l in lignes):
+            return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Export statique des tournois publics (JSON + pages HTML).
+
+Pour chaque tournoi de get_tournois_public(), écrit dans le dossier de sortie :
+
+    tournois.json                 liste des tournois exportés
+    index.html                    page d'accueil
+    tournois/<id>/donnees.json    classement, calendrier, phases finales, buteurs
+    tournois/<id>/*.html          une page par section
+
+Une empreinte des données de chaque tournoi (calculée en une requête) est
+conservée dans manifest.json : seuls les tournois modifiés depuis le
+dernier export sont régénérés. Le dossier peut être servi par n'importe
+quel serveur de fichiers statiques.
+
+    python export_public.py                   # export incrémental dans ./public
+    python export_public.py --sortie /var/www/tournois --force
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+from html import escape
+
+from mysql.connector import Error
+
+import tournoi
+
+# À incrémenter quand le format des pages change : tout est alors régénéré
+VERSION_EXPORT = 1
+
+# Empreinte des données publiées de chaque tournoi public (une ligne par tournoi)
+SQL_EMPREINTES = """
+    SELECT t.id, CONCAT_WS('|', t.nom, IFNULL(t.date_debut, ''), IFNULL(t.date_fin, ''), IFNULL(t.lieu, ''),
+                           IFNULL(t.description, ''), t.statut, t.format_finales,
+        (SELECT CONCAT(COUNT(*), '-', COALESCE(SUM(CRC32(CONCAT_WS(',', e.id, e.nom, IFNULL(e.groupe, ''),
+                                                                  IFNULL(e.numero, '')))), 0))
+         FROM equipes e WHERE e.tournoi_id = t.id),
+        (SELECT CONCAT(COUNT(*), '-', COALESCE(SUM(CRC32(CONCAT_WS(',', m.id, m.equipe1_id, m.equipe2_id,
+                                                                  IFNULL(m.groupe_id, ''), IFNULL(m.date_match, ''),
+                                                                  IFNULL(m.lieu, ''), IFNULL(m.score1, ''),
+                                                                  IFNULL(m.score2, ''), m.phase))), 0))
+         FROM matchs m WHERE m.tournoi_id = t.id),
+        (SELECT CONCAT(COUNT(*), '-', COALESCE(SUM(CRC32(CONCAT_WS(',', pf.id, IFNULL(pf.equipe1_id, ''),
+                                                                  IFNULL(pf.equipe2_id, ''), IFNULL(pf.score1, ''),
+                                                                  IFNULL(pf.score2, ''), IFNULL(pf.gagnant_id, ''),
+                                                                  IFNULL(pf.date_match, ''), pf.statut))), 0))
+         FROM phases_finales pf WHERE pf.tournoi_id = t.id),
+        (SELECT CONCAT(COUNT(*), '-', COALESCE(SUM(CRC32(CONCAT_WS(',', s.joueur_id, j.nom, s.buts,
+                                                                  s.cartons_jaunes, s.cartons_rouges))), 0))
+         FROM stats_joueurs_tournoi s JOIN joueurs j ON s.joueur_id = j.id WHERE s.tournoi_id = t.id)
+    ) AS empreinte
+    FROM tournois t
+    WHERE t.statut IN ('en_cours', 'planifié')
+"""
+
+SECTIONS = [
+    ('classement', "Classement"),
+    ('calendrier', "Calendrier et résultats"),
+    ('phases_finales', "Phases finales"),
+    ('buteurs', "Meilleurs buteurs"),
+]
+
+STYLE = """
+body { font-family: sans-serif; margin: 2em auto; max-width: 960px; color: #222; }
+nav a { margin-right: 1em; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 1.5em; }
+th, td { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }
+th { background: #1f77b4; color: white; }
+"""
+
+def lire_empreintes(conn):
+    """{tournoi_id: empreinte hexadécimale} des tournois publics."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_EMPREINTES)
+        return {tid: hashlib.sha1(empreinte.encode('utf-8')).hexdigest()
+                for tid, empreinte in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def collecter_tournoi(infos):
+    """Données publiées d'un tournoi (ligne de get_tournois_public)."""
+    tournoi_id = infos[0]
+    classement = [dict(zip(tournoi.COLONNES_CLASSEMENT, ligne))
+                  for ligne in tournoi.get_classement_tournoi(tournoi_id)]
+    matchs = [
+        {'id': m[0], 'equipe1': m[1], 'equipe2': m[2], 'groupe': m[3], 'date': m[4],
+         'score1': m[5], 'score2': m[6], 'phase': m[7]}
+        for m in tournoi.get_matchs(tournoi_id)
+    ]
+    arbre = tournoi.get_arbre_tableau(tournoi_id)
+    phases = [
+        {'niveau': niveau, 'matchs': [
+            {'equipe1': n.libelles[0], 'equipe2': n.libelles[1], 'score1': n.score1,
+             'score2': n.score2, 'vainqueur': n.gagnant, 'date': n.date_match, 'statut': n.statut}
+            for n in noeuds
+        ]}
+        for niveau, noeuds in (arbre.niveaux.items() if arbre else [])
+    ]
+    buteurs = [{'joueur': b[0], 'equipe': b[1], 'buts': b[2]}
+               for b in tournoi.get_meilleurs_buteurs(tournoi_id, 20)]
+    return {
+        'tournoi': {'id': tournoi_id, 'nom': infos[1], 'date_debut': infos[2], 'date_fin': infos[3],
+                    'lieu': infos[4], 'description': infos[5], 'statut': infos[6]},
+        'classement': classement,
+        'calendrier': matchs,
+        'phases_finales': phases,
+        'buteurs': buteurs,
+    }
+
+def _texte(valeur):
+    return "" if valeur is None else escape(str(valeur))
+
+def _table(entetes, lignes):
+    tete = "".join(f"<th>{escape(h)}</th>" for h in entetes)
+    corps = "".join("<tr>" + "".join(f"<td>{_texte(v)}</td>" for v in ligne) + "</tr>" for ligne in lignes)
+    return f"<table><tr>{tete}</tr>{corps}</table>"
+
+def _page(titre, contenu, nav=""):
+    return (f"<!DOCTYPE html><html lang=\"fr\"><head><meta charset=\"utf-8\">"
+            f"<title>{escape(titre)}</title><style>{STYLE}</style></head>"
+            f"<body><h1>{escape(titre)}</h1>{nav}{contenu}</body></html>")
+
+def rendre_sections(donnees):
+    """{nom de fichier: HTML} des pages d'un tournoi."""
+    t = donnees['tournoi']
+    contenus = {}
+
+    groupes = {}
+    for ligne in donnees['classement']:
+        groupes.setdefault(ligne['groupe'], []).append(ligne)
+    contenus['classement'] = "".join(
+        f"<h2>Groupe {escape(str(groupe))}</h2>" + _table(
+            ["#", "Équipe", "MJ", "V", "N", "D", "BP", "BC", "Diff", "Pts"],
+            [(l['rang'], l['nom'], l['MJ'], l['V'], l['N'], l['D'], l['BP'], l['BC'], l['Diff'], l['Pts'])
+             for l in lignes]
+        )
+        for groupe, lignes in groupes.items()
+    ) or "<p>Classement non disponible</p>"
+
+    contenus['calendrier'] = _table(
+        ["Date", "Groupe", "Équipe 1", "Score", "Équipe 2"],
+        [(m['date'], m['groupe'] or m['phase'], m['equipe1'],
+          f"{m['score1']} - {m['score2']}" if m['score1'] is not None else "À venir", m['equipe2'])
+         for m in donnees['calendrier']]
+    ) if donnees['calendrier'] else "<p>Aucun match programmé</p>"
+
+    contenus['phases_finales'] = "".join(
+        f"<h2>{escape(niveau['niveau'])}</h2>" + _table(
+            ["Date", "Équipe 1", "Score", "Équipe 2", "Vainqueur"],
+            [(m['date'], m['equipe1'],
+              f"{m['score1']} - {m['score2']}" if m['score1'] is not None else m['statut'],
+              m['equipe2'], m['vainqueur'])
+             for m in niveau['matchs']]
+        )
+        for niveau in donnees['phases_finales']
+    ) or "<p>Aucune phase finale programmée</p>"
+
+    contenus['buteurs'] = _table(
+        ["Joueur", "Équipe", "Buts"],
+        [(b['joueur'], b['equipe'], b['buts']) for b in donnees['buteurs']]
+    ) if donnees['buteurs'] else "<p>Aucune statistique de buts</p>"
+
+    nav = ("<nav><a href=\"../../index.html\">Tous les tournois</a>"
+           + "".join(f"<a href=\"{nom}.html\">{escape(titre)}</a>" for nom, titre in SECTIONS)
+           + "<a href=\"donnees.json\">JSON</a></nav>")
+    entete = (f"<p>{_texte(t['date_debut'])} au {_texte(t['date_fin'])} à {_texte(t['lieu'])}"
+              f" ({_texte(t['statut'])})</p><p>{_texte(t['description'])}</p>")
+    pages = {f"{nom}.html": _page(f"{t['nom']} - {titre}", contenus[nom], nav) for nom, titre in SECTIONS}
+    pages['index.html'] = _page(t['nom'], entete, nav)
+    return pages
+
+def _ecrire(chemin, contenu):
+    # Écriture atomique : un serveur statique ne voit jamais de fichier partiel
+    temporaire = f"{chemin}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        f.write(contenu)
+    os.replace(temporaire, chemin)
+
+def _json(donnees):
+    return json.dumps(donnees, ensure_ascii=False, indent=1, default=str)
+
+def exporter(sortie, force=False):
+    """Exporte les tournois publics modifiés ; retourne (régénérés, inchangés, retirés)."""
+    chemin_manifeste = os.path.join(sortie, 'manifest.json')
+    manifeste = {}
+    if not force and os.path.exists(chemin_manifeste):
+        with open(chemin_manifeste, encoding='utf-8') as f:
+            manifeste = json.load(f)
+    if manifeste.get('version') != VERSION_EXPORT:
+        manifeste = {'version': VERSION_EXPORT, 'tournois': {}}
+    anciennes = manifeste['tournois']
+
+    conn = tournoi.create_connection()
+    if not conn:
+        raise Error("Connexion à la base impossible")
+    try:
+        empreintes = lire_empreintes(conn)
+    finally:
+        conn.close()
+
+    publics = [t for t in tournoi.get_tournois_public() if t[0] in empreintes]
+    regeneres = []
+    for infos in publics:
+        cle = str(infos[0])
+        if anciennes.get(cle) == empreintes[infos[0]]:
+            continue
+        dossier = os.path.join(sortie, 'tournois', cle)
+        os.makedirs(dossier, exist_ok=True)
+        donnees = collecter_tournoi(infos)
+        _ecrire(os.path.join(dossier, 'donnees.json'), _json(donnees))
+        for nom, html in rendre_sections(donnees).items():
+            _ecrire(os.path.join(dossier, nom), html)
+        regeneres.append(cle)
+
+    # Tournois qui ne sont plus publics
+    cles = {str(t[0]) for t in publics}
+    retires = [cle for cle in anciennes if cle not in cles]
+    for cle in retires:
+        shutil.rmtree(os.path.join(sortie, 'tournois', cle), ignore_errors=True)
+
+    if regeneres or retires or not os.path.exists(os.path.join(sortie, 'index.html')):
+        liste = [{'id': t[0], 'nom': t[1], 'date_debut': t[2], 'date_fin': t[3], 'lieu': t[4],
+                  'statut': t[6], 'url': f"tournois/{t[0]}/index.html"} for t in publics]
+        _ecrire(os.path.join(sortie, 'tournois.json'), _json(liste))
+        _ecrire(os.path.join(sortie, 'index.html'), _page("Tournois", "<ul>" + "".join(
+            f"<li><a href=\"{t['url']}\">{escape(t['nom'])}</a> - {_texte(t['date_debut'])} au "
+            f"{_texte(t['date_fin'])} à {_texte(t['lieu'])} ({_texte(t['statut'])})</li>"
+            for t in liste
+        ) + "</ul>" if liste else "<p>Aucun tournoi disponible pour le moment</p>"))
+
+    manifeste['tournois'] = {str(t[0]): empreintes[t[0]] for t in publics}
+    _ecrire(chemin_manifeste, _json(manifeste))
+    return regeneres, len(publics) - len(regeneres), retires
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export statique des tournois publics")
+    parser.add_argument('--sortie', default='public', help="dossier de sortie (défaut : ./public)")
+    parser.add_argument('--force', action='store_true', help="tout régénérer, sans tenir compte du manifeste")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.sortie, exist_ok=True)
+    try:
+        regeneres, inchanges, retires = exporter(args.sortie, args.force)
+    except Error as e:
+        print(f"Erreur export: {e}")
+        return 1
+    print(f"{len(regeneres)} tournoi(s) régénéré(s), {inchanges} inchangé(s), {len(retires)} retiré(s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
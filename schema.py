@@ -0,0 +1,676 @@
+"""Schéma versionné de la base tournois_app.
+
+Les migrations sont appliquées dans l'ordre et enregistrées dans la table
+schema_migrations. Le mode « check » lance EXPLAIN sur les requêtes les plus
+fréquentes de tournoi.py et signale les parcours complets de table.
+
+    python schema.py status     # version actuelle et migrations en attente
+    python schema.py migrate    # applique les migrations en attente
+    python schema.py check      # EXPLAIN des requêtes critiques
+    python schema.py reconcile  # recalcule stats_joueurs_tournoi depuis stats_joueurs
+"""
+import os
+import sys
+from collections import namedtuple
+
+import mysql.connector
+from mysql.connector import Error
+
+# Connexion lue dans l'environnement, partagée avec tournoi.py
+DB_CONFIG = {
+    'host': os.environ.get('TOURNOI_DB_HOST', 'localhost'),
+    'user': os.environ.get('TOURNOI_DB_USER', 'root'),
+    'password': os.environ.get('TOURNOI_DB_PASSWORD', ''),
+    'database': os.environ.get('TOURNOI_DB_NAME', 'tournois_app'),
+}
+
+# Index créé seulement s'il n'existe pas déjà (MySQL n'a pas de CREATE INDEX IF NOT EXISTS)
+Index = namedtuple('Index', ['table', 'nom', 'colonnes', 'unique'])
+# Colonne ajoutée seulement si elle n'existe pas déjà (ni ADD COLUMN IF NOT EXISTS)
+Colonne = namedtuple('Colonne', ['table', 'nom', 'definition'])
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(100) NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        email VARCHAR(255) NULL,
+        full_name VARCHAR(255) NULL,
+        role ENUM('admin', 'organizer', 'viewer') NOT NULL DEFAULT 'viewer',
+        tournoi_id INT NULL,
+        is_active BOOLEAN NOT NULL DEFAULT TRUE,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS visiteurs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nom VARCHAR(255) NOT NULL,
+        email VARCHAR(255) NULL,
+        telephone VARCHAR(50) NULL,
+        preferences TEXT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS abonnements_visiteurs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        visiteur_id INT NOT NULL,
+        tournoi_id INT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tournois (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nom VARCHAR(255) NOT NULL,
+        date_creation DATETIME NOT NULL,
+        format_finales VARCHAR(50) NOT NULL DEFAULT 'Élimination directe',
+        equipes_par_groupe INT NOT NULL DEFAULT 4,
+        equipes_qualifiees INT NOT NULL DEFAULT 2,
+        date_debut DATE NULL,
+        date_fin DATE NULL,
+        lieu VARCHAR(255) NULL,
+        description TEXT NULL,
+        statut VARCHAR(20) NOT NULL DEFAULT 'planifié'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS equipes (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nom VARCHAR(255) NOT NULL,
+        tournoi_id INT NOT NULL,
+        groupe VARCHAR(50) NULL,
+        numero INT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS groupes (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nom VARCHAR(50) NOT NULL,
+        tournoi_id INT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS droits_match (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        tournoi_id INT NOT NULL,
+        equipe_id INT NOT NULL,
+        montant DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        paye BOOLEAN NOT NULL DEFAULT FALSE,
+        date_paiement DATETIME NULL,
+        date_limite DATE NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS joueurs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        equipe_id INT NOT NULL,
+        nom VARCHAR(255) NOT NULL,
+        numero INT NOT NULL,
+        poste VARCHAR(50) NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS matchs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        tournoi_id INT NOT NULL,
+        equipe1_id INT NOT NULL,
+        equipe2_id INT NOT NULL,
+        groupe_id INT NULL,
+        date_match DATETIME NULL,
+        lieu VARCHAR(255) NULL,
+        score1 INT NULL,
+        score2 INT NULL,
+        statut VARCHAR(20) NOT NULL DEFAULT 'planifié',
+        phase VARCHAR(50) NOT NULL DEFAULT 'Phase de groupes'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS classement (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        tournoi_id INT NOT NULL,
+        equipe_id INT NOT NULL,
+        groupe_id INT NOT NULL,
+        matches_joues INT NOT NULL DEFAULT 0,
+        victories INT NOT NULL DEFAULT 0,
+        draws INT NOT NULL DEFAULT 0,
+        losses INT NOT NULL DEFAULT 0,
+        goals_for INT NOT NULL DEFAULT 0,
+        goals_against INT NOT NULL DEFAULT 0,
+        points INT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_joueurs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        match_id INT NOT NULL,
+        joueur_id INT NOT NULL,
+        buts INT NOT NULL DEFAULT 0,
+        passes_decisives INT NOT NULL DEFAULT 0,
+        cartons_jaunes INT NOT NULL DEFAULT 0,
+        cartons_rouges INT NOT NULL DEFAULT 0,
+        homme_du_match BOOLEAN NOT NULL DEFAULT FALSE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS suspensions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        joueur_id INT NOT NULL,
+        matchs_suspendus INT NOT NULL DEFAULT 1,
+        raison VARCHAR(255) NULL,
+        date_suspension DATE NOT NULL DEFAULT (CURRENT_DATE),
+        date_fin_suspension DATE NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cartons (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        joueur_id INT NOT NULL,
+        match_id INT NOT NULL,
+        type ENUM('jaune', 'rouge') NOT NULL,
+        minute INT NULL,
+        raison VARCHAR(255) NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS phases_finales (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        tournoi_id INT NOT NULL,
+        niveau VARCHAR(50) NOT NULL,
+        equipe1_id INT NULL,
+        equipe2_id INT NULL,
+        score1 INT NULL,
+        score2 INT NULL,
+        gagnant_id INT NULL,
+        date_match DATETIME NULL,
+        statut VARCHAR(20) NOT NULL DEFAULT 'planifié'
+    )
+    """,
+]
+
+# Index composites alignés sur les filtres et jointures de tournoi.py
+INDEX = [
+    Index('users', 'uq_users_username', ['username'], True),
+    Index('abonnements_visiteurs', 'uq_abonnements_visiteur_tournoi', ['visiteur_id', 'tournoi_id'], True),
+    Index('tournois', 'idx_tournois_statut_debut', ['statut', 'date_debut'], False),
+    Index('tournois', 'idx_tournois_creation', ['date_creation'], False),
+    Index('equipes', 'idx_equipes_tournoi_groupe', ['tournoi_id', 'groupe'], False),
+    Index('equipes', 'idx_equipes_tournoi_nom', ['tournoi_id', 'nom'], False),
+    Index('groupes', 'uq_groupes_tournoi_nom', ['tournoi_id', 'nom'], True),
+    Index('droits_match', 'uq_droits_tournoi_equipe', ['tournoi_id', 'equipe_id'], True),
+    Index('droits_match', 'idx_droits_equipe', ['equipe_id'], False),
+    Index('joueurs', 'idx_joueurs_equipe_numero', ['equipe_id', 'numero'], False),
+    Index('matchs', 'idx_matchs_tournoi_date', ['tournoi_id', 'date_match'], False),
+    Index('matchs', 'idx_matchs_tournoi_groupe_date', ['tournoi_id', 'groupe_id', 'date_match'], False),
+    Index('matchs', 'idx_matchs_equipe1', ['equipe1_id'], False),
+    Index('matchs', 'idx_matchs_equipe2', ['equipe2_id'], False),
+    Index('classement', 'uq_classement_tournoi_groupe_equipe', ['tournoi_id', 'groupe_id', 'equipe_id'], True),
+    Index('stats_joueurs', 'uq_stats_match_joueur', ['match_id', 'joueur_id'], True),
+    Index('stats_joueurs', 'idx_stats_joueur_match', ['joueur_id', 'match_id'], False),
+    Index('suspensions', 'idx_suspensions_joueur_fin', ['joueur_id', 'date_fin_suspension'], False),
+    Index('cartons', 'idx_cartons_joueur', ['joueur_id'], False),
+    Index('cartons', 'idx_cartons_match', ['match_id'], False),
+    Index('phases_finales', 'idx_phases_tournoi_date', ['tournoi_id', 'date_match'], False),
+]
+
+# Fusion des doublons avant chaque index unique de la version 2 ; les index uniques
+# absents d'ici (users.username) bloquent la migration s'il reste des doublons.
+# droits_match : un seul droit par équipe et par tournoi (set_droit_match s'appuie
+# sur l'index) ; on garde le droit payé, sinon le plus ancien.
+DEDOUBLONNAGE = {
+    'uq_abonnements_visiteur_tournoi': [
+        """
+        DELETE a FROM abonnements_visiteurs a
+        JOIN abonnements_visiteurs k ON k.visiteur_id = a.visiteur_id AND k.tournoi_id = a.tournoi_id AND k.id < a.id
+        """,
+    ],
+    'uq_groupes_tournoi_nom': [
+        """
+        UPDATE matchs m
+        JOIN groupes g ON m.groupe_id = g.id
+        JOIN (SELECT tournoi_id, nom, MIN(id) AS id FROM groupes
+              GROUP BY tournoi_id, nom HAVING COUNT(*) > 1) k
+          ON k.tournoi_id = g.tournoi_id AND k.nom = g.nom AND k.id <> g.id
+        SET m.groupe_id = k.id
+        """,
+        """
+        UPDATE classement c
+        JOIN groupes g ON c.groupe_id = g.id
+        JOIN (SELECT tournoi_id, nom, MIN(id) AS id FROM groupes
+              GROUP BY tournoi_id, nom HAVING COUNT(*) > 1) k
+          ON k.tournoi_id = g.tournoi_id AND k.nom = g.nom AND k.id <> g.id
+        SET c.groupe_id = k.id
+        """,
+        """
+        DELETE g FROM groupes g
+        JOIN groupes k ON k.tournoi_id = g.tournoi_id AND k.nom = g.nom AND k.id < g.id
+        """,
+    ],
+    'uq_droits_tournoi_equipe': [
+        """
+        DELETE d FROM droits_match d
+        JOIN droits_match k ON k.tournoi_id = d.tournoi_id AND k.equipe_id = d.equipe_id
+         AND (k.paye > d.paye OR (k.paye = d.paye AND k.id < d.id))
+        """,
+    ],
+    # Classement dérivé des matchs (supprimé en version 7) : on garde la première ligne
+    'uq_classement_tournoi_groupe_equipe': [
+        """
+        DELETE c FROM classement c
+        JOIN classement k ON k.tournoi_id = c.tournoi_id AND k.groupe_id = c.groupe_id
+         AND k.equipe_id = c.equipe_id AND k.id < c.id
+        """,
+    ],
+    # Saisies en double : les compteurs sont additionnés comme le faisaient les agrégats
+    'uq_stats_match_joueur': [
+        """
+        UPDATE stats_joueurs s
+        JOIN (SELECT MIN(id) AS id, SUM(buts) AS buts, SUM(passes_decisives) AS passes,
+                     SUM(cartons_jaunes) AS jaunes, SUM(cartons_rouges) AS rouges, MAX(homme_du_match) AS hdm
+              FROM stats_joueurs GROUP BY match_id, joueur_id HAVING COUNT(*) > 1) k ON k.id = s.id
+        SET s.buts = k.buts, s.passes_decisives = k.passes, s.cartons_jaunes = k.jaunes,
+            s.cartons_rouges = k.rouges, s.homme_du_match = k.hdm
+        """,
+        """
+        DELETE s FROM stats_joueurs s
+        JOIN stats_joueurs k ON k.match_id = s.match_id AND k.joueur_id = s.joueur_id AND k.id < s.id
+        """,
+    ],
+}
+
+class MigrationBloquee(Error):
+    """Des doublons empêchent la création d'un index unique."""
+
+DDL_RESUME_TOURNOIS = """
+    CREATE TABLE IF NOT EXISTS resume_tournois (
+        tournoi_id INT PRIMARY KEY,
+        nb_equipes INT NOT NULL DEFAULT 0,
+        nb_matchs INT NOT NULL DEFAULT 0,
+        matchs_joues INT NOT NULL DEFAULT 0,
+        droits_percus DECIMAL(12, 2) NOT NULL DEFAULT 0,
+        meilleur_buteur VARCHAR(255) NULL,
+        buts_meilleur_buteur INT NULL,
+        maj_le TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+
+# File des tâches de fond (tirage, calendrier, phases finales, exports)
+DDL_TACHES = """
+    CREATE TABLE IF NOT EXISTS taches (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        cle VARCHAR(191) NOT NULL,
+        type VARCHAR(50) NOT NULL,
+        tournoi_id INT NULL,
+        parametres TEXT NULL,
+        statut ENUM('en_attente', 'en_cours', 'termine', 'echec', 'interrompu') NOT NULL DEFAULT 'en_attente',
+        progression TINYINT NOT NULL DEFAULT 0,
+        message VARCHAR(255) NULL,
+        resultat TEXT NULL,
+        instance CHAR(8) NOT NULL,
+        cree_le TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        maj_le TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        UNIQUE KEY uq_taches_cle (cle),
+        KEY idx_taches_statut (statut, instance)
+    )
+"""
+
+# Colonnes du moteur de tableau : position de chaque match et destination du vainqueur/perdant
+# (« tableau:tour:position:place » du match suivant)
+ALTER_TABLEAU = [
+    Colonne('phases_finales', 'tableau', "VARCHAR(20) NOT NULL DEFAULT 'principal'"),
+    Colonne('phases_finales', 'tour', "INT NULL"),
+    Colonne('phases_finales', 'position', "INT NULL"),
+    Colonne('phases_finales', 'equipes_attendues', "VARCHAR(255) NULL"),
+    Colonne('phases_finales', 'suite_gagnant', "VARCHAR(40) NULL"),
+    Colonne('phases_finales', 'suite_perdant', "VARCHAR(40) NULL"),
+]
+INDEX_TABLEAU = Index('phases_finales', 'uq_phases_tableau', ['tournoi_id', 'tableau', 'tour', 'position'], True)
+
+# Agrégats par (tournoi, joueur), maintenus à chaque écriture de stats_joueurs ou cartons
+DDL_STATS_JOUEURS_TOURNOI = """
+    CREATE TABLE IF NOT EXISTS stats_joueurs_tournoi (
+        tournoi_id INT NOT NULL,
+        joueur_id INT NOT NULL,
+        equipe_id INT NOT NULL,
+        matchs INT NOT NULL DEFAULT 0,
+        buts INT NOT NULL DEFAULT 0,
+        passes_decisives INT NOT NULL DEFAULT 0,
+        cartons_jaunes INT NOT NULL DEFAULT 0,
+        cartons_rouges INT NOT NULL DEFAULT 0,
+        hommes_du_match INT NOT NULL DEFAULT 0,
+        points INT AS (buts + passes_decisives) STORED,
+        PRIMARY KEY (tournoi_id, joueur_id),
+        KEY idx_sjt_buts (tournoi_id, buts),
+        KEY idx_sjt_hdm (tournoi_id, hommes_du_match, points),
+        KEY idx_sjt_joueur (joueur_id)
+    )
+"""
+
+# Recalcul complet depuis stats_joueurs et cartons ; {filtre} limite éventuellement à un tournoi
+SQL_REMPLIR_STATS_JOUEURS = """
+    INSERT INTO stats_joueurs_tournoi (tournoi_id, joueur_id, equipe_id, matchs, buts,
+                                       passes_decisives, cartons_jaunes, cartons_rouges, hommes_du_match)
+    SELECT s.tournoi_id, s.joueur_id, j.equipe_id, SUM(s.matchs), SUM(s.buts), SUM(s.passes),
+           SUM(s.jaunes), SUM(s.rouges), SUM(s.hdm)
+    FROM (
+        SELECT m.tournoi_id, sj.joueur_id, 1 AS matchs, sj.buts, sj.passes_decisives AS passes,
+               sj.cartons_jaunes AS jaunes, sj.cartons_rouges AS rouges, sj.homme_du_match AS hdm
+        FROM stats_joueurs sj
+        JOIN matchs m ON sj.match_id = m.id
+        UNION ALL
+        SELECT m.tournoi_id, c.joueur_id, 0, 0, 0, c.type = 'jaune', c.type = 'rouge', 0
+        FROM cartons c
+        JOIN matchs m ON c.match_id = m.id
+    ) s
+    JOIN joueurs j ON s.joueur_id = j.id
+    {filtre}
+    GROUP BY s.tournoi_id, s.joueur_id, j.equipe_id
+"""
+
+# Le classement est calculé à la lecture depuis matchs (get_classement_tournoi) :
+# la table classement créée par la version 1 n'est plus utilisée.
+DROP_CLASSEMENT = "DROP TABLE IF EXISTS classement"
+
+# (version, description, étapes) ; une étape est une requête SQL, un Index ou une Colonne
+MIGRATIONS = [
+    (1, "Schéma initial", TABLES),
+    (2, "Index des chemins d'accès", INDEX),
+    (3, "Table matérialisée resume_tournois", [DDL_RESUME_TOURNOIS]),
+    (4, "File des tâches de fond", [DDL_TACHES]),
+    (5, "Tableau des phases finales", ALTER_TABLEAU + [INDEX_TABLEAU]),
+    (6, "Statistiques joueurs par tournoi", [DDL_STATS_JOUEURS_TOURNOI, SQL_REMPLIR_STATS_JOUEURS.format(filtre="")]),
+    (7, "Suppression de la table classement (calcul à la lecture)", [DROP_CLASSEMENT]),
+]
+
+# Requêtes critiques vérifiées par EXPLAIN ; %(tournoi_id)s est remplacé par un tournoi existant
+REQUETES_CRITIQUES = {
+    'get_equipes': "SELECT id, nom, groupe, numero FROM equipes WHERE tournoi_id=%(tournoi_id)s",
+    'get_matchs': """
+        SELECT m.id, e1.nom, e2.nom, g.nom, m.date_match, m.score1, m.score2, m.phase
+        FROM matchs m
+        JOIN equipes e1 ON m.equipe1_id=e1.id
+        JOIN equipes e2 ON m.equipe2_id=e2.id
+        LEFT JOIN groupes g ON m.groupe_id=g.id
+        WHERE m.tournoi_id=%(tournoi_id)s
+        ORDER BY m.date_match
+    """,
+    'get_matchs_by_groupe': """
+        SELECT m.id, e1.nom, e2.nom, m.date_match, m.score1, m.score2
+        FROM matchs m
+        JOIN equipes e1 ON m.equipe1_id=e1.id
+        JOIN equipes e2 ON m.equipe2_id=e2.id
+        WHERE m.tournoi_id=%(tournoi_id)s AND m.groupe_id=%(groupe_id)s
+        ORDER BY m.date_match
+    """,
+    'get_classement_tournoi': """
+        SELECT equipe1_id, equipe2_id, score1, score2
+        FROM matchs
+        WHERE tournoi_id = %(tournoi_id)s AND groupe_id IS NOT NULL AND score1 IS NOT NULL AND score2 IS NOT NULL
+    """,
+    'get_droits_match': """
+        SELECT dm.id, e.nom, dm.montant, dm.paye, dm.date_paiement, dm.date_limite
+        FROM droits_match dm
+        JOIN equipes e ON dm.equipe_id = e.id
+        WHERE dm.tournoi_id = %(tournoi_id)s
+    """,
+    'get_eligibilite_equipes': """
+        SELECT e.id, e.nom, dm.id, dm.paye, dm.date_limite, dm.date_paiement
+        FROM equipes e
+        LEFT JOIN droits_match dm ON dm.tournoi_id = e.tournoi_id AND dm.equipe_id = e.id
+        WHERE e.tournoi_id = %(tournoi_id)s
+    """,
+    'get_equipes_avec_nb_joueurs': """
+        SELECT e.id, e.nom, e.groupe, e.numero, COUNT(j.id)
+        FROM equipes e
+        LEFT JOIN joueurs j ON j.equipe_id = e.id
+        WHERE e.tournoi_id = %(tournoi_id)s
+        GROUP BY e.id, e.nom, e.groupe, e.numero
+    """,
+    'get_meilleurs_buteurs': """
+        SELECT j.nom, e.nom as equipe, s.buts
+        FROM stats_joueurs_tournoi s
+        JOIN joueurs j ON s.joueur_id = j.id
+        JOIN equipes e ON s.equipe_id = e.id
+        WHERE s.tournoi_id = %(tournoi_id)s
+        ORDER BY s.buts DESC
+        LIMIT 10
+    """,
+    'get_meilleurs_joueurs': """
+        SELECT j.nom, e.nom as equipe, s.hommes_du_match, s.points
+        FROM stats_joueurs_tournoi s
+        JOIN joueurs j ON s.joueur_id = j.id
+        JOIN equipes e ON s.equipe_id = e.id
+        WHERE s.tournoi_id = %(tournoi_id)s
+        ORDER BY s.hommes_du_match DESC, s.points DESC
+        LIMIT 10
+    """,
+    'get_prochains_matchs': """
+        SELECT e1.nom, e2.nom, m.date_match, m.lieu, g.nom, m.phase
+        FROM matchs m
+        JOIN equipes e1 ON m.equipe1_id = e1.id
+        JOIN equipes e2 ON m.equipe2_id = e2.id
+        LEFT JOIN groupes g ON m.groupe_id = g.id
+        WHERE m.tournoi_id = %(tournoi_id)s AND m.date_match > NOW()
+        ORDER BY m.date_match ASC
+        LIMIT 10
+    """,
+    'get_phases_finales': """
+        SELECT pf.id, pf.niveau, pf.score1, pf.score2, pf.date_match, pf.statut
+        FROM phases_finales pf
+        WHERE pf.tournoi_id = %(tournoi_id)s
+    """,
+    'get_tournois_public': """
+        SELECT id, nom, date_debut, date_fin, lieu, description, statut
+        FROM tournois
+        WHERE statut IN ('en_cours', 'planifié')
+        ORDER BY date_debut DESC
+    """,
+}
+
+def _creer_table_migrations(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applique_le TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def version_actuelle(conn):
+    cursor = conn.cursor()
+    _creer_table_migrations(cursor)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    version = cursor.fetchone()[0]
+    cursor.close()
+    return version
+
+def _index_existe(cursor, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (index.table, index.nom))
+    return cursor.fetchone()[0] > 0
+
+def _colonne_existe(cursor, colonne):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (colonne.table, colonne.nom))
+    return cursor.fetchone()[0] > 0
+
+def _doublons(cursor, index):
+    """Nombre de valeurs en double pour les colonnes de l'index (les NULL ne comptent pas)."""
+    colonnes = ', '.join(index.colonnes)
+    non_nulles = ' AND '.join(f"{c} IS NOT NULL" for c in index.colonnes)
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM {index.table} WHERE {non_nulles}
+            GROUP BY {colonnes} HAVING COUNT(*) > 1
+        ) d
+    """)
+    return cursor.fetchone()[0]
+
+def _sql_etape(etape):
+    if isinstance(etape, Index):
+        unique = "UNIQUE " if etape.unique else ""
+        return f"CREATE {unique}INDEX {etape.nom} ON {etape.table} ({', '.join(etape.colonnes)})"
+    if isinstance(etape, Colonne):
+        return f"ALTER TABLE {etape.table} ADD COLUMN {etape.nom} {etape.definition}"
+    return etape
+
+def migrer(conn, cible=None, simulation=False):
+    """Applique les migrations en attente jusqu'à `cible` (la dernière par défaut).
+
+    Retourne la liste des (version, description) appliquées. En simulation,
+    les requêtes sont seulement affichées. Avant un index unique, les doublons
+    sont fusionnés (DEDOUBLONNAGE) ; s'il en reste, MigrationBloquee est levée.
+    """
+    depart = version_actuelle(conn)
+    cursor = conn.cursor()
+    appliquees = []
+    for version, description, etapes in MIGRATIONS:
+        if version <= depart or (cible is not None and version > cible):
+            continue
+        for etape in etapes:
+            if isinstance(etape, Index) and _index_existe(cursor, etape):
+                continue
+            if isinstance(etape, Colonne) and _colonne_existe(cursor, etape):
+                continue
+            if isinstance(etape, Index) and etape.unique:
+                for sql in DEDOUBLONNAGE.get(etape.nom, []):
+                    if simulation:
+                        print(sql.strip() + ";")
+                    else:
+                        cursor.execute(sql)
+                nb_doublons = 0 if simulation else _doublons(cursor, etape)
+                if nb_doublons:
+                    conn.rollback()
+                    cursor.close()
+                    raise MigrationBloquee(
+                        msg=f"Migration {version} : {nb_doublons} valeur(s) en double dans "
+                            f"{etape.table} ({', '.join(etape.colonnes)}), index {etape.nom} non créé")
+            sql = _sql_etape(etape)
+            if simulation:
+                print(sql.strip() + ";")
+            else:
+                cursor.execute(sql)
+        if not simulation:
+            cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                           (version, description))
+            conn.commit()
+        appliquees.append((version, description))
+    cursor.close()
+    return appliquees
+
+def sql_reconstruire_stats_joueurs(conn, tournoi_id=None):
+    """Recalcule stats_joueurs_tournoi depuis stats_joueurs et cartons (un tournoi ou tous).
+
+    Retourne le nombre de lignes insérées.
+    """
+    cursor = conn.cursor()
+    try:
+        if tournoi_id is None:
+            cursor.execute("DELETE FROM stats_joueurs_tournoi")
+            cursor.execute(SQL_REMPLIR_STATS_JOUEURS.format(filtre=""))
+        else:
+            cursor.execute("DELETE FROM stats_joueurs_tournoi WHERE tournoi_id = %s", (tournoi_id,))
+            cursor.execute(SQL_REMPLIR_STATS_JOUEURS.format(filtre="WHERE s.tournoi_id = %s"), (tournoi_id,))
+        nb_lignes = cursor.rowcount
+        conn.commit()
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return nb_lignes
+
+def verifier_plans(conn, tournoi_id=None):
+    """Lance EXPLAIN sur chaque requête critique.
+
+    Retourne une liste de dicts (requete, table, type, key, rows, Extra,
+    parcours_complet). Un parcours complet (type ALL) sur une table réelle
+    est signalé ; les tables dérivées (<derived…>) sont ignorées.
+    """
+    cursor = conn.cursor(dictionary=True)
+    if tournoi_id is None:
+        cursor.execute("SELECT id FROM tournois ORDER BY id DESC LIMIT 1")
+        row = cursor.fetchone()
+        tournoi_id = row['id'] if row else 0
+    cursor.execute("SELECT id FROM groupes WHERE tournoi_id = %s LIMIT 1", (tournoi_id,))
+    row = cursor.fetchone()
+    params = {'tournoi_id': tournoi_id, 'groupe_id': row['id'] if row else 0}
+
+    resultats = []
+    for nom, sql in REQUETES_CRITIQUES.items():
+        try:
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+        except Error as e:
+            resultats.append({'requete': nom, 'table': None, 'type': None, 'key': None,
+                              'rows': None, 'Extra': str(e), 'parcours_complet': False})
+            continue
+        for ligne in plan:
+            table = ligne.get('table') or ''
+            resultats.append({
+                'requete': nom,
+                'table': table,
+                'type': ligne.get('type'),
+                'key': ligne.get('key'),
+                'rows': ligne.get('rows'),
+                'Extra': ligne.get('Extra'),
+                'parcours_complet': ligne.get('type') == 'ALL' and not table.startswith('<'),
+            })
+    cursor.close()
+    return resultats
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrations et vérification du schéma tournois_app")
+    sous = parser.add_subparsers(dest='commande', required=True)
+    sous.add_parser('status', help="version actuelle et migrations en attente")
+    p_migrate = sous.add_parser('migrate', help="appliquer les migrations en attente")
+    p_migrate.add_argument('--cible', type=int, default=None, help="version cible")
+    p_migrate.add_argument('--simulation', action='store_true', help="afficher le SQL sans l'exécuter")
+    p_check = sous.add_parser('check', help="EXPLAIN des requêtes critiques")
+    p_check.add_argument('--tournoi', type=int, default=None, help="tournoi utilisé pour les paramètres")
+    p_reconcile = sous.add_parser('reconcile', help="recalculer stats_joueurs_tournoi depuis stats_joueurs")
+    p_reconcile.add_argument('--tournoi', type=int, default=None, help="limiter à un tournoi")
+    args = parser.parse_args(argv)
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if args.commande == 'status':
+            version = version_actuelle(conn)
+            print(f"Version du schéma : {version}")
+            for v, description, _ in MIGRATIONS:
+                if v > version:
+                    print(f"  en attente : {v} - {description}")
+        elif args.commande == 'migrate':
+            try:
+                appliquees = migrer(conn, args.cible, args.simulation)
+            except MigrationBloquee as e:
+                print(e)
+                return 1
+            for v, description in appliquees:
+                print(f"{'(simulation) ' if args.simulation else ''}{v} - {description}")
+            if not appliquees:
+                print("Schéma à jour")
+        elif args.commande == 'check':
+            resultats = verifier_plans(conn, args.tournoi)
+            for r in resultats:
+                alerte = "PARCOURS COMPLET" if r['parcours_complet'] else "ok"
+                print(f"{r['requete']:<28} {r['table'] or '-':<12} type={r['type']} "
+                      f"key={r['key']} rows={r['rows']}  {alerte}")
+            return 1 if any(r['parcours_complet'] for r in resultats) else 0
+        elif args.commande == 'reconcile':
+            nb_lignes = sql_reconstruire_stats_joueurs(conn, args.tournoi)
+            print(f"stats_joueurs_tournoi : {nb_lignes} ligne(s) recalculée(s)")
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,921 @@
 import streamlit as st
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 from fpdf import FPDF
 from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import random
+import re
 import numpy as np
+import functools
+import hashlib
+import inspect
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import tempfile
 import time
+import unicodedata
+import uuid
+import zipfile
 import json
 import base64
+import contextvars
+from html import escape
 from io import BytesIO
 
+import schema
+
 # ----------------- Connexion MySQL -----------------
+DB_CONFIG = schema.DB_CONFIG
+
+POOL_CONFIG = {
+    'size': int(os.environ.get('TOURNOI_POOL_SIZE', 5)),
+    'max_overflow': int(os.environ.get('TOURNOI_POOL_MAX_OVERFLOW', 10)),
+    'timeout': float(os.environ.get('TOURNOI_POOL_TIMEOUT', 5)),
+    'health_check_interval': float(os.environ.get('TOURNOI_POOL_HEALTH_CHECK', 30)),
+    # Requêtes préparées côté serveur gardées par connexion (0 = désactivé)
+    'prepared_cache': int(os.environ.get('TOURNOI_POOL_PREPARED_CACHE', 64)),
+}
+
+class ConnectionPool:
+    """Pool de connexions MySQL partagé par tout le processus.
+
+    Jusqu'à `size + max_overflow` connexions sont ouvertes ; une connexion
+    rendue n'est fermée que si `size` connexions attendent déjà au repos.
+    Les emprunteurs en attente sont réveillés dès qu'une connexion revient
+    ou qu'une place se libère (connexion fermée). Une connexion inactive depuis plus de `health_check_interval` secondes
+    est vérifiée (ping) avant d'être prêtée.
+    
+    Chaque connexion garde ses propres requêtes préparées (`prepared_cache`
+    au plus) : elles vivent et meurent avec elle, le pool les lui rend à
+    chaque emprunt.
+    """
+
+    def __init__(self, db_config, size=5, max_overflow=10, timeout=5.0, health_check_interval=30.0,
+                 prepared_cache=64):
+        self.db_config = dict(db_config)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.prepared_cache = prepared_cache
+        self.registre = RegistreRequetes()
+        # Connexions au repos (pile : la plus récente d'abord), protégées par _cond
+        self._idle = []
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._opened = 0
+        self._in_use = 0
+        self._metrics = {
+            'checkouts': 0,
+            'wait_time': 0.0,
+            'max_wait': 0.0,
+            'overflow': 0,
+            'overflow_peak': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+        }
+
+    def _reserve_slot(self):
+        # Appelée avec _cond acquis
+        if self._opened < self.size + self.max_overflow:
+            self._opened += 1
+            if self._opened > self.size:
+                self._metrics['overflow'] += 1
+                self._metrics['overflow_peak'] = max(self._metrics['overflow_peak'], self._opened - self.size)
+            return True
+        return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _is_healthy(self, conn, last_used):
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            with self._lock:
+                self._metrics['health_check_failures'] += 1
+            return False
+
+    def acquire(self):
+        """Emprunte une connexion ; lève PoolError si aucune ne se libère à temps."""
+        debut = time.perf_counter()
+        echeance = debut + self.timeout
+        while True:
+            with self._cond:
+                while not self._idle and not self._reserve_slot():
+                    restant = echeance - time.perf_counter()
+                    if restant <= 0:
+                        self._metrics['timeouts'] += 1
+                        raise PoolError(f"Aucune connexion disponible après {self.timeout:.1f} s")
+                    self._cond.wait(restant)
+                entree = self._idle.pop() if self._idle else None
+            if entree is None:
+                # Place réservée : ouvrir une nouvelle connexion hors du verrou
+                try:
+                    conn = mysql.connector.connect(**self.db_config)
+                except Error:
+                    with self._cond:
+                        self._opened -= 1
+                        self._cond.notify()
+                    raise
+                prepares = CachePrepares(self.prepared_cache) if self.prepared_cache > 0 else None
+                break
+            conn, last_used, prepares = entree
+            if self._is_healthy(conn, last_used):
+                break
+            self._discard(conn)
+
+        attente = time.perf_counter() - debut
+        with self._lock:
+            self._in_use += 1
+            self._metrics['checkouts'] += 1
+            self._metrics['wait_time'] += attente
+            self._metrics['max_wait'] = max(self._metrics['max_wait'], attente)
+        return PooledConnection(self, conn, prepares)
+
+    def release(self, conn, prepares=None):
+        """Rend une connexion au pool (ou la ferme si `size` connexions sont déjà au repos)."""
+        with self._lock:
+            self._in_use -= 1
+        try:
+            # Terminer la transaction implicite ouverte par un SELECT, sinon la
+            # connexion suivante lirait un instantané périmé.
+            if conn.in_transaction:
+                conn.rollback()
+        except Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic(), prepares))
+                self._cond.notify()
+                return
+        self._discard(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Connexion empruntée pour un bloc : commit en fin de bloc, rollback en cas d'erreur."""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Error:
+                pass
+            raise
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._metrics)
+            stats['size'] = self.size
+            stats['max_overflow'] = self.max_overflow
+            stats['opened'] = self._opened
+            stats['in_use'] = self._in_use
+            stats['idle'] = len(self._idle)
+        stats['avg_wait'] = stats['wait_time'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+class PooledConnection:
+    """Connexion prêtée par le pool : close() la rend au pool au lieu de la fermer."""
+
+    __slots__ = ('_pool', '_conn', '_prepares')
+
+    def __init__(self, pool, conn, prepares=None):
+        self._pool = pool
+        self._conn = conn
+        self._prepares = prepares
+
+    def __getattr__(self, name):
+        if name in PooledConnection.__slots__:
+            raise AttributeError(name)
+        return getattr(self._conn, name)
+
+    def cursor(self, dictionary=False, **kwargs):
+        # Seuls les curseurs simples passent par les requêtes préparées ; les
+        # autres (dictionary, buffered...) restent en protocole texte.
+        prepares = self._prepares if not dictionary and not kwargs else None
+        return CurseurInstrumente(self._conn, self._pool.registre, prepares, dictionary=dictionary, **kwargs)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, self._prepares)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # Filet de sécurité pour les fonctions qui sortent sans close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+def normaliser_requete(sql):
+    """Texte d'une requête sans mise en forme ni longueur variable des listes IN."""
+    return _normaliser_requete(sql)
+
+@functools.lru_cache(maxsize=1024)
+def _normaliser_requete(sql):
+    texte = ' '.join(sql.split())
+    return re.sub(r"%s(?:\s*,\s*%s)+", "%s, ...", texte)
+
+class RegistreRequetes:
+    """Nombre d'exécutions, latence et lignes lues par requête (texte normalisé)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requetes = {}
+
+    def enregistrer(self, sql, duree, lignes, preparee):
+        cle = _normaliser_requete(sql)
+        with self._lock:
+            stats = self._requetes.get(cle)
+            if stats is None:
+                stats = self._requetes[cle] = {'executions': 0, 'preparees': 0, 'total': 0.0, 'max': 0.0, 'lignes': 0}
+            stats['executions'] += 1
+            stats['preparees'] += 1 if preparee else 0
+            stats['total'] += duree
+            stats['max'] = max(stats['max'], duree)
+            stats['lignes'] += max(lignes, 0)
+
+    def stats(self):
+        """Requêtes triées par temps cumulé décroissant."""
+        with self._lock:
+            copie = [(cle, dict(stats)) for cle, stats in self._requetes.items()]
+        resultat = [{
+            'requete': cle,
+            'executions': stats['executions'],
+            'preparees': stats['preparees'],
+            'total_ms': stats['total'] * 1000,
+            'moyenne_ms': stats['total'] * 1000 / stats['executions'],
+            'max_ms': stats['max'] * 1000,
+            'lignes': stats['lignes'],
+        } for cle, stats in copie]
+        resultat.sort(key=lambda r: r['total_ms'], reverse=True)
+        return resultat
+
+    def reinitialiser(self):
+        with self._lock:
+            self._requetes.clear()
+
+# Erreur MySQL « This command is not supported in the prepared statement protocol yet »
+ER_UNSUPPORTED_PS = 1295
+
+class CachePrepares:
+    """Requêtes préparées d'une connexion, par texte SQL, en LRU.
+
+    Le curseur préparé de mysql.connector ne réutilise sa préparation que si
+    on lui repasse le même objet chaîne : on garde donc la chaîne d'origine
+    avec le curseur. Un curseur évincé est fermé, ce qui libère la requête
+    côté serveur.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._curseurs = OrderedDict()
+        self._non_preparables = set()
+
+    def obtenir(self, conn, sql):
+        """(curseur, texte) préparé pour `sql`, ou None si la requête ne se prépare pas."""
+        if sql in self._non_preparables:
+            return None
+        entree = self._curseurs.get(sql)
+        if entree is not None:
+            self._curseurs.move_to_end(sql)
+            return entree
+        entree = self._curseurs[sql] = (conn.cursor(prepared=True), sql)
+        while len(self._curseurs) > self.maxsize:
+            _, (ancien, _) = self._curseurs.popitem(last=False)
+            self._fermer(ancien)
+        return entree
+
+    def retirer(self, sql, non_preparable=False):
+        entree = self._curseurs.pop(sql, None)
+        if entree is not None:
+            self._fermer(entree[0])
+        if non_preparable:
+            self._non_preparables.add(sql)
+
+    @staticmethod
+    def _fermer(curseur):
+        try:
+            curseur.close()
+        except Error:
+            pass
+
+    def __len__(self):
+        return len(self._curseurs)
+
+class CurseurInstrumente:
+    """Curseur rendu par PooledConnection.
+
+    execute() passe par la requête préparée de la connexion quand c'est
+    possible, lit tout le résultat d'un coup (la connexion est aussitôt libre
+    pour la requête suivante) et note la latence dans le registre du pool.
+    executemany() reste en protocole texte pour garder l'INSERT multi-lignes.
+    """
+
+    def __init__(self, conn, registre, prepares=None, **kwargs):
+        self._conn = conn
+        self._registre = registre
+        self._prepares = prepares
+        self._kwargs = kwargs
+        self._simple = None
+        self._lignes = []
+        self._index = 0
+        self.rowcount = -1
+        self.lastrowid = None
+        self.description = None
+
+    def _curseur_simple(self):
+        if self._simple is None:
+            self._simple = self._conn.cursor(**self._kwargs)
+        return self._simple
+
+    def _lire(self, curseur):
+        self._lignes = curseur.fetchall() if curseur.with_rows else []
+        self._index = 0
+        self.rowcount = curseur.rowcount
+        self.lastrowid = curseur.lastrowid
+        self.description = curseur.description
+
+    def execute(self, sql, params=None):
+        debut = time.perf_counter()
+        entree = self._prepares.obtenir(self._conn, sql) if self._prepares is not None else None
+        if entree is not None:
+            curseur, texte = entree
+            try:
+                curseur.execute(texte, params or ())
+                self._lire(curseur)
+            except Error as e:
+                # Un curseur préparé en erreur n'est pas réutilisé
+                self._prepares.retirer(sql, non_preparable=e.errno == ER_UNSUPPORTED_PS)
+                if e.errno != ER_UNSUPPORTED_PS:
+                    noter_echec()
+                    raise
+                entree = None
+        if entree is None:
+            curseur = self._curseur_simple()
+            try:
+                curseur.execute(sql, params)
+                self._lire(curseur)
+            except Error:
+                noter_echec()
+                raise
+        duree = time.perf_counter() - debut
+        lignes = len(self._lignes) or self.rowcount
+        self._registre.enregistrer(sql, duree, lignes, entree is not None)
+        noter_requete(sql, duree, lignes)
+
+    def executemany(self, sql, seq_params):
+        debut = time.perf_counter()
+        curseur = self._curseur_simple()
+        try:
+            curseur.executemany(sql, seq_params)
+        except Error:
+            noter_echec()
+            raise
+        self._lignes = []
+        self._index = 0
+        self.rowcount = curseur.rowcount
+        self.lastrowid = curseur.lastrowid
+        self.description = None
+        duree = time.perf_counter() - debut
+        self._registre.enregistrer(sql, duree, self.rowcount, False)
+        noter_requete(sql, duree, self.rowcount)
+
+    def fetchone(self):
+        if self._index >= len(self._lignes):
+            return None
+        ligne = self._lignes[self._index]
+        self._index += 1
+        return ligne
+
+    def fetchmany(self, size=1):
+        lignes = self._lignes[self._index:self._index + size]
+        self._index += len(lignes)
+        return lignes
+
+    def fetchall(self):
+        lignes = self._lignes[self._index:]
+        self._index = len(self._lignes)
+        return lignes
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def with_rows(self):
+        return self.description is not None
+
+    @property
+    def column_names(self):
+        return tuple(colonne[0] for colonne in self.description or ())
+
+    def close(self):
+        if self._simple is not None:
+            try:
+                self._simple.close()
+            except Error:
+                pass
+            self._simple = None
+        self._lignes = []
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+@st.cache_resource
+def get_pool():
+    return ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
+# Erreur posée par create_connection() en cas d'échec : lecture_en_cache ne
+# conserve pas un résultat calculé sans base de données.
+_echec_connexion = contextvars.ContextVar('echec_connexion', default=None)
+# Vrai dans les threads de lire_en_parallele, qui n'ont pas de contexte Streamlit
+_hors_streamlit = contextvars.ContextVar('hors_streamlit', default=False)
+
 def create_connection():
     try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='tournois_app'
-        )
-        return conn
+        return get_pool().acquire()
     except Error as e:
-        st.error(f"Erreur connexion DB : {e}")
+        _echec_connexion.set(e)
+        noter_echec()
+        if not _hors_streamlit.get():
+            st.error(f"Erreur connexion DB : {e}")
+        return None
+
+def transaction():
+    return get_pool().transaction()
+
+# ----------------- Cache des lectures -----------------
+CACHE_CONFIG = {
+    'maxsize': int(os.environ.get('TOURNOI_CACHE_MAXSIZE', 512)),
+    'ttl': float(os.environ.get('TOURNOI_CACHE_TTL', 60)),
+}
+
+class CacheLectures:
+    """Cache LRU à durée de vie limitée pour les lectures par tournoi.
+
+    Chaque tournoi a un numéro de version inclus dans la clé : une écriture
+    incrémente la version (invalider_tournoi) et les anciennes entrées
+    deviennent inaccessibles. Le TTL ne sert que de garde-fou pour les
+    écritures faites hors de l'application. La portée None regroupe les
+    lectures globales (liste des tournois).
+    """
+
+    def __init__(self, maxsize=512, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def version(self, tournoi_id):
+        with self._lock:
+            return self._versions.get(tournoi_id, 0)
+
+    def invalider(self, tournoi_id):
+        with self._lock:
+            self._versions[tournoi_id] = self._versions.get(tournoi_id, 0) + 1
+
+    def get(self, cle):
+        with self._lock:
+            entree = self._entries.get(cle)
+            if entree is None or time.monotonic() - entree[0] > self.ttl:
+                if entree is not None:
+                    del self._entries[cle]
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(cle)
+            self._hits += 1
+            return True, entree[1]
+
+    def set(self, cle, valeur):
+        with self._lock:
+            self._entries[cle] = (time.monotonic(), valeur)
+            self._entries.move_to_end(cle)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / total if total else 0.0,
+                'versions': dict(self._versions),
+            }
+
+@st.cache_resource
+def get_cache():
+    return CacheLectures(**CACHE_CONFIG)
+
+def version_tournoi(tournoi_id):
+    return get_cache().version(tournoi_id)
+
+def invalider_tournoi(tournoi_id):
+    """À appeler après chaque écriture touchant un tournoi (None : liste des tournois)."""
+    get_cache().invalider(tournoi_id)
+
+def lecture_en_cache(fonction):
+    """Met en cache une lecture dont le premier argument est le tournoi_id.
+
+    Un résultat n'est pas conservé si une connexion a échoué pendant son
+    calcul (y compris dans une lecture imbriquée) : la valeur par défaut
+    renvoyée alors ([], (0, 0)...) ne décrit pas le tournoi. Les résultats
+    vides obtenus normalement sont conservés. Les listes sont copiées pour
+    que l'appelant puisse les modifier sans altérer le cache.
+    """
+    @functools.wraps(fonction)
+    def wrapper(*args, **kwargs):
+        tournoi_id = args[0] if args else kwargs.get('tournoi_id')
+        cache = get_cache()
+        cle = (fonction.__name__, args, tuple(sorted(kwargs.items())), cache.version(tournoi_id))
+        trouve, valeur = cache.get(cle)
+        if not trouve:
+            jeton = _echec_connexion.set(None)
+            try:
+                valeur = fonction(*args, **kwargs)
+            finally:
+                echec = _echec_connexion.get()
+                _echec_connexion.reset(jeton)
+            if echec:
+                # Prévenir une éventuelle lecture en cache englobante
+                _echec_connexion.set(echec)
+            else:
+                cache.set(cle, valeur)
+        return list(valeur) if isinstance(valeur, list) else valeur
+    return wrapper
+
+def _tournoi_de(cursor, table, ligne_id):
+    """tournoi_id d'une ligne de equipes, droits_match, matchs ou phases_finales."""
+    cursor.execute(f"SELECT tournoi_id FROM {table} WHERE id=%s", (ligne_id,))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+# ----------------- Lectures parallèles -----------------
+LECTURES_WORKERS = int(os.environ.get('TOURNOI_LECTURES_WORKERS', 8))
+
+@st.cache_resource
+def get_executeur_lectures():
+    return ThreadPoolExecutor(max_workers=LECTURES_WORKERS, thread_name_prefix='lecture')
+
+def lire_en_parallele(**lectures):
+    """Exécute des lectures indépendantes en même temps et attend la plus lente.
+
+    Chaque argument nommé est un tuple (fonction, *arguments) ; retourne un
+    dict nom -> résultat. Chaque lecture prend sa propre connexion du pool
+    et s'exécute dans une copie du contexte courant (contextvars). Une
+    exception est relancée à la lecture du résultat. Les fonctions lancées
+    ne doivent pas appeler Streamlit ni lire_en_parallele elles-mêmes.
+    Une connexion échouée dans une lecture est signalée à l'appelant comme
+    s'il avait fait la lecture lui-même (voir lecture_en_cache) ; le message
+    d'erreur est affiché ici, depuis le thread du script.
+    """
+    executeur = get_executeur_lectures()
+    lancees = {}
+    for nom, (fonction, *args) in lectures.items():
+        contexte = contextvars.copy_context()
+        contexte.run(_hors_streamlit.set, True)
+        lancees[nom] = (contexte, executeur.submit(contexte.run, fonction, *args))
+    resultats = {}
+    erreur = None
+    for nom, (contexte, future) in lancees.items():
+        resultats[nom] = future.result()
+        echec = contexte.get(_echec_connexion)
+        if echec:
+            _echec_connexion.set(echec)
+            erreur = echec
+    if erreur:
+        st.error(f"Erreur connexion DB : {erreur}")
+    return resultats
+
+# ----------------- Instrumentation -----------------
+PROFIL_CONFIG = {
+    # Requêtes plus lentes que ce seuil (ms) écrites dans le journal
+    'seuil_lent_ms': float(os.environ.get('TOURNOI_SEUIL_LENT_MS', 200)),
+    'journal_lent': os.environ.get('TOURNOI_JOURNAL_LENT', os.path.join('logs', 'requetes_lentes.log')),
+    # Une ligne JSON par fonction et par rerun (pd.read_json(..., lines=True)) ; vide = désactivé
+    'fichier_profil': os.environ.get('TOURNOI_FICHIER_PROFIL', ''),
+    'reruns_gardes': int(os.environ.get('TOURNOI_PROFIL_RERUNS', 500)),
+    # Rotation des deux fichiers : taille maximale (Mo) et nombre d'anciens fichiers gardés
+    'taille_max_mo': float(os.environ.get('TOURNOI_JOURNAUX_TAILLE_MO', 10)),
+    'fichiers_gardes': int(os.environ.get('TOURNOI_JOURNAUX_GARDES', 3)),
+}
+
+HORS_FONCTION = '(hors fonction)'
+
+_mesure_rerun = contextvars.ContextVar('mesure_rerun', default=None)
+_fonction_courante = contextvars.ContextVar('fonction_courante', default=None)
+
+class MesureRerun:
+    """Temps, requêtes et lignes par fonction pendant un rerun Streamlit.
+
+    Le temps d'une fonction inclut celui des fonctions qu'elle appelle ; une
+    requête n'est comptée que pour la fonction instrumentée la plus interne.
+    La page est la fonction show_* la plus imbriquée rencontrée.
+    """
+
+    def __init__(self, session=None, role=None, page=None):
+        self.rerun = uuid.uuid4().hex[:12]
+        self.session = session
+        self.role = role
+        self.horodatage = datetime.now()
+        self.debut = time.perf_counter()
+        self.duree = 0.0
+        self.page = page
+        self._profondeur_page = 0
+        self._lock = threading.Lock()
+        self._fonctions = {}
+
+    def _stats(self, nom):
+        stats = self._fonctions.get(nom)
+        if stats is None:
+            stats = self._fonctions[nom] = {'appels': 0, 'duree': 0.0, 'requetes': 0, 'lignes': 0, 'erreurs': 0}
+        return stats
+
+    def entrer_page(self, nom, profondeur):
+        with self._lock:
+            if profondeur > self._profondeur_page:
+                self.page, self._profondeur_page = nom, profondeur
+
+    def fonction(self, nom, duree, erreur):
+        with self._lock:
+            stats = self._stats(nom)
+            stats['appels'] += 1
+            stats['duree'] += duree
+            stats['erreurs'] += 1 if erreur else 0
+
+    def requete(self, nom, lignes):
+        with self._lock:
+            stats = self._stats(nom)
+            stats['requetes'] += 1
+            stats['lignes'] += max(lignes, 0)
+
+    def terminer(self):
+        self.duree = time.perf_counter() - self.debut
+
+    def lignes(self):
+        """Une ligne par fonction, au format long attendu par pandas."""
+        with self._lock:
+            fonctions = [(nom, dict(stats)) for nom, stats in self._fonctions.items()]
+        requetes = sum(stats['requetes'] for _, stats in fonctions)
+        return [{
+            'horodatage': self.horodatage.isoformat(timespec='seconds'),
+            'rerun': self.rerun,
+            'session': self.session,
+            'role': self.role,
+            'page': self.page or HORS_FONCTION,
+            'rerun_ms': round(self.duree * 1000, 2),
+            'requetes_rerun': requetes,
+            'fonction': nom,
+            'appels': stats['appels'],
+            'duree_ms': round(stats['duree'] * 1000, 2),
+            'requetes': stats['requetes'],
+            'lignes': stats['lignes'],
+            'erreurs': stats['erreurs'],
+        } for nom, stats in fonctions]
+
+def journal_fichier(nom, chemin, format_ligne):
+    """Logger écrivant dans `chemin` depuis un thread dédié, avec rotation par taille.
+
+    L'appelant ne fait que mettre l'enregistrement en file : aucune écriture
+    disque sur le chemin d'une requête. None si `chemin` est vide.
+    """
+    if not chemin:
+        return None
+    journal = logging.getLogger(nom)
+    journal.propagate = False
+    journal.setLevel(logging.INFO)
+    if not journal.handlers:
+        try:
+            os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+            fichier = logging.handlers.RotatingFileHandler(
+                chemin, maxBytes=int(PROFIL_CONFIG['taille_max_mo'] * 1024 * 1024),
+                backupCount=PROFIL_CONFIG['fichiers_gardes'], encoding='utf-8', delay=True)
+        except OSError as e:
+            print(f"Journal {chemin} indisponible : {e}")
+            return None
+        fichier.setFormatter(logging.Formatter(format_ligne))
+        file_attente = queue.SimpleQueue()
+        logging.handlers.QueueListener(file_attente, fichier).start()
+        journal.addHandler(logging.handlers.QueueHandler(file_attente))
+    return journal
+
+class ProfilsReruns:
+    """Derniers reruns mesurés, gardés en mémoire et copiés dans un journal JSONL (facultatif)."""
+
+    def __init__(self, journal=None, reruns_gardes=500):
+        self.journal = journal
+        self._reruns = deque(maxlen=reruns_gardes)
+        self._lock = threading.Lock()
+
+    def ajouter(self, mesure):
+        lignes = mesure.lignes()
+        with self._lock:
+            self._reruns.append(lignes)
+        if self.journal is not None and lignes:
+            # Un seul enregistrement par rerun, écrit par le thread du journal
+            self.journal.info("\n".join(json.dumps(ligne, ensure_ascii=False) for ligne in lignes))
+
+    def dataframe(self):
+        with self._lock:
+            lignes = [ligne for rerun in self._reruns for ligne in rerun]
+        return pd.DataFrame(lignes)
+
+    def jsonl(self):
+        with self._lock:
+            lignes = [ligne for rerun in self._reruns for ligne in rerun]
+        return "".join(json.dumps(ligne, ensure_ascii=False) + "\n" for ligne in lignes)
+
+    def vider(self):
+        with self._lock:
+            self._reruns.clear()
+
+@st.cache_resource
+def get_profils():
+    journal = journal_fichier('tournoi.profil', PROFIL_CONFIG['fichier_profil'], '%(message)s')
+    return ProfilsReruns(journal, PROFIL_CONFIG['reruns_gardes'])
+
+@st.cache_resource
+def get_journal_lent():
+    return journal_fichier('tournoi.requetes_lentes', PROFIL_CONFIG['journal_lent'], '%(asctime)s %(message)s')
+
+def noter_requete(sql, duree, lignes):
+    """Appelé par CurseurInstrumente après chaque requête."""
+    courante = _fonction_courante.get()
+    nom = courante['nom'] if courante else HORS_FONCTION
+    mesure = _mesure_rerun.get()
+    if mesure is not None:
+        mesure.requete(nom, lignes)
+    if duree * 1000 >= PROFIL_CONFIG['seuil_lent_ms']:
+        page = mesure.page if mesure is not None else None
+        journal = get_journal_lent()
+        if journal is not None:
+            journal.info("%.1f ms | %s | %s | %d lignes | %s",
+                         duree * 1000, page or '-', nom, lignes, normaliser_requete(sql))
+
+def noter_echec():
+    """Connexion ou requête échouée : l'appel en cours et ceux qui l'englobent sont en erreur."""
+    appel = _fonction_courante.get()
+    while appel is not None:
+        appel['echec'] = True
+        appel = appel['parent']
+
+def instrumente(fonction):
+    """Mesure les appels de `fonction` dans le rerun en cours (sans effet hors rerun).
+
+    Un appel compte comme une erreur si une exception en sort, ou si une
+    connexion ou une requête a échoué pendant l'appel même quand la fonction
+    a intercepté l'erreur (voir noter_echec).
+    """
+    nom = fonction.__name__
+    est_page = nom.startswith('show_')
+
+    @functools.wraps(fonction)
+    def wrapper(*args, **kwargs):
+        mesure = _mesure_rerun.get()
+        if mesure is None:
+            return fonction(*args, **kwargs)
+        parent = _fonction_courante.get()
+        profondeur = (parent['profondeur'] if parent else 0) + (1 if est_page else 0)
+        if est_page:
+            mesure.entrer_page(nom, profondeur)
+        appel = {'nom': nom, 'profondeur': profondeur, 'parent': parent, 'echec': False}
+        jeton = _fonction_courante.set(appel)
+        debut = time.perf_counter()
+        try:
+            return fonction(*args, **kwargs)
+        except Exception:
+            # st.rerun / st.stop ne dérivent pas d'Exception : pas comptés
+            appel['echec'] = True
+            raise
+        finally:
+            _fonction_courante.reset(jeton)
+            mesure.fonction(nom, time.perf_counter() - debut, appel['echec'])
+    wrapper._instrumente = True
+    return wrapper
+
+def instrumenter_module(espace):
+    """Instrumente les pages (show_*) et les fonctions qui ouvrent une connexion."""
+    for nom, objet in list(espace.items()):
+        if not inspect.isfunction(objet) or getattr(objet, '_instrumente', False):
+            continue
+        if objet.__module__ != espace.get('__name__'):
+            continue
+        noms_utilises = inspect.unwrap(objet).__code__.co_names
+        if nom.startswith('show_') or 'create_connection' in noms_utilises or 'transaction' in noms_utilises:
+            espace[nom] = instrumente(objet)
+
+@contextmanager
+def mesurer_rerun(page=None):
+    """Mesure tout le rerun courant puis le range dans get_profils().
+
+    Sans effet si un rerun est déjà mesuré (fragment appelé pendant le rerun complet).
+    """
+    if _mesure_rerun.get() is not None:
+        yield _mesure_rerun.get()
+        return
+    mesure = MesureRerun(st.session_state.get('profil_session'), st.session_state.get('user_role'), page)
+    jeton = _mesure_rerun.set(mesure)
+    try:
+        yield mesure
+    finally:
+        _mesure_rerun.reset(jeton)
+        mesure.terminer()
+        get_profils().ajouter(mesure)
+
+def fragment_mesure(fonction, run_every):
+    """st.fragment dont les exécutions isolées sont mesurées comme des reruns ; None sans st.fragment."""
+    if not hasattr(st, 'fragment'):
         return None
+    
+    @functools.wraps(fonction)
+    def mesuree(*args, **kwargs):
+        with mesurer_rerun(page=f"{fonction.__name__} (fragment)"):
+            return fonction(*args, **kwargs)
+    return st.fragment(run_every=run_every)(mesuree)
+
+def afficher_profil_pages():
+    """Panneau admin : temps et requêtes par page, puis détail par fonction."""
+    profils = get_profils()
+    df = profils.dataframe()
+    if df.empty:
+        st.info("Aucun rerun mesuré pour l'instant")
+        return
+    
+    reruns = df.drop_duplicates('rerun')
+    par_page = reruns.groupby('page').agg(
+        reruns=('rerun', 'count'),
+        moyenne_ms=('rerun_ms', 'mean'),
+        p95_ms=('rerun_ms', lambda x: x.quantile(0.95)),
+        max_ms=('rerun_ms', 'max'),
+        requetes_moyennes=('requetes_rerun', 'mean'),
+    ).sort_values('moyenne_ms', ascending=False).round(1)
+    st.dataframe(par_page)
+    
+    page = st.selectbox("Détail de la page", par_page.index.tolist(), key="profil_page")
+    detail = df[df['page'] == page]
+    nb_reruns = detail['rerun'].nunique()
+    par_fonction = detail.groupby('fonction')[['appels', 'duree_ms', 'requetes', 'lignes', 'erreurs']].sum()
+    par_fonction = (par_fonction / nb_reruns).sort_values('duree_ms', ascending=False).round(2)
+    st.caption(f"Moyennes par rerun sur {nb_reruns} rerun(s) ; durée incluant les fonctions appelées")
+    st.dataframe(par_fonction)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Exporter les mesures (JSONL)", profils.jsonl(),
+                           file_name="profil_reruns.jsonl", mime="application/x-ndjson")
+    with col2:
+        if st.button("Vider les mesures"):
+            profils.vider()
+            st.rerun()
+    
+    journal = PROFIL_CONFIG['journal_lent']
+    if journal and os.path.exists(journal):
+        with open(journal, encoding='utf-8') as f:
+            dernieres = deque(f, maxlen=20)
+        st.write(f"Requêtes lentes (> {PROFIL_CONFIG['seuil_lent_ms']:.0f} ms), journal `{journal}` :")
+        st.code("".join(dernieres) or "(vide)")
 
 # ----------------- Fonctions d'authentification -----------------
 def authenticate_user(username, password):
@@ -133,6 +1023,7 @@ def subscribe_visiteur_to_tournoi(visiteur_id, tournoi_id):
             return False, f"Erreur abonnement: {e}"
     return False, "Erreur de connexion"
 
+@lecture_en_cache
 def get_tournois_public():
     conn = create_connection()
     if conn:
@@ -149,24 +1040,9 @@ def get_tournois_public():
     return []
 
 def get_classement_public(tournoi_id):
-    conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT e.nom, g.nom,
-            c.matches_joues, c.victories, c.draws, c.losses,
-            c.goals_for, c.goals_against, c.points
-            FROM classement c
-            JOIN equipes e ON c.equipe_id = e.id
-            JOIN groupes g ON c.groupe_id = g.id
-            WHERE c.tournoi_id = %s
-            ORDER BY g.nom, c.points DESC, (c.goals_for - c.goals_against) DESC
-        """, (tournoi_id,))
-        classement = cursor.fetchall()
-        conn.close()
-        return classement
-    return []
+    return get_classement(tournoi_id)
 
+@lecture_en_cache
 def get_prochains_matchs(tournoi_id, limit=10):
     conn = create_connection()
     if conn:
@@ -186,7 +1062,94 @@ def get_prochains_matchs(tournoi_id, limit=10):
         return matchs
     return []
 
+# ----------------- Vue publique -----------------
+INSTANTANE_CONFIG = {
+    'intervalle': float(os.environ.get('TOURNOI_PUBLIC_INTERVALLE', 30)),
+}
+
+class InstantanesPublics:
+    """Instantanés partagés de la vue publique, un par tournoi.
+
+    Un instantané est recalculé quand le tournoi change (version du cache)
+    ou après `intervalle` secondes (les prochains matchs dépendent de
+    l'heure). Un seul lecteur recalcule à la fois : les autres reçoivent
+    l'instantané précédent au lieu d'interroger la base, si bien que la
+    charge MySQL ne dépend pas du nombre de spectateurs. Les données
+    renvoyées sont partagées et ne doivent pas être modifiées.
+    """
+
+    def __init__(self, intervalle=30.0):
+        self.intervalle = intervalle
+        self._instantanes = {}
+        self._verrous = {}
+        self._lock = threading.Lock()
+        self._lectures = 0
+        self._calculs = 0
+
+    def _a_jour(self, instantane, version):
+        return (instantane is not None and instantane['version'] == version
+                and time.monotonic() - instantane['calcule_le'] < self.intervalle)
+
+    def obtenir(self, tournoi_id, calculer):
+        """Instantané du tournoi (None : liste des tournois publics), calculé par `calculer()` si périmé."""
+        with self._lock:
+            self._lectures += 1
+            instantane = self._instantanes.get(tournoi_id)
+            verrou = self._verrous.setdefault(tournoi_id, threading.Lock())
+        if self._a_jour(instantane, version_tournoi(tournoi_id)):
+            return instantane['donnees']
+        
+        # Un autre lecteur recalcule déjà : servir l'instantané précédent
+        if not verrou.acquire(blocking=instantane is None):
+            return instantane['donnees']
+        try:
+            instantane = self._instantanes.get(tournoi_id)
+            version = version_tournoi(tournoi_id)
+            if self._a_jour(instantane, version):
+                return instantane['donnees']
+            jeton = _echec_connexion.set(None)
+            try:
+                donnees = calculer()
+            finally:
+                echec = _echec_connexion.get()
+                _echec_connexion.reset(jeton)
+            # Comme pour le cache des lectures, seul un calcul sans connexion échouée est conservé ;
+            # une liste vide de tournois publics est un résultat valable.
+            if not echec:
+                with self._lock:
+                    self._instantanes[tournoi_id] = {
+                        'donnees': donnees, 'version': version, 'calcule_le': time.monotonic()
+                    }
+                    self._calculs += 1
+            return donnees
+        finally:
+            verrou.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'instantanes': len(self._instantanes),
+                'lectures': self._lectures,
+                'calculs': self._calculs,
+                'intervalle': self.intervalle,
+            }
+
+@st.cache_resource
+def get_instantanes():
+    return InstantanesPublics(**INSTANTANE_CONFIG)
+
+def instantane_tournois_publics():
+    return get_instantanes().obtenir(None, get_tournois_public)
+
+def instantane_tournoi_public(tournoi_id):
+    """Dict partagé {'classement', 'prochains_matchs'} du tournoi pour la vue publique."""
+    return get_instantanes().obtenir(tournoi_id, lambda: lire_en_parallele(
+        classement=(get_classement_public, tournoi_id),
+        prochains_matchs=(get_prochains_matchs, tournoi_id),
+    ))
+
 # ----------------- CRUD Tournoi -----------------
+@lecture_en_cache
 def get_tournois():
     conn = create_connection()
     if conn:
@@ -208,9 +1171,11 @@ def creer_tournoi(nom, format_finales, eq_pg, eq_qual):
         conn.commit()
         tid = cursor.lastrowid
         conn.close()
+        invalider_tournoi(None)
         return tid
     return None
 
+@lecture_en_cache
 def get_tournoi_details(tournoi_id):
     conn = create_connection()
     if conn:
@@ -221,7 +1186,68 @@ def get_tournoi_details(tournoi_id):
         return tournoi
     return None
 
+@lecture_en_cache
+def get_apercu_tournoi(tournoi_id, nb_derniers=5):
+    """Indicateurs du dashboard et derniers matchs, en une seule requête.
+
+    Retourne un dict (nom, nb_equipes, nb_groupes, nb_matchs, nb_droits,
+    nb_payes, montant_total, montant_percu, derniers_matchs) ou None si le
+    tournoi n'existe pas. derniers_matchs contient (id, équipe 1, équipe 2,
+    groupe, date, score1, score2) dans l'ordre chronologique.
+    """
+    conn = create_connection()
+    if conn:
+        cursor = conn.cursor()
+        # Les agrégats sont répétés sur chacune des (au plus) nb_derniers lignes de matchs
+        cursor.execute("""
+            SELECT t.nom,
+                   (SELECT COUNT(*) FROM equipes WHERE tournoi_id = t.id),
+                   (SELECT COUNT(*) FROM groupes WHERE tournoi_id = t.id),
+                   (SELECT COUNT(*) FROM matchs WHERE tournoi_id = t.id),
+                   d.nb, d.payes, d.total, d.percu,
+                   derniers.id, derniers.equipe1, derniers.equipe2, derniers.groupe,
+                   derniers.date_match, derniers.score1, derniers.score2
+            FROM tournois t
+            CROSS JOIN (
+                SELECT COUNT(*) AS nb, COALESCE(SUM(paye), 0) AS payes,
+                       COALESCE(SUM(montant), 0) AS total,
+                       COALESCE(SUM(CASE WHEN paye THEN montant ELSE 0 END), 0) AS percu
+                FROM droits_match WHERE tournoi_id = %s
+            ) d
+            LEFT JOIN (
+                SELECT m.id, e1.nom AS equipe1, e2.nom AS equipe2, g.nom AS groupe,
+                       m.date_match, m.score1, m.score2
+                FROM matchs m
+                JOIN equipes e1 ON m.equipe1_id = e1.id
+                JOIN equipes e2 ON m.equipe2_id = e2.id
+                LEFT JOIN groupes g ON m.groupe_id = g.id
+                WHERE m.tournoi_id = %s
+                ORDER BY m.date_match DESC, m.id DESC
+                LIMIT %s
+            ) derniers ON TRUE
+            WHERE t.id = %s
+            ORDER BY derniers.date_match DESC, derniers.id DESC
+        """, (tournoi_id, tournoi_id, nb_derniers, tournoi_id))
+        lignes = cursor.fetchall()
+        conn.close()
+        if not lignes:
+            return None
+        premiere = lignes[0]
+        return {
+            'nom': premiere[0],
+            'nb_equipes': premiere[1],
+            'nb_groupes': premiere[2],
+            'nb_matchs': premiere[3],
+            'nb_droits': premiere[4],
+            'nb_payes': int(premiere[5]),
+            'montant_total': premiere[6],
+            'montant_percu': premiere[7],
+            'derniers_matchs': [tuple(l[8:]) for l in reversed(lignes) if l[8] is not None],
+        }
+    return None
+
 # ----------------- CRUD Équipes -----------------
+@lecture_en_cache
 def get_equipes(tournoi_id):
     conn = create_connection()
     if conn:
@@ -232,6 +1258,7 @@ def get_equipes(tournoi_id):
         return res
     return []
 
+@lecture_en_cache
 def count_equipes(tournoi_id):
     conn = create_connection()
     if conn:
@@ -246,10 +1273,12 @@ def ajouter_equipes(tournoi_id, eq_list):
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
-        for nom in eq_list:
-            cursor.execute("INSERT INTO equipes (nom, tournoi_id) VALUES (%s,%s)", (nom, tournoi_id))
+        cursor.executemany("INSERT INTO equipes (nom, tournoi_id) VALUES (%s,%s)",
+                           [(nom, tournoi_id) for nom in eq_list])
         conn.commit()
         conn.close()
+        invalider_tournoi(tournoi_id)
+        maj_index_recherche(tournoi_id=tournoi_id)
         return True
     return False
 
@@ -259,7 +1288,10 @@ def modifier_equipe(equipe_id, nouveau_nom):
         cursor = conn.cursor()
         cursor.execute("UPDATE equipes SET nom=%s WHERE id=%s", (nouveau_nom, equipe_id))
         conn.commit()
+        tournoi_id = _tournoi_de(cursor, 'equipes', equipe_id)
         conn.close()
+        invalider_tournoi(tournoi_id)
+        maj_index_recherche(equipe_id=equipe_id)
         return True
     return False
 
@@ -267,13 +1299,57 @@ def supprimer_equipe(equipe_id):
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
+        tournoi_id = _tournoi_de(cursor, 'equipes', equipe_id)
         cursor.execute("DELETE FROM equipes WHERE id=%s", (equipe_id,))
         conn.commit()
         conn.close()
+        invalider_tournoi(tournoi_id)
+        get_index_recherche().retirer_equipe(equipe_id)
         return True
     return False
 
+@lecture_en_cache
+def get_equipes_avec_nb_joueurs(tournoi_id):
+    """Équipes du tournoi avec leur nombre de joueurs : (id, nom, groupe, numero, nb_joueurs)."""
+    conn = create_connection()
+    if conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT e.id, e.nom, e.groupe, e.numero, COUNT(j.id)
+            FROM equipes e
+            LEFT JOIN joueurs j ON j.equipe_id = e.id
+            WHERE e.tournoi_id = %s
+            GROUP BY e.id, e.nom, e.groupe, e.numero
+        """, (tournoi_id,))
+        res = cursor.fetchall()
+        conn.close()
+        return res
+    return []
+
+@lecture_en_cache
+def get_equipes_par_groupe(tournoi_id):
+    """Groupes du tournoi avec leurs équipes : liste de (groupe_id, nom_groupe, [(id, nom, numero), ...])."""
+    conn = create_connection()
+    if conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT g.id, g.nom, e.id, e.nom, e.numero
+            FROM groupes g
+            LEFT JOIN equipes e ON e.tournoi_id = g.tournoi_id AND e.groupe = g.nom
+            WHERE g.tournoi_id = %s
+            ORDER BY g.nom, e.numero, e.nom
+        """, (tournoi_id,))
+        groupes = OrderedDict()
+        for groupe_id, groupe_nom, equipe_id, equipe_nom, numero in cursor.fetchall():
+            equipes = groupes.setdefault(groupe_id, (groupe_id, groupe_nom, []))[2]
+            if equipe_id is not None:
+                equipes.append((equipe_id, equipe_nom, numero))
+        conn.close()
+        return list(groupes.values())
+    return []
+
 # ----------------- CRUD Droits de match -----------------
+@lecture_en_cache
 def get_droits_match(tournoi_id):
     conn = create_connection()
     if conn:
@@ -300,6 +1376,7 @@ def set_droit_match(tournoi_id, equipe_id, montant, date_limite):
         """, (tournoi_id, equipe_id, montant, date_limite, montant, date_limite))
         conn.commit()
         conn.close()
+        invalider_tournoi(tournoi_id)
         return True
     return False
 
@@ -313,7 +1390,9 @@ def payer_droit_match(droit_id):
             WHERE id=%s
         """, (droit_id,))
         conn.commit()
+        tournoi_id = _tournoi_de(cursor, 'droits_match', droit_id)
         conn.close()
+        invalider_tournoi(tournoi_id)
         return True
     return False
 
@@ -355,31 +1434,64 @@ def verifier_equipe_eligible(equipe_id):
             conn.close()
     return False
 
-def debug_droits_equipes(tournoi_id):
-    """Affiche le statut détaillé de toutes les équipes"""
+def get_eligibilite_equipes(tournoi_id):
+    """Statut d'éligibilité de toutes les équipes du tournoi en une seule requête.
+
+    Retourne une liste de dicts (id, nom, paye, date_limite, date_paiement,
+    eligible, raison), avec les mêmes règles que verifier_equipe_eligible().
+    Une équipe a au plus un droit par tournoi (index uq_droits_tournoi_equipe).
+    """
+    from datetime import date
+    aujourd_hui = date.today()
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT e.id, e.nom, 
-                   dm.paye, dm.date_limite, dm.date_paiement,
-                   dm.date_limite < NOW() as date_depassee,
-                   (dm.paye = TRUE AND dm.date_limite >= NOW()) as eligible
+            SELECT e.id, e.nom, dm.id, dm.paye, dm.date_limite, dm.date_paiement
             FROM equipes e
-            LEFT JOIN droits_match dm ON e.id = dm.equipe_id
+            LEFT JOIN droits_match dm ON dm.tournoi_id = e.tournoi_id AND dm.equipe_id = e.id
             WHERE e.tournoi_id = %s
+            ORDER BY e.nom
         """, (tournoi_id,))
-        
-        results = cursor.fetchall()
+        rows = cursor.fetchall()
         conn.close()
         
-        st.write("### Debug: Statut des droits")
-        for row in results:
-            st.write(f"**{row[1]}** (ID: {row[0]}): "
-                   f"Payé={row[2]}, Date limite={row[3]}, "
-                   f"Date dépassée={row[5]}, Eligible={row[6]}")
+        equipes = []
+        for equipe_id, nom, droit_id, paye, date_limite, date_paiement in rows:
+            if droit_id is None:
+                eligible, raison = False, "Aucun droit de match défini"
+            elif not paye:
+                eligible, raison = False, "Droit non payé"
+            elif date_limite is not None and date_limite < aujourd_hui:
+                eligible, raison = False, f"Date limite dépassée ({date_limite})"
+            else:
+                eligible, raison = True, "Droit payé"
+            equipes.append({
+                'id': equipe_id,
+                'nom': nom,
+                'paye': bool(paye),
+                'date_limite': date_limite,
+                'date_paiement': date_paiement,
+                'eligible': eligible,
+                'raison': raison
+            })
+        return equipes
+    return []
+
+def debug_droits_equipes(tournoi_id):
+    """Affiche le statut détaillé de toutes les équipes"""
+    equipes = get_eligibilite_equipes(tournoi_id)
+    
+    st.write("### Debug: Statut des droits")
+    for eq in equipes:
+        st.write(f"**{eq['nom']}** (ID: {eq['id']}): "
+               f"Payé={eq['paye']}, Date limite={eq['date_limite']}, "
+               f"Eligible={eq['eligible']} - {eq['raison']}")
 
 # ----------------- CRUD Joueurs -----------------
+POSTES = ["Gardien", "Défenseur", "Milieu", "Attaquant", "Entraîneur", "Remplaçant"]
+MAX_JOUEURS_EQUIPE = 30
+
 def get_joueurs(equipe_id):
     conn = create_connection()
     if conn:
@@ -407,7 +1519,7 @@ def ajouter_joueur(equipe_id, nom, numero, poste):
         
         # Vérifier la limite de 30 joueurs
         cursor.execute("SELECT COUNT(*) FROM joueurs WHERE equipe_id=%s", (equipe_id,))
-        if cursor.fetchone()[0] >= 30:
+        if cursor.fetchone()[0] >= MAX_JOUEURS_EQUIPE:
             conn.close()
             return False, "Limite de 30 joueurs atteinte"
         
@@ -416,7 +1528,11 @@ def ajouter_joueur(equipe_id, nom, numero, poste):
             VALUES (%s, %s, %s, %s)
         """, (equipe_id, nom, numero, poste))
         conn.commit()
+        joueur_id = cursor.lastrowid
+        tournoi_id = _tournoi_de(cursor, 'equipes', equipe_id)
         conn.close()
+        invalider_tournoi(tournoi_id)
+        maj_index_recherche(joueur_id=joueur_id)
         return True, "Joueur ajouté avec succès"
     return False, "Erreur de connexion"
 
@@ -430,7 +1546,14 @@ def modifier_joueur(joueur_id, nom, numero, poste):
             WHERE id=%s
         """, (nom, numero, poste, joueur_id))
         conn.commit()
+        cursor.execute("""
+            SELECT e.tournoi_id FROM joueurs j JOIN equipes e ON j.equipe_id = e.id WHERE j.id=%s
+        """, (joueur_id,))
+        result = cursor.fetchone()
         conn.close()
+        if result:
+            invalider_tournoi(result[0])
+        maj_index_recherche(joueur_id=joueur_id)
         return True
     return False
 
@@ -438,12 +1561,137 @@ def supprimer_joueur(joueur_id):
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
+        cursor.execute("""
+            SELECT e.tournoi_id FROM joueurs j JOIN equipes e ON j.equipe_id = e.id WHERE j.id=%s
+        """, (joueur_id,))
+        result = cursor.fetchone()
         cursor.execute("DELETE FROM joueurs WHERE id=%s", (joueur_id,))
+        cursor.execute("DELETE FROM stats_joueurs_tournoi WHERE joueur_id=%s", (joueur_id,))
         conn.commit()
         conn.close()
+        if result:
+            invalider_tournoi(result[0])
+        get_index_recherche().retirer('joueurs', joueur_id)
         return True
     return False
 
+# ----------------- Import en masse -----------------
+COLONNES_IMPORT = {
+    'equipe': ['equipe', 'équipe', 'team', 'nom_equipe'],
+    'joueur': ['joueur', 'nom', 'nom_joueur', 'player'],
+    'numero': ['numero', 'numéro', 'num', 'n°'],
+    'poste': ['poste', 'position'],
+}
+
+def lire_fichier_effectifs(fichier):
+    """Lit un fichier CSV ou Excel (colonnes equipe, joueur, numero, poste) dans un DataFrame."""
+    nom = getattr(fichier, 'name', str(fichier)).lower()
+    if nom.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(fichier, dtype=str)
+    else:
+        df = pd.read_csv(fichier, dtype=str, sep=None, engine='python')
+    
+    alias = {a: col for col, noms in COLONNES_IMPORT.items() for a in noms}
+    df.columns = [alias.get(str(c).strip().lower(), str(c).strip().lower()) for c in df.columns]
+    for col in COLONNES_IMPORT:
+        if col not in df.columns:
+            df[col] = None
+    df = df[list(COLONNES_IMPORT)].copy()
+    for col in COLONNES_IMPORT:
+        df[col] = df[col].astype('string').str.strip().replace('', pd.NA)
+    return df
+
+def valider_effectifs(df, existants):
+    """Valide les lignes d'import avec pandas.
+
+    `existants` associe le nom d'équipe (casefold) aux numéros déjà pris dans
+    la base. Retourne (équipes à créer, joueurs valides, erreurs) où les
+    erreurs sont des tuples (ligne du fichier, message).
+    """
+    df = df.copy()
+    df['ligne'] = df.index + 2  # ligne 1 = en-tête
+    df['cle'] = df['equipe'].str.casefold()
+    df['numero_int'] = pd.to_numeric(df['numero'], errors='coerce')
+    df['poste'] = df['poste'].fillna("Remplaçant")
+    
+    erreurs = {}
+    def signaler(masque, message):
+        for ligne in df.loc[masque & ~df['ligne'].isin(erreurs), 'ligne']:
+            erreurs[ligne] = message
+    
+    avec_joueur = df['joueur'].notna()
+    signaler(df['equipe'].isna(), "Nom d'équipe manquant")
+    signaler(avec_joueur & df['numero_int'].isna(), "Numéro manquant ou non numérique")
+    signaler(avec_joueur & ((df['numero_int'] < 1) | (df['numero_int'] > 99) | (df['numero_int'] % 1 != 0)),
+             "Numéro invalide (entier de 1 à 99 attendu)")
+    signaler(avec_joueur & ~df['poste'].isin(POSTES), f"Poste invalide (attendu: {', '.join(POSTES)})")
+    signaler(avec_joueur & df.duplicated(subset=['cle', 'numero_int'], keep='first'),
+             "Numéro en double dans le fichier pour cette équipe")
+    
+    numeros_pris = {(cle, int(n)) for cle, numeros in existants.items() for n in numeros if n is not None}
+    deja_pris = pd.Series([(c, n) in numeros_pris for c, n in zip(df['cle'], df['numero_int'])], index=df.index)
+    signaler(avec_joueur & deja_pris, "Numéro déjà utilisé dans cette équipe")
+    
+    # Limite de joueurs par équipe, joueurs existants compris
+    valides = avec_joueur & ~df['ligne'].isin(erreurs)
+    rang = df[valides].groupby('cle').cumcount() + 1
+    deja = df.loc[valides, 'cle'].map(lambda c: len([n for n in existants.get(c, []) if n is not None]))
+    signaler(valides & (rang + deja > MAX_JOUEURS_EQUIPE).reindex(df.index, fill_value=False),
+             f"Limite de {MAX_JOUEURS_EQUIPE} joueurs atteinte")
+    
+    ok = ~df['ligne'].isin(erreurs)
+    equipes = df.loc[ok & ~df['cle'].isin(existants)].drop_duplicates('cle')['equipe'].tolist()
+    joueurs = df.loc[ok & avec_joueur, ['cle', 'joueur', 'numero_int', 'poste']]
+    return equipes, joueurs, sorted(erreurs.items())
+
+def importer_effectifs(tournoi_id, fichier):
+    """Importe équipes et joueurs d'un fichier CSV/XLSX en une seule transaction.
+
+    Les lignes invalides sont ignorées et renvoyées dans `erreurs`.
+    """
+    rapport = {'equipes_creees': 0, 'joueurs_ajoutes': 0, 'erreurs': []}
+    try:
+        df = lire_fichier_effectifs(fichier)
+    except Exception as e:
+        rapport['erreurs'].append((None, f"Fichier illisible: {e}"))
+        return False, rapport
+    
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT e.nom, j.numero
+                FROM equipes e
+                LEFT JOIN joueurs j ON j.equipe_id = e.id
+                WHERE e.tournoi_id = %s
+            """, (tournoi_id,))
+            existants = {}
+            for nom, numero in cursor.fetchall():
+                existants.setdefault(nom.casefold(), []).append(numero)
+            
+            equipes, joueurs, erreurs = valider_effectifs(df, existants)
+            rapport['erreurs'] = erreurs
+            
+            if equipes:
+                cursor.executemany("INSERT INTO equipes (nom, tournoi_id) VALUES (%s, %s)",
+                                   [(nom, tournoi_id) for nom in equipes])
+            if not joueurs.empty:
+                cursor.execute("SELECT id, nom FROM equipes WHERE tournoi_id = %s", (tournoi_id,))
+                ids = {nom.casefold(): equipe_id for equipe_id, nom in cursor.fetchall()}
+                cursor.executemany("""
+                    INSERT INTO joueurs (equipe_id, nom, numero, poste)
+                    VALUES (%s, %s, %s, %s)
+                """, [(ids[j.cle], j.joueur, int(j.numero_int), j.poste) for j in joueurs.itertuples()])
+            
+            rapport['equipes_creees'] = len(equipes)
+            rapport['joueurs_ajoutes'] = len(joueurs)
+    except Error as e:
+        rapport['erreurs'].append((None, f"Erreur base de données, import annulé: {e}"))
+        return False, rapport
+    invalider_tournoi(tournoi_id)
+    maj_index_recherche(tournoi_id=tournoi_id)
+    return True, rapport
+
 # ----------------- Statistiques Joueurs -----------------
 def get_stats_joueur(joueur_id):
     conn = create_connection()
@@ -451,8 +1699,8 @@ def get_stats_joueur(joueur_id):
         cursor = conn.cursor()
         cursor.execute("""
             SELECT SUM(buts), SUM(passes_decisives), SUM(cartons_jaunes), 
-                   SUM(cartons_rouges), COUNT(CASE WHEN homme_du_match THEN 1 END)
-            FROM stats_joueurs 
+                   SUM(cartons_rouges), SUM(hommes_du_match)
+            FROM stats_joueurs_tournoi 
             WHERE joueur_id=%s
         """, (joueur_id,))
         stats = cursor.fetchone()
@@ -466,40 +1714,98 @@ def get_stats_joueur(joueur_id):
         }
     return {}
 
+def _maj_stats_tournoi(cursor, match_id, joueur_id, matchs=0, buts=0, passes=0, jaunes=0, rouges=0, hommes_du_match=0):
+    """Ajoute un écart aux agrégats (tournoi, joueur) ; retourne le tournoi_id.
+
+    Retourne None sans rien écrire si le match ou le joueur n'existe plus
+    (formulaire périmé, suppression concurrente) : l'appelant annule alors
+    sa transaction.
+    """
+    cursor.execute("""
+        SELECT m.tournoi_id, j.equipe_id FROM matchs m, joueurs j WHERE m.id=%s AND j.id=%s
+    """, (match_id, joueur_id))
+    result = cursor.fetchone()
+    if result is None:
+        return None
+    tournoi_id, equipe_id = result
+    cursor.execute("""
+        INSERT INTO stats_joueurs_tournoi (tournoi_id, joueur_id, equipe_id, matchs, buts,
+                                           passes_decisives, cartons_jaunes, cartons_rouges, hommes_du_match)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+        equipe_id=VALUES(equipe_id),
+        matchs=matchs+VALUES(matchs),
+        buts=buts+VALUES(buts),
+        passes_decisives=passes_decisives+VALUES(passes_decisives),
+        cartons_jaunes=cartons_jaunes+VALUES(cartons_jaunes),
+        cartons_rouges=cartons_rouges+VALUES(cartons_rouges),
+        hommes_du_match=hommes_du_match+VALUES(hommes_du_match)
+    """, (tournoi_id, joueur_id, equipe_id, matchs, buts, passes, jaunes, rouges, hommes_du_match))
+    return tournoi_id
+
 def enregistrer_stats_joueur(match_id, joueur_id, buts=0, passes=0, jaunes=0, rouges=0, homme_du_match=False):
+    """Ajoute les stats d'un joueur pour un match et met à jour ses agrégats du tournoi."""
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            # Ancienne valeur d'homme du match (remplacée, pas additionnée)
+            cursor.execute("""
+                SELECT homme_du_match FROM stats_joueurs WHERE match_id=%s AND joueur_id=%s FOR UPDATE
+            """, (match_id, joueur_id))
+            ancien = cursor.fetchone()
+            cursor.execute("""
+                INSERT INTO stats_joueurs (match_id, joueur_id, buts, passes_decisives, 
+                                         cartons_jaunes, cartons_rouges, homme_du_match)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE 
+                buts=buts+VALUES(buts), 
+                passes_decisives=passes_decisives+VALUES(passes_decisives),
+                cartons_jaunes=cartons_jaunes+VALUES(cartons_jaunes),
+                cartons_rouges=cartons_rouges+VALUES(cartons_rouges),
+                homme_du_match=VALUES(homme_du_match)
+            """, (match_id, joueur_id, buts, passes, jaunes, rouges, homme_du_match))
+            tournoi_id = _maj_stats_tournoi(
+                cursor, match_id, joueur_id,
+                matchs=0 if ancien else 1, buts=buts, passes=passes, jaunes=jaunes, rouges=rouges,
+                hommes_du_match=int(bool(homme_du_match)) - (int(bool(ancien[0])) if ancien else 0),
+            )
+            if tournoi_id is None:
+                conn.rollback()
+                return False
+    except Error as e:
+        print(f"Erreur stats joueur: {e}")
+        return False
+    invalider_tournoi(tournoi_id)
+    return True
+
+def reconstruire_stats_joueurs(tournoi_id=None):
+    """Recalcule les agrégats des joueurs depuis stats_joueurs et cartons (réparation)."""
+    conn = create_connection()
+    if not conn:
+        return False, "Erreur de connexion"
+    try:
+        nb_lignes = schema.sql_reconstruire_stats_joueurs(conn, tournoi_id)
+    except Error as e:
+        return False, f"Erreur reconstruction des statistiques: {e}"
+    finally:
+        conn.close()
+    for tid in ([tournoi_id] if tournoi_id is not None else [t[0] for t in get_tournois()]):
+        invalider_tournoi(tid)
+    return True, f"Statistiques joueurs reconstruites ({nb_lignes} joueurs)"
+
+# ----------------- Trophées -----------------
+@lecture_en_cache
+def get_meilleurs_buteurs(tournoi_id, limit=5):
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO stats_joueurs (match_id, joueur_id, buts, passes_decisives, 
-                                     cartons_jaunes, cartons_rouges, homme_du_match)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE 
-            buts=buts+VALUES(buts), 
-            passes_decisives=passes_decisives+VALUES(passes_decisives),
-            cartons_jaunes=cartons_jaunes+VALUES(cartons_jaunes),
-            cartons_rouges=cartons_rouges+VALUES(cartons_rouges),
-            homme_du_match=VALUES(homme_du_match)
-        """, (match_id, joueur_id, buts, passes, jaunes, rouges, homme_du_match))
-        conn.commit()
-        conn.close()
-        return True
-    return False
-
-# ----------------- Trophées -----------------
-def get_meilleurs_buteurs(tournoi_id, limit=5):
-    conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT j.nom, e.nom as equipe, SUM(sj.buts) as buts
-            FROM stats_joueurs sj
-            JOIN joueurs j ON sj.joueur_id = j.id
-            JOIN equipes e ON j.equipe_id = e.id
-            JOIN matchs m ON sj.match_id = m.id
-            WHERE m.tournoi_id = %s
-            GROUP BY j.id
-            ORDER BY buts DESC
+            SELECT j.nom, e.nom as equipe, s.buts
+            FROM stats_joueurs_tournoi s
+            JOIN joueurs j ON s.joueur_id = j.id
+            JOIN equipes e ON s.equipe_id = e.id
+            WHERE s.tournoi_id = %s
+            ORDER BY s.buts DESC
             LIMIT %s
         """, (tournoi_id, limit))
         result = cursor.fetchall()
@@ -507,21 +1813,18 @@ def get_meilleurs_buteurs(tournoi_id, limit=5):
         return result
     return []
 
+@lecture_en_cache
 def get_meilleurs_joueurs(tournoi_id, limit=5):
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT j.nom, e.nom as equipe, 
-                   COUNT(CASE WHEN sj.homme_du_match THEN 1 END) as hdm_count,
-                   SUM(sj.buts) + SUM(sj.passes_decisives) as points
-            FROM stats_joueurs sj
-            JOIN joueurs j ON sj.joueur_id = j.id
-            JOIN equipes e ON j.equipe_id = e.id
-            JOIN matchs m ON sj.match_id = m.id
-            WHERE m.tournoi_id = %s
-            GROUP BY j.id
-                        ORDER BY hdm_count DESC, points DESC
+            SELECT j.nom, e.nom as equipe, s.hommes_du_match, s.points
+            FROM stats_joueurs_tournoi s
+            JOIN joueurs j ON s.joueur_id = j.id
+            JOIN equipes e ON s.equipe_id = e.id
+            WHERE s.tournoi_id = %s
+            ORDER BY s.hommes_du_match DESC, s.points DESC
             LIMIT %s
         """, (tournoi_id, limit))
         result = cursor.fetchall()
@@ -534,13 +1837,15 @@ def creer_groupes(tournoi_id, noms_groupes):
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
-        for nom in noms_groupes:
-            cursor.execute("INSERT INTO groupes (nom, tournoi_id) VALUES (%s, %s)", (nom, tournoi_id))
+        cursor.executemany("INSERT INTO groupes (nom, tournoi_id) VALUES (%s, %s)",
+                           [(nom, tournoi_id) for nom in noms_groupes])
         conn.commit()
         conn.close()
+        invalider_tournoi(tournoi_id)
         return True
     return False
 
+@lecture_en_cache
 def get_groupes(tournoi_id):
     conn = create_connection()
     if conn:
@@ -552,6 +1857,7 @@ def get_groupes(tournoi_id):
     return []
 
 # ----------------- Matchs et Scores -----------------
+@lecture_en_cache
 def get_matchs(tournoi_id):
     conn = create_connection()
     if conn:
@@ -570,6 +1876,7 @@ def get_matchs(tournoi_id):
         return res
     return []
 
+@lecture_en_cache
 def get_matchs_by_groupe(tournoi_id, groupe_id):
     conn = create_connection()
     if conn:
@@ -587,96 +1894,238 @@ def get_matchs_by_groupe(tournoi_id, groupe_id):
         return res
     return []
 
-def creer_match(tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, phase="Phase de groupes"):
+@lecture_en_cache
+def count_matchs(tournoi_id):
+    """(nombre de matchs, nombre de matchs joués) du tournoi."""
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO matchs (tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, phase)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, phase))
-        conn.commit()
+            SELECT COUNT(*), COALESCE(SUM(score1 IS NOT NULL), 0)
+            FROM matchs
+            WHERE tournoi_id = %s
+        """, (tournoi_id,))
+        total, joues = cursor.fetchone()
         conn.close()
-        return True
-    return False
+        return int(total), int(joues)
+    return 0, 0
 
-def enregistrer_score(match_id, score1, score2):
+@lecture_en_cache
+def get_matchs_page(tournoi_id, joues, apres=None, limite=20):
+    """Page de matchs joués ou non joués, paginée par clé (date_match, id).
+
+    `apres` est le curseur renvoyé par la page précédente (None pour la
+    première page). Retourne (matchs, curseur_suivant) avec les mêmes
+    colonnes que get_matchs() ; curseur_suivant vaut None sur la dernière page.
+    """
+    conn = create_connection()
+    if conn:
+        cursor = conn.cursor()
+        filtre = "m.score1 IS NOT NULL" if joues else "m.score1 IS NULL"
+        params = [tournoi_id]
+        if apres is not None:
+            date_apres, id_apres = apres
+            if date_apres is None:
+                # Les dates NULL sont triées en premier
+                filtre += " AND ((m.date_match IS NULL AND m.id > %s) OR m.date_match IS NOT NULL)"
+                params.append(id_apres)
+            else:
+                filtre += " AND (m.date_match > %s OR (m.date_match = %s AND m.id > %s))"
+                params.extend([date_apres, date_apres, id_apres])
+        params.append(limite + 1)
+        cursor.execute(f"""
+            SELECT m.id, e1.nom, e2.nom, g.nom, m.date_match, m.score1, m.score2, m.phase
+            FROM matchs m
+            JOIN equipes e1 ON m.equipe1_id=e1.id
+            JOIN equipes e2 ON m.equipe2_id=e2.id
+            LEFT JOIN groupes g ON m.groupe_id=g.id
+            WHERE m.tournoi_id=%s AND {filtre}
+            ORDER BY m.date_match, m.id
+            LIMIT %s
+        """, tuple(params))
+        res = cursor.fetchall()
+        conn.close()
+        suivant = None
+        if len(res) > limite:
+            res = res[:limite]
+            suivant = (res[-1][4], res[-1][0])
+        return res, suivant
+    return [], None
+
+def creer_match(tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, phase="Phase de groupes"):
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
         cursor.execute("""
-            UPDATE matchs
-            SET score1=%s, score2=%s, statut='terminé'
-            WHERE id=%s
-        """, (score1, score2, match_id))
+            INSERT INTO matchs (tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, phase)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, phase))
         conn.commit()
+        match_id = cursor.lastrowid
         conn.close()
+        invalider_tournoi(tournoi_id)
+        maj_index_recherche(match_id=match_id)
         return True
     return False
 
-# ----------------- Classement -----------------
-def get_classement(tournoi_id, groupe_id=None):
-    conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        if groupe_id:
+def enregistrer_score(match_id, score1, score2):
+    """Enregistre (ou corrige) le score d'un match ; le classement est recalculé à la lecture."""
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
             cursor.execute("""
-                SELECT e.nom, c.matches_joues, c.victories, c.draws, c.losses,
-                c.goals_for, c.goals_against, c.points
-                FROM classement c
-                JOIN equipes e ON c.equipe_id = e.id
-                WHERE c.tournoi_id = %s AND c.groupe_id = %s
-                ORDER BY c.points DESC, (c.goals_for - c.goals_against) DESC
-            """, (tournoi_id, groupe_id))
-        else:
+                SELECT tournoi_id
+                FROM matchs
+                WHERE id=%s
+                FOR UPDATE
+            """, (match_id,))
+            match = cursor.fetchone()
+            if not match:
+                return False
+            tournoi_id = match[0]
+            
             cursor.execute("""
-                SELECT e.nom, g.nom, c.matches_joues, c.victories, c.draws, c.losses,
-                c.goals_for, c.goals_against, c.points
-                FROM classement c
-                JOIN equipes e ON c.equipe_id = e.id
-                JOIN groupes g ON c.groupe_id = g.id
-                WHERE c.tournoi_id = %s
-                ORDER BY g.nom, c.points DESC, (c.goals_for - c.goals_against) DESC
-            """, (tournoi_id,))
-        classement = cursor.fetchall()
-        conn.close()
-        return classement
-    return []
+                UPDATE matchs
+                SET score1=%s, score2=%s, statut='terminé'
+                WHERE id=%s
+            """, (score1, score2, match_id))
+        invalider_tournoi(tournoi_id)
+        return True
+    except Error as e:
+        print(f"Erreur enregistrement score: {e}")
+        return False
+
+# ----------------- Classement -----------------
+# Critères de départage dans l'ordre d'application (TOURNOI_DEPARTAGE, séparés par des virgules)
+CRITERES_DEPARTAGE = tuple(
+    c.strip() for c in os.environ.get(
+        'TOURNOI_DEPARTAGE', 'points,diff,buts_pour,confrontations,fair_play'
+    ).split(',') if c.strip()
+)
 
-def mettre_a_jour_classement(tournoi_id, equipe_id, groupe_id, victoire, nul, defaite, buts_pour, buts_contre):
+# Critère -> [(colonne, ordre croissant)] ; « confrontations » est le mini-classement entre équipes à égalité
+COLONNES_CRITERES = {
+    'points': [('Pts', False)],
+    'diff': [('Diff', False)],
+    'buts_pour': [('BP', False)],
+    'victoires': [('V', False)],
+    'confrontations': [('CD_Pts', False), ('CD_Diff', False), ('CD_BP', False)],
+    'fair_play': [('FP', True)],
+}
+
+# Points de pénalité fair-play par carton
+PENALITES_CARTONS = {'jaune': 1, 'rouge': 3}
+
+COLONNES_CLASSEMENT = ['groupe_id', 'groupe', 'equipe_id', 'nom', 'MJ', 'V', 'N', 'D',
+                       'BP', 'BC', 'Pts', 'Diff', 'FP', 'rang']
+
+def calculer_classement(equipes, matchs, penalites=None, criteres=CRITERES_DEPARTAGE):
+    """Classement de chaque groupe, calculé sur tous les matchs à la fois.
+
+    `equipes` : DataFrame (equipe_id, nom, groupe_id, groupe) ; `matchs` :
+    DataFrame (equipe1_id, equipe2_id, score1, score2) des matchs de groupe
+    joués ; `penalites` : Series equipe_id -> points fair-play. Les
+    confrontations directes sont calculées une fois, entre les équipes à
+    égalité sur tous les critères qui les précèdent.
+    Retourne un DataFrame trié (colonnes COLONNES_CLASSEMENT).
+    """
+    inconnus = [c for c in criteres if c not in COLONNES_CRITERES]
+    if inconnus:
+        raise ValueError(f"Critères de départage inconnus: {', '.join(inconnus)}")
+    
+    # Une ligne par équipe et par match
+    s1 = matchs['score1'].to_numpy(dtype=np.int64)
+    s2 = matchs['score2'].to_numpy(dtype=np.int64)
+    bp = np.concatenate([s1, s2])
+    bc = np.concatenate([s2, s1])
+    lignes = pd.DataFrame({
+        'equipe_id': np.concatenate([matchs['equipe1_id'].to_numpy(), matchs['equipe2_id'].to_numpy()]),
+        'adversaire': np.concatenate([matchs['equipe2_id'].to_numpy(), matchs['equipe1_id'].to_numpy()]),
+        'bp': bp,
+        'bc': bc,
+        'diff': bp - bc,
+        'V': bp > bc,
+        'N': bp == bc,
+        'D': bp < bc,
+        'pts': np.select([bp > bc, bp == bc], [3, 1], 0),
+    })
+    totaux = lignes.groupby('equipe_id').agg(
+        MJ=('bp', 'size'), V=('V', 'sum'), N=('N', 'sum'), D=('D', 'sum'),
+        BP=('bp', 'sum'), BC=('bc', 'sum'), Pts=('pts', 'sum'),
+    )
+    table = equipes.join(totaux, on='equipe_id')
+    table[list(totaux.columns)] = table[list(totaux.columns)].fillna(0).astype(np.int64)
+    table['Diff'] = table['BP'] - table['BC']
+    table['FP'] = table['equipe_id'].map(penalites).fillna(0).astype(np.int64) if penalites is not None else 0
+    
+    colonnes, ordre = [], []
+    for critere in criteres:
+        if critere == 'confrontations':
+            # Bloc = équipes du même groupe à égalité sur les critères précédents
+            bloc = table.groupby(['groupe_id'] + colonnes).ngroup()
+            bloc_equipe = pd.Series(bloc.to_numpy(), index=table['equipe_id'].to_numpy())
+            entre_egaux = lignes['equipe_id'].map(bloc_equipe).to_numpy() == lignes['adversaire'].map(bloc_equipe).to_numpy()
+            directes = lignes[entre_egaux].groupby('equipe_id').agg(
+                CD_Pts=('pts', 'sum'), CD_Diff=('diff', 'sum'), CD_BP=('bp', 'sum'),
+            )
+            table = table.join(directes, on='equipe_id')
+            table[list(directes.columns)] = table[list(directes.columns)].fillna(0).astype(np.int64)
+        for colonne, croissant in COLONNES_CRITERES[critere]:
+            colonnes.append(colonne)
+            ordre.append(croissant)
+    
+    table = table.sort_values(['groupe'] + colonnes + ['nom'], ascending=[True] + ordre + [True], kind='stable')
+    table['rang'] = table.groupby('groupe_id').cumcount() + 1
+    return table[COLONNES_CLASSEMENT].reset_index(drop=True)
+
+@lecture_en_cache
+def get_classement_tournoi(tournoi_id):
+    """Classement calculé de tous les groupes : liste de tuples (colonnes COLONNES_CLASSEMENT).
+
+    Source commune des vues de classement et du placement des phases finales.
+    """
     conn = create_connection()
-    if conn:
+    if not conn:
+        return []
+    try:
         cursor = conn.cursor()
-        # Vérifier si l'équipe existe déjà dans le classement
         cursor.execute("""
-            SELECT id FROM classement
-            WHERE tournoi_id=%s AND equipe_id=%s AND groupe_id=%s
-        """, (tournoi_id, equipe_id, groupe_id))
-        existing = cursor.fetchone()
-        if existing:
-            # Mettre à jour les statistiques existantes
-            cursor.execute("""
-                UPDATE classement
-                SET matches_joues=matches_joues+1,
-                victories=victories+%s,
-                draws=draws+%s,
-                losses=losses+%s,
-                goals_for=goals_for+%s,
-                goals_against=goals_against+%s,
-                points=points+%s
-                WHERE id=%s
-            """, (victoire, nul, defaite, buts_pour, buts_contre, victoire*3 + nul, existing[0]))
-        else:
-            # Créer une nouvelle entrée
-            cursor.execute("""
-                INSERT INTO classement (tournoi_id, equipe_id, groupe_id, matches_joues,
-                victories, draws, losses, goals_for, goals_against, points)
-                VALUES (%s, %s, %s, 1, %s, %s, %s, %s, %s, %s)
-            """, (tournoi_id, equipe_id, groupe_id, victoire, nul, defaite, buts_pour, buts_contre, victoire*3 + nul))
-        conn.commit()
+            SELECT e.id, e.nom, g.id, g.nom
+            FROM equipes e
+            JOIN groupes g ON g.tournoi_id = e.tournoi_id AND g.nom = e.groupe
+            WHERE e.tournoi_id = %s
+        """, (tournoi_id,))
+        equipes = pd.DataFrame(cursor.fetchall(), columns=['equipe_id', 'nom', 'groupe_id', 'groupe'])
+        cursor.execute("""
+            SELECT equipe1_id, equipe2_id, score1, score2
+            FROM matchs
+            WHERE tournoi_id = %s AND groupe_id IS NOT NULL AND score1 IS NOT NULL AND score2 IS NOT NULL
+        """, (tournoi_id,))
+        matchs = pd.DataFrame(cursor.fetchall(), columns=['equipe1_id', 'equipe2_id', 'score1', 'score2'])
+        cursor.execute("""
+            SELECT j.equipe_id, SUM(CASE c.type WHEN 'rouge' THEN %s ELSE %s END)
+            FROM cartons c
+            JOIN joueurs j ON c.joueur_id = j.id
+            JOIN matchs m ON c.match_id = m.id
+            WHERE m.tournoi_id = %s
+            GROUP BY j.equipe_id
+        """, (PENALITES_CARTONS['rouge'], PENALITES_CARTONS['jaune'], tournoi_id))
+        penalites = pd.Series(dict(cursor.fetchall()), dtype=np.int64)
+    finally:
         conn.close()
-        return True
-    return False
+    if equipes.empty:
+        return []
+    table = calculer_classement(equipes, matchs, penalites)
+    return list(table.astype(object).itertuples(index=False, name=None))
+
+def get_classement(tournoi_id, groupe_id=None):
+    """Classement d'un groupe (équipe, MJ, V, N, D, BP, BC, Pts) ou de tout le tournoi (avec le groupe)."""
+    classement = get_classement_tournoi(tournoi_id)
+    if groupe_id:
+        return [(nom, mj, v, n, d, bp, bc, pts)
+                for gid, _, _, nom, mj, v, n, d, bp, bc, pts, *_ in classement if gid == groupe_id]
+    return [(nom, groupe, mj, v, n, d, bp, bc, pts)
+            for _, groupe, _, nom, mj, v, n, d, bp, bc, pts, *_ in classement]
 
 # ----------------- Gestion des suspensions -----------------
 def get_suspensions_joueur(joueur_id):
@@ -725,274 +2174,847 @@ def get_cartons_joueur(joueur_id):
     return []
 
 def ajouter_carton(joueur_id, match_id, type_carton, minute, raison):
-    conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO cartons (joueur_id, match_id, type, minute, raison)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (joueur_id, match_id, type_carton, minute, raison))
-        conn.commit()
-        conn.close()
-        return True
-    return False
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO cartons (joueur_id, match_id, type, minute, raison)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (joueur_id, match_id, type_carton, minute, raison))
+            tournoi_id = _maj_stats_tournoi(
+                cursor, match_id, joueur_id,
+                jaunes=int(type_carton == 'jaune'), rouges=int(type_carton == 'rouge'),
+            )
+            if tournoi_id is None:
+                conn.rollback()
+                return False
+    except Error as e:
+        print(f"Erreur ajout carton: {e}")
+        return False
+    invalider_tournoi(tournoi_id)
+    return True
 
 # ----------------- Phases finales -----------------
+FORMATS_FINALES = ["Élimination directe", "Double élimination", "Round-robin"]
+
+NIVEAUX_ELIMINATION = {2: 'Finale', 4: 'Demi', 8: 'Quart', 16: 'Huitième', 32: 'Seizième'}
+
+# Ordre d'affichage des tableaux
+ORDRE_TABLEAUX = ('principal', 'repechage', 'grande_finale', 'poule')
+
+VIDE = ('vide',)
+
+def niveau_elimination(nb_equipes):
+    """Nom du tour selon le nombre d'équipes qui y participent (2 : Finale, 4 : Demi...)."""
+    return NIVEAUX_ELIMINATION.get(nb_equipes, f"1/{nb_equipes // 2} de finale")
+
+def ordre_tetes_de_serie(taille):
+    """Têtes de série dans l'ordre du tableau : 1 contre taille, et les meilleures ne se croisent qu'à la fin."""
+    ordre = [1]
+    while len(ordre) < taille:
+        n = len(ordre) * 2
+        ordre = [t for s in ordre for t in (s, n + 1 - s)]
+    return ordre
+
+def tetes_de_serie(classement_groupes, nb_qualifies):
+    """Qualifiés classés par rang de groupe : 1A, 1B, ..., 2A, 2B, ...
+
+    `classement_groupes` associe le nom du groupe à ses équipes dans l'ordre
+    du classement. Retourne une liste de (equipe_id, code, groupe).
+    """
+    tetes = []
+    for rang in range(nb_qualifies):
+        for groupe in sorted(classement_groupes):
+            equipes = classement_groupes[groupe]
+            if rang < len(equipes):
+                tetes.append((equipes[rang], f"{rang + 1}{groupe}", groupe))
+    return tetes
+
+def _eviter_meme_groupe(ordre, tetes):
+    # Au premier tour, échanger les adversaires de deux matchs pour éviter deux équipes du même groupe
+    def groupe(seed):
+        return tetes[seed - 1][2] if seed <= len(tetes) else None
+    
+    for p in range(0, len(ordre), 2):
+        if groupe(ordre[p]) is None or groupe(ordre[p]) != groupe(ordre[p + 1]):
+            continue
+        for q in range(0, len(ordre), 2):
+            if (q != p and groupe(ordre[q + 1]) is not None
+                    and groupe(ordre[q + 1]) != groupe(ordre[p])
+                    and groupe(ordre[q]) != groupe(ordre[p + 1])):
+                ordre[p + 1], ordre[q + 1] = ordre[q + 1], ordre[p + 1]
+                break
+    return ordre
+
+def _structure_elimination(nb_tetes, double):
+    """Matchs du tableau avant résolution : {(tableau, tour, position): (niveau, [source1, source2])}.
+
+    Une source est ('tete', numéro), VIDE (exempt), ou ('gagnant' | 'perdant', clé du match).
+    """
+    taille = 1
+    while taille < nb_tetes:
+        taille *= 2
+    nb_tours = taille.bit_length() - 1
+    matchs = OrderedDict()
+    
+    ordre = ordre_tetes_de_serie(taille)
+    for tour in range(1, nb_tours + 1):
+        niveau = niveau_elimination(taille >> (tour - 1))
+        if double and tour == nb_tours:
+            niveau = "Finale du tableau principal"
+        for p in range(taille >> tour):
+            if tour == 1:
+                sources = [('tete', s) if s <= nb_tetes else VIDE for s in ordre[2 * p:2 * p + 2]]
+            else:
+                sources = [('gagnant', ('principal', tour - 1, 2 * p)), ('gagnant', ('principal', tour - 1, 2 * p + 1))]
+            matchs[('principal', tour, p)] = (niveau, sources)
+    
+    if not double:
+        if nb_tours >= 2:
+            matchs[('principal', nb_tours, 1)] = ("Petite finale", [
+                ('perdant', ('principal', nb_tours - 1, 0)), ('perdant', ('principal', nb_tours - 1, 1))
+            ])
+        return matchs
+    
+    # Tableau de repêchage : les tours impairs opposent les survivants entre eux,
+    # les tours pairs les confrontent aux perdants du tour suivant du tableau principal
+    for j in range(1, 2 * (nb_tours - 1) + 1):
+        i = j // 2
+        nb = taille >> (i + 1) if j % 2 == 0 else taille >> (i + 2)
+        for p in range(nb):
+            if j == 1:
+                sources = [('perdant', ('principal', 1, 2 * p)), ('perdant', ('principal', 1, 2 * p + 1))]
+            elif j % 2 == 0:
+                # Ordre inversé pour retarder les revanches
+                sources = [('gagnant', ('repechage', j - 1, p)), ('perdant', ('principal', i + 1, nb - 1 - p))]
+            else:
+                sources = [('gagnant', ('repechage', j - 1, 2 * p)), ('gagnant', ('repechage', j - 1, 2 * p + 1))]
+            matchs[('repechage', j, p)] = (f"Repêchage {j}", sources)
+    matchs[('grande_finale', 1, 0)] = ("Grande finale", [
+        ('gagnant', ('principal', nb_tours, 0)), ('gagnant', ('repechage', 2 * (nb_tours - 1), 0))
+    ])
+    return matchs
+
+def construire_tableau(tetes, format_finales):
+    """Calcule tous les matchs de la phase finale, sans accès à la base.
+
+    `tetes` vient de tetes_de_serie(). Les exemptions du premier tour sont
+    résolues immédiatement (statut 'exempt', vainqueur déjà placé au tour
+    suivant) ; les matchs qui n'auraient qu'un seul participant possible
+    sont supprimés et leur entrant est dirigé vers le match suivant.
+    Retourne une liste de dicts (tableau, tour, position, niveau, equipe1_id,
+    equipe2_id, gagnant_id, statut, equipes_attendues, suite_gagnant,
+    suite_perdant, etape), où etape est le créneau relatif du match.
+    """
+    if format_finales == "Round-robin":
+        codes = {equipe_id: code for equipe_id, code, _ in tetes}
+        return [
+            {'tableau': 'poule', 'tour': journee, 'position': p, 'niveau': "Poule finale",
+             'equipe1_id': e1, 'equipe2_id': e2, 'gagnant_id': None, 'statut': 'planifié',
+             'equipes_attendues': f"{codes[e1]} - {codes[e2]}",
+             'suite_gagnant': None, 'suite_perdant': None, 'etape': journee}
+            for journee, paires in enumerate(calendrier_round_robin(list(codes)), 1)
+            for p, (e1, e2) in enumerate(paires)
+        ]
+    if len(tetes) < 2:
+        return []
+    
+    double = format_finales == "Double élimination" and len(tetes) > 2
+    structure = _structure_elimination(len(tetes), double)
+    premier_tour = [s for (tableau, tour, _), (_, sources) in structure.items()
+                    if tableau == 'principal' and tour == 1 for s in sources]
+    ordre = _eviter_meme_groupe([s[1] if s != VIDE else len(tetes) + 1 + i for i, s in enumerate(premier_tour)], tetes)
+    for (tableau, tour, p), (niveau, sources) in structure.items():
+        if tableau == 'principal' and tour == 1:
+            sources[:] = [('tete', s) if s <= len(tetes) else VIDE for s in ordre[2 * p:2 * p + 2]]
+    
+    # Résolution dans l'ordre de création (les sources précèdent toujours le match)
+    sorties = {}
+    matchs = OrderedDict()
+    nb_par_niveau = {}
+    for niveau, _ in structure.values():
+        nb_par_niveau[niveau] = nb_par_niveau.get(niveau, 0) + 1
+    
+    def resoudre(source):
+        if source[0] in ('gagnant', 'perdant'):
+            return sorties[source[1]][0 if source[0] == 'gagnant' else 1]
+        return source
+    
+    def decrire(source):
+        if source[0] == 'tete':
+            return tetes[source[1] - 1][1]
+        match = matchs[source[1]]
+        prefixe = "Vainqueur" if source[0] == 'gagnant' else "Perdant"
+        if nb_par_niveau[match['niveau']] == 1:
+            return f"{prefixe} {match['niveau']}"
+        return f"{prefixe} {match['niveau']} {match['position'] + 1}"
+    
+    def etape(source):
+        return matchs[source[1]]['etape'] if source[0] in ('gagnant', 'perdant') else 0
+    
+    for cle, (niveau, sources) in structure.items():
+        s1, s2 = (resoudre(s) for s in sources)
+        if s1 == VIDE or s2 == VIDE:
+            entrant = s2 if s1 == VIDE else s1
+            sorties[cle] = (entrant, VIDE)
+            if entrant[0] == 'tete':
+                # Exemption : le match est conservé pour l'affichage, déjà gagné
+                equipe_id = tetes[entrant[1] - 1][0]
+                matchs[cle] = {
+                    'tableau': cle[0], 'tour': cle[1], 'position': cle[2], 'niveau': niveau,
+                    'equipe1_id': equipe_id, 'equipe2_id': None, 'gagnant_id': equipe_id,
+                    'statut': 'exempt', 'equipes_attendues': f"{decrire(entrant)} - exempt",
+                    'suite_gagnant': None, 'suite_perdant': None, 'etape': 0,
+                }
+            continue
+        sorties[cle] = (('gagnant', cle), ('perdant', cle))
+        matchs[cle] = {
+            'tableau': cle[0], 'tour': cle[1], 'position': cle[2], 'niveau': niveau,
+            'equipe1_id': tetes[s1[1] - 1][0] if s1[0] == 'tete' else None,
+            'equipe2_id': tetes[s2[1] - 1][0] if s2[0] == 'tete' else None,
+            'gagnant_id': None, 'statut': 'planifié',
+            'equipes_attendues': f"{decrire(s1)} - {decrire(s2)}",
+            'suite_gagnant': None, 'suite_perdant': None,
+            'etape': max(etape(s1), etape(s2)) + 1,
+        }
+        for place, source in enumerate((s1, s2), 1):
+            if source[0] in ('gagnant', 'perdant'):
+                suite = f"{cle[0]}:{cle[1]}:{cle[2]}:{place}"
+                matchs[source[1]]['suite_' + source[0]] = suite
+    return list(matchs.values())
+
 def generer_phases_finales(tournoi_id):
+    """Crée le tableau final selon format_finales et equipes_qualifiees du tournoi.
+
+    Les qualifiés sont placés par rang dans leur groupe (1A contre 2B...).
+    Le tableau existant est remplacé tant qu'aucun de ses matchs n'a été
+    joué. Tous les matchs sont insérés en une seule requête. Retourne
+    (succès, message).
+    """
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT format_finales, equipes_qualifiees FROM tournois WHERE id=%s", (tournoi_id,))
+            tournoi = cursor.fetchone()
+            if not tournoi:
+                return False, "Tournoi introuvable"
+            format_finales, nb_qualifies = tournoi
+            
+            cursor.execute("""
+                SELECT COUNT(*) FROM phases_finales
+                WHERE tournoi_id=%s AND statut='terminé'
+            """, (tournoi_id,))
+            if cursor.fetchone()[0]:
+                return False, "Des matchs de phase finale ont déjà été joués"
+            
+            classement_groupes = {}
+            for ligne in get_classement_tournoi(tournoi_id):
+                if ligne[4]:  # au moins un match joué
+                    classement_groupes.setdefault(ligne[1], []).append(ligne[2])
+            
+            tetes = tetes_de_serie(classement_groupes, nb_qualifies or 2)
+            matchs = construire_tableau(tetes, format_finales)
+            if not matchs:
+                return False, "Pas assez d'équipes qualifiées"
+            
+            debut = (datetime.now() + timedelta(days=7)).replace(minute=0, second=0, microsecond=0)
+            creneaux = {}
+            lignes = []
+            for m in matchs:
+                rang = creneaux.get(m['etape'], 0)
+                creneaux[m['etape']] = rang + 1
+                date_match = debut + timedelta(days=max(m['etape'] - 1, 0), hours=2 * rang)
+                lignes.append((tournoi_id, m['niveau'], m['tableau'], m['tour'], m['position'],
+                               m['equipe1_id'], m['equipe2_id'], m['gagnant_id'], date_match, m['statut'],
+                               m['equipes_attendues'], m['suite_gagnant'], m['suite_perdant']))
+            
+            cursor.execute("DELETE FROM phases_finales WHERE tournoi_id=%s", (tournoi_id,))
+            cursor.executemany("""
+                INSERT INTO phases_finales
+                (tournoi_id, niveau, tableau, tour, position, equipe1_id, equipe2_id, gagnant_id,
+                 date_match, statut, equipes_attendues, suite_gagnant, suite_perdant)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, lignes)
+    except Error as e:
+        if e.errno == 1054:
+            return False, "Schéma à migrer (phases_finales) : appliquer les migrations"
+        return False, f"Erreur génération phases finales: {e}"
+    invalider_tournoi(tournoi_id)
+    return True, f"{format_finales} : {len(matchs)} matchs générés pour {len(tetes)} équipes"
+
+@lecture_en_cache
+def get_phases_finales(tournoi_id):
+    """Matchs de la phase finale dans l'ordre du tableau.
+
+    Colonnes : id, niveau, équipe 1, équipe 2, score1, score2, date, statut,
+    vainqueur, équipes attendues, tableau, tour, position, equipe1_id,
+    equipe2_id, suite_gagnant, suite_perdant. Les lignes suivent l'index
+    (tableau, tour, position) ; l'ordre d'affichage est celui d'ArbreTableau.
+    """
     conn = create_connection()
     if conn:
         cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT pf.id, pf.niveau, e1.nom, e2.nom, pf.score1, pf.score2, 
+                       pf.date_match, pf.statut, g.nom as gagnant, pf.equipes_attendues,
+                       pf.tableau, pf.tour, pf.position, pf.equipe1_id, pf.equipe2_id,
+                       pf.suite_gagnant, pf.suite_perdant
+                FROM phases_finales pf
+                LEFT JOIN equipes e1 ON pf.equipe1_id = e1.id
+                LEFT JOIN equipes e2 ON pf.equipe2_id = e2.id
+                LEFT JOIN equipes g ON pf.gagnant_id = g.id
+                WHERE pf.tournoi_id = %s
+                ORDER BY pf.tableau, pf.tour, pf.position
+            """, (tournoi_id,))
+            return cursor.fetchall()
+        except Error as e:
+            # Résultat vide non mis en cache, comme après une connexion échouée
+            _echec_connexion.set(e)
+            if e.errno == 1054:
+                message = "Schéma à migrer (phases_finales) : appliquer les migrations"
+            else:
+                message = f"Erreur lecture phases finales: {e}"
+            if _hors_streamlit.get():
+                print(message)
+            else:
+                st.error(message)
+            return []
+        finally:
+            conn.close()
+    return []
+
+class NoeudTableau:
+    """Match de phase finale relié au match suivant du vainqueur et du perdant."""
+
+    __slots__ = ('id', 'niveau', 'equipe1', 'equipe2', 'score1', 'score2', 'date_match', 'statut',
+                 'gagnant', 'equipes_attendues', 'tableau', 'tour', 'position', 'equipe1_id',
+                 'equipe2_id', 'suivant', 'suivant_perdant', 'precedents')
+
+    def __init__(self, ligne):
+        (self.id, self.niveau, self.equipe1, self.equipe2, self.score1, self.score2, self.date_match,
+         self.statut, self.gagnant, self.equipes_attendues, self.tableau, self.tour, self.position,
+         self.equipe1_id, self.equipe2_id) = ligne[:15]
+        self.suivant = None
+        self.suivant_perdant = None
+        self.precedents = []
+
+    @property
+    def a_jouer(self):
+        return self.statut not in ('terminé', 'exempt')
+
+    @property
+    def libelles(self):
+        """(équipe 1, équipe 2) : noms connus, sinon équipes attendues (« Vainqueur Demi 1 »)."""
+        attendues = (self.equipes_attendues or " - ").split(" - ", 1)
+        return self.equipe1 or attendues[0], self.equipe2 or attendues[-1]
+
+class ArbreTableau:
+    """Tableau final d'un tournoi construit une fois par version des données.
+
+    Les chemins vers la finale et les adversaires restants sont précalculés :
+    les recherches sont des accès directs. L'arbre est partagé entre les
+    sessions par le cache et ne doit pas être modifié.
+    """
+
+    def __init__(self, phases):
+        self.noeuds = {}
+        self.noms = {}
+        par_position = {}
+        suites = {}
+        for ligne in phases:
+            noeud = NoeudTableau(ligne)
+            self.noeuds[noeud.id] = noeud
+            self.noms.update({noeud.equipe1_id: noeud.equipe1, noeud.equipe2_id: noeud.equipe2})
+            par_position[f"{noeud.tableau}:{noeud.tour}:{noeud.position}"] = noeud
+            suites[noeud.id] = ligne[15:17]
+        for noeud in self.noeuds.values():
+            suite_gagnant, suite_perdant = suites[noeud.id]
+            if suite_gagnant:
+                noeud.suivant = par_position.get(suite_gagnant.rsplit(':', 1)[0])
+            if suite_perdant:
+                noeud.suivant_perdant = par_position.get(suite_perdant.rsplit(':', 1)[0])
+            for suivant in (noeud.suivant, noeud.suivant_perdant):
+                if suivant:
+                    suivant.precedents.append(noeud)
         
-        # Récupérer les équipes qualifiées (top 2 de chaque groupe)
-        cursor.execute("""
-            SELECT e.id, e.nom, g.nom as groupe_nom
-            FROM classement c
-            JOIN equipes e ON c.equipe_id = e.id
-            JOIN groupes g ON c.groupe_id = g.id
-            WHERE c.tournoi_id = %s
-            ORDER BY g.nom, c.points DESC, (c.goals_for - c.goals_against) DESC
-        """, (tournoi_id,))
-        
-        equipes_par_groupe = {}
-        for equipe in cursor.fetchall():
-            groupe_nom = equipe[2]
-            if groupe_nom not in equipes_par_groupe:
-                equipes_par_groupe[groupe_nom] = []
-            if len(equipes_par_groupe[groupe_nom]) < 2:  # Top 2 de chaque groupe
-                equipes_par_groupe[groupe_nom].append((equipe[0], equipe[1]))
-        
-        # Organiser les matchs des phases finales
-        equipes_qualifiees = []
-        for groupe, equipes in equipes_par_groupe.items():
-            equipes_qualifiees.extend(equipes)
+        # Ordre du tableau : un match vient toujours après ceux qui l'alimentent
+        ordre = sorted(self.noeuds.values(),
+                       key=lambda n: (ORDRE_TABLEAUX.index(n.tableau), n.tour or 0, n.position or 0, n.id))
+        self.niveaux = OrderedDict()
+        for noeud in ordre:
+            self.niveaux.setdefault(noeud.niveau, []).append(noeud)
         
-        # Mélanger les équipes pour le tirage
-        random.shuffle(equipes_qualifiees)
+        self._chemins = {}
+        for noeud in reversed(ordre):
+            suite = self._chemins[noeud.suivant.id] if noeud.suivant else ()
+            self._chemins[noeud.id] = (noeud,) + suite
         
-        # Créer les matchs des huitièmes de finale
-        date_match = datetime.now() + timedelta(days=7)
-        for i in range(0, len(equipes_qualifiees), 2):
-            if i + 1 < len(equipes_qualifiees):
-                equipe1_id, equipe1_nom = equipes_qualifiees[i]
-                equipe2_id, equipe2_nom = equipes_qualifiees[i + 1]
-                
-                cursor.execute("""
-                    INSERT INTO phases_finales 
-                    (tournoi_id, niveau, equipe1_id, equipe2_id, date_match, statut)
-                    VALUES (%s, 'Huitième', %s, %s, %s, 'planifié')
-                """, (tournoi_id, equipe1_id, equipe2_id, date_match))
-                
-                date_match += timedelta(hours=2)
+        # Équipes pouvant encore arriver dans chaque match
+        possibles = {}
+        for noeud in ordre:
+            equipes = {e for e in (noeud.equipe1_id, noeud.equipe2_id) if e}
+            for precedent in noeud.precedents:
+                if precedent.a_jouer:
+                    equipes |= possibles[precedent.id]
+            possibles[noeud.id] = frozenset(equipes)
         
-        conn.commit()
-        conn.close()
-        return True
-    return False
+        self._match_en_cours = {}
+        self._adversaires = {}
+        for noeud in ordre:
+            if not noeud.a_jouer:
+                continue
+            for equipe_id in (noeud.equipe1_id, noeud.equipe2_id):
+                if not equipe_id or equipe_id in self._match_en_cours:
+                    continue
+                self._match_en_cours[equipe_id] = noeud
+                adversaires = set()
+                venant_de = None
+                for etape in self._chemins[noeud.id]:
+                    adversaires.update(e for e in (etape.equipe1_id, etape.equipe2_id) if e)
+                    for precedent in etape.precedents:
+                        if precedent is not venant_de and precedent.a_jouer:
+                            adversaires |= possibles[precedent.id]
+                    venant_de = etape
+                adversaires.discard(equipe_id)
+                self._adversaires[equipe_id] = frozenset(adversaires)
 
-def get_phases_finales(tournoi_id):
-    conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT pf.id, pf.niveau, e1.nom, e2.nom, pf.score1, pf.score2, 
-                   pf.date_match, pf.statut, g.nom as gagnant
-            FROM phases_finales pf
-            LEFT JOIN equipes e1 ON pf.equipe1_id = e1.id
-            LEFT JOIN equipes e2 ON pf.equipe2_id = e2.id
-            LEFT JOIN equipes g ON pf.gagnant_id = g.id
-            WHERE pf.tournoi_id = %s
-            ORDER BY 
-                CASE pf.niveau
-                    WHEN 'Huitième' THEN 1
-                    WHEN 'Quart' THEN 2
-                    WHEN 'Demi' THEN 3
-                    WHEN 'Finale' THEN 4
-                    WHEN 'Petite finale' THEN 5
-                END,
-                pf.date_match
-        """, (tournoi_id,))
-        phases = cursor.fetchall()
-        conn.close()
-        return phases
-    return []
+    def __len__(self):
+        return len(self.noeuds)
 
-def enregistrer_score_phase_finale(match_id, score1, score2, gagnant_id):
-    conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE phases_finales
-            SET score1=%s, score2=%s, gagnant_id=%s, statut='terminé'
-            WHERE id=%s
-        """, (score1, score2, gagnant_id, match_id))
-        conn.commit()
-        conn.close()
-        return True
-    return False
+    def noeud(self, match_id):
+        return self.noeuds.get(match_id)
+
+    def match_suivant(self, match_id):
+        """Match où ira le vainqueur, ou None (finale, poule finale)."""
+        noeud = self.noeuds.get(match_id)
+        return noeud.suivant if noeud else None
+
+    def chemin_finale(self, match_id):
+        """Matchs du vainqueur de match_id jusqu'au dernier match de son tableau."""
+        return self._chemins.get(match_id, ())
+
+    def match_en_cours(self, equipe_id):
+        """Prochain match à jouer de l'équipe, ou None si elle n'en a plus."""
+        return self._match_en_cours.get(equipe_id)
+
+    def equipes_en_lice(self):
+        return list(self._match_en_cours)
+
+    def adversaires_restants(self, equipe_id):
+        """Équipes que l'équipe peut encore rencontrer en gagnant tous ses matchs."""
+        return self._adversaires.get(equipe_id, frozenset())
+
+@lecture_en_cache
+def get_arbre_tableau(tournoi_id):
+    return ArbreTableau(get_phases_finales(tournoi_id))
+
+def _placer_equipe(cursor, tournoi_id, suite, equipe_id):
+    # suite = « tableau:tour:position:place » ; un match déjà joué n'est pas modifié
+    tableau, tour, position, place = suite.split(':')
+    colonne = 'equipe1_id' if place == '1' else 'equipe2_id'
+    cursor.execute(f"""
+        UPDATE phases_finales SET {colonne}=%s
+        WHERE tournoi_id=%s AND tableau=%s AND tour=%s AND position=%s AND statut <> 'terminé'
+    """, (equipe_id, tournoi_id, tableau, int(tour), int(position)))
+
+def enregistrer_score_phase_finale(match_id, score1, score2, gagnant_id=None):
+    """Enregistre le score et qualifie le vainqueur (et le perdant en double élimination).
+
+    gagnant_id n'est nécessaire qu'en cas d'égalité (tirs au but) ; un nul
+    n'est accepté qu'en poule finale.
+    """
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT tournoi_id, tableau, equipe1_id, equipe2_id, suite_gagnant, suite_perdant
+                FROM phases_finales WHERE id=%s FOR UPDATE
+            """, (match_id,))
+            match = cursor.fetchone()
+            if not match:
+                return False
+            tournoi_id, tableau, equipe1_id, equipe2_id, suite_gagnant, suite_perdant = match
+            if equipe1_id is None or equipe2_id is None:
+                return False
+            if gagnant_id is None and score1 != score2:
+                gagnant_id = equipe1_id if score1 > score2 else equipe2_id
+            if gagnant_id not in (equipe1_id, equipe2_id) and not (gagnant_id is None and tableau == 'poule'):
+                return False
+            
+            cursor.execute("""
+                UPDATE phases_finales
+                SET score1=%s, score2=%s, gagnant_id=%s, statut='terminé'
+                WHERE id=%s
+            """, (score1, score2, gagnant_id, match_id))
+            perdant_id = equipe2_id if gagnant_id == equipe1_id else equipe1_id
+            if suite_gagnant:
+                _placer_equipe(cursor, tournoi_id, suite_gagnant, gagnant_id)
+            if suite_perdant:
+                _placer_equipe(cursor, tournoi_id, suite_perdant, perdant_id)
+    except Error as e:
+        print(f"Erreur score phase finale: {e}")
+        return False
+    invalider_tournoi(tournoi_id)
+    return True
 
 # ----------------- Génération PDF -----------------
-def generer_fiche_equipe_pdf(equipe_id):
+EXPORT_DIR = os.environ.get('TOURNOI_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'tournoi_exports'))
+
+class ExportDocuments:
+    """Documents générés sur disque, mis en cache par (document, tournoi, version des données).
+
+    Un document n'est régénéré qu'après une écriture sur son tournoi
+    (invalider_tournoi). Le fichier est écrit sous un nom temporaire puis
+    renommé, et les versions précédentes sont supprimées. Le jeton
+    d'instance évite de réutiliser les fichiers d'un autre processus, dont
+    les numéros de version n'ont pas le même sens.
+    """
+
+    def __init__(self, dossier, duree_conservation=86400):
+        self.dossier = dossier
+        self.jeton = uuid.uuid4().hex[:8]
+        self._verrous = {}
+        self._lock = threading.Lock()
+        os.makedirs(dossier, exist_ok=True)
+        limite = time.time() - duree_conservation
+        for nom in os.listdir(dossier):
+            chemin = os.path.join(dossier, nom)
+            if os.path.isfile(chemin) and os.path.getmtime(chemin) < limite:
+                os.remove(chemin)
+
+    def _verrou(self, prefixe):
+        with self._lock:
+            return self._verrous.setdefault(prefixe, threading.Lock())
+
+    def obtenir(self, type_doc, tournoi_id, generateur, ident=None, extension='pdf'):
+        """Chemin du document à jour ; `generateur(chemin)` l'écrit s'il manque."""
+        prefixe = f"{type_doc}_{tournoi_id}_{ident if ident is not None else 'tout'}_{self.jeton}_v"
+        chemin = os.path.join(self.dossier, f"{prefixe}{version_tournoi(tournoi_id)}.{extension}")
+        if os.path.exists(chemin):
+            return chemin
+        with self._verrou(prefixe):
+            if not os.path.exists(chemin):
+                temporaire = f"{chemin}.{threading.get_ident()}.tmp"
+                try:
+                    generateur(temporaire)
+                    os.replace(temporaire, chemin)
+                except BaseException:
+                    # Pas de fichier partiel laissé dans le dossier d'export
+                    if os.path.exists(temporaire):
+                        os.remove(temporaire)
+                    raise
+                for nom in os.listdir(self.dossier):
+                    if nom.startswith(prefixe) and os.path.join(self.dossier, nom) != chemin and not nom.endswith('.tmp'):
+                        os.remove(os.path.join(self.dossier, nom))
+        return chemin
+
+@st.cache_resource
+def get_exports():
+    return ExportDocuments(EXPORT_DIR)
+
+def _pdf_fiche_equipe(nom_equipe, joueurs):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, f"Fiche d'équipe: {nom_equipe}", 0, 1, 'C')
+    pdf.ln(10)
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, "Liste des joueurs:", 0, 1)
+    pdf.ln(5)
+
+    # En-tête du tableau
+    pdf.set_fill_color(200, 200, 200)
+    pdf.cell(20, 10, "Numéro", 1, 0, 'C', True)
+    pdf.cell(80, 10, "Nom", 1, 0, 'C', True)
+    pdf.cell(50, 10, "Poste", 1, 1, 'C', True)
+
+    # Données des joueurs
+    for joueur in joueurs:
+        pdf.cell(20, 10, str(joueur[1]), 1, 0, 'C')
+        pdf.cell(80, 10, joueur[0], 1, 0)
+        pdf.cell(50, 10, joueur[2], 1, 1)
+    return pdf
+
+def _pdf_calendrier(tournoi, matchs):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, f"Calendrier du tournoi: {tournoi[0]}", 0, 1, 'C')
+    pdf.ln(5)
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, f"Dates: {tournoi[1]} au {tournoi[2]} - Lieu: {tournoi[3]}", 0, 1)
+    pdf.ln(10)
+
+    # En-tête du tableau
+    pdf.set_fill_color(200, 200, 200)
+    pdf.cell(40, 10, "Date/Heure", 1, 0, 'C', True)
+    pdf.cell(60, 10, "Équipe 1", 1, 0, 'C', True)
+    pdf.cell(60, 10, "Équipe 2", 1, 0, 'C', True)
+    pdf.cell(30, 10, "Lieu", 1, 1, 'C', True)
+
+    # Données des matchs
+    for match in matchs:
+        date_str = match[2].strftime("%d/%m/%Y %H:%M") if match[2] else "À définir"
+        pdf.cell(40, 10, date_str, 1, 0)
+        pdf.cell(60, 10, match[0], 1, 0)
+        pdf.cell(60, 10, match[1], 1, 0)
+        pdf.cell(30, 10, match[3] or "Principal", 1, 1)
+    return pdf
+
+def exporter_fiche_equipe(equipe_id):
+    """Chemin du PDF de la fiche d'équipe (régénéré seulement si les données ont changé)."""
     conn = create_connection()
-    if conn:
+    if not conn:
+        return None
+    try:
         cursor = conn.cursor()
         # Récupérer les infos de l'équipe
         cursor.execute("SELECT nom, tournoi_id FROM equipes WHERE id=%s", (equipe_id,))
         equipe = cursor.fetchone()
-        # Récupérer les joueurs
-        cursor.execute("SELECT nom, numero, poste FROM joueurs WHERE equipe_id=%s ORDER BY numero", (equipe_id,))
-        joueurs = cursor.fetchall()
-        conn.close()
-
-        # Créer le PDF
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", 'B', 16)
-        pdf.cell(0, 10, f"Fiche d'équipe: {equipe[0]}", 0, 1, 'C')
-        pdf.ln(10)
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, "Liste des joueurs:", 0, 1)
-        pdf.ln(5)
-
-        # En-tête du tableau
-        pdf.set_fill_color(200, 200, 200)
-        pdf.cell(20, 10, "Numéro", 1, 0, 'C', True)
-        pdf.cell(80, 10, "Nom", 1, 0, 'C', True)
-        pdf.cell(50, 10, "Poste", 1, 1, 'C', True)
-
-        # Données des joueurs
-        for joueur in joueurs:
-            pdf.cell(20, 10, str(joueur[1]), 1, 0, 'C')
-            pdf.cell(80, 10, joueur[0], 1, 0)
-            pdf.cell(50, 10, joueur[2], 1, 1)
-        return pdf.output(dest='S').encode('latin1')
-    return None
-
-def generer_calendrier_pdf(tournoi_id):
-    conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        # Récupérer les infos du tournoi
-        cursor.execute("SELECT nom, date_debut, date_fin, lieu FROM tournois WHERE id=%s", (tournoi_id,))
-        tournoi = cursor.fetchone()
+        if not equipe:
+            return None
         
-        # Récupérer les matchs
-        cursor.execute("""
-            SELECT e1.nom, e2.nom, m.date_match, m.lieu, g.nom, m.phase
-            FROM matchs m
-            JOIN equipes e1 ON m.equipe1_id = e1.id
-            JOIN equipes e2 ON m.equipe2_id = e2.id
-            LEFT JOIN groupes g ON m.groupe_id = g.id
-            WHERE m.tournoi_id = %s
-            ORDER BY m.date_match
-        """, (tournoi_id,))
-        matchs = cursor.fetchall()
+        def generer(chemin):
+            # Récupérer les joueurs
+            cursor.execute("SELECT nom, numero, poste FROM joueurs WHERE equipe_id=%s ORDER BY numero", (equipe_id,))
+            _pdf_fiche_equipe(equipe[0], cursor.fetchall()).output(chemin, 'F')
+        
+        return get_exports().obtenir('fiche_equipe', equipe[1], generer, ident=equipe_id)
+    finally:
         conn.close()
 
-        # Créer le PDF
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", 'B', 16)
-        pdf.cell(0, 10, f"Calendrier du tournoi: {tournoi[0]}", 0, 1, 'C')
-        pdf.ln(5)
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, f"Dates: {tournoi[1]} au {tournoi[2]} - Lieu: {tournoi[3]}", 0, 1)
-        pdf.ln(10)
-
-        # En-tête du tableau
-        pdf.set_fill_color(200, 200, 200)
-        pdf.cell(40, 10, "Date/Heure", 1, 0, 'C', True)
-        pdf.cell(60, 10, "Équipe 1", 1, 0, 'C', True)
-        pdf.cell(60, 10, "Équipe 2", 1, 0, 'C', True)
-        pdf.cell(30, 10, "Lieu", 1, 1, 'C', True)
-
-        # Données des matchs
-        for match in matchs:
-            date_str = match[2].strftime("%d/%m/%Y %H:%M") if match[2] else "À définir"
-            pdf.cell(40, 10, date_str, 1, 0)
-            pdf.cell(60, 10, match[0], 1, 0)
-            pdf.cell(60, 10, match[1], 1, 0)
-            pdf.cell(30, 10, match[3] or "Principal", 1, 1)
-        
-        return pdf.output(dest='S').encode('latin1')
-    return None
+def exporter_fiches_tournoi(tournoi_id, progression=None):
+    """Chemin d'une archive ZIP contenant la fiche de chaque équipe du tournoi.
 
-# ----------------- Tirage automatique -----------------
-def tirage_groupes(tournoi_id):
-    eqs = get_equipes(tournoi_id)
-    if not eqs:
-        return []
-    
-    # Debug: afficher toutes les équipes et leur statut
-    for eq in eqs:
-        eligible = verifier_equipe_eligible(eq[0])
-        print(f"Équipe {eq[1]} (ID: {eq[0]}): Eligible = {eligible}")
-    
-    # Vérifier que toutes les équipes ont payé leurs droits
-    equipes_non_eligibles = []
-    for eq in eqs:
-        if not verifier_equipe_eligible(eq[0]):
-            equipes_non_eligibles.append(eq[1])
-    
-    if equipes_non_eligibles:
-        st.error(f"Équipes non éligibles (droit non payé): {', '.join(equipes_non_eligibles)}")
-        return []
-    
-    # Récupérer la configuration du tournoi
-    conn = create_connection()
-    if not conn:
-        return []
-    
-    cursor = conn.cursor()
-    cursor.execute("SELECT equipes_par_groupe FROM tournois WHERE id=%s", (tournoi_id,))
-    result = cursor.fetchone()
-    equipes_par_groupe = result[0] if result else 4
-    
-    # Animation du tirage au sort
-    st.write("🎲 Tirage au sort en cours...")
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    for i in range(15):
-        progress_bar.progress((i + 1) / 15)
-        status_text.text(f"Tirage en cours... {15-i} secondes")
-        time.sleep(1)
+    `progression(pourcentage, message)` est appelée après chaque fiche.
+    """
+    def generer(chemin):
+        conn = create_connection()
+        if not conn:
+            raise Error("Erreur de connexion")
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, nom FROM equipes WHERE tournoi_id=%s ORDER BY nom", (tournoi_id,))
+            equipes = cursor.fetchall()
+            cursor.execute("""
+                SELECT j.equipe_id, j.nom, j.numero, j.poste
+                FROM joueurs j
+                JOIN equipes e ON j.equipe_id = e.id
+                WHERE e.tournoi_id=%s
+                ORDER BY j.equipe_id, j.numero
+            """, (tournoi_id,))
+            joueurs = {}
+            for equipe_id, nom, numero, poste in cursor.fetchall():
+                joueurs.setdefault(equipe_id, []).append((nom, numero, poste))
+        finally:
+            conn.close()
+        
+        # Chaque fiche est ajoutée à l'archive puis libérée
+        with zipfile.ZipFile(chemin, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for i, (equipe_id, nom) in enumerate(equipes, 1):
+                pdf = _pdf_fiche_equipe(nom, joueurs.get(equipe_id, []))
+                archive.writestr(f"fiche_equipe_{equipe_id}_{nom}.pdf", pdf.output(dest='S').encode('latin1'))
+                if progression:
+                    progression(int(100 * i / len(equipes)), f"Fiche {i}/{len(equipes)} : {nom}")
     
-    status_text.text("Tirage terminé!")
+    try:
+        return get_exports().obtenir('fiches_equipes', tournoi_id, generer, extension='zip')
+    except Error as e:
+        print(f"Erreur export des fiches: {e}")
+        return None
+
+def exporter_calendrier(tournoi_id):
+    """Chemin du PDF du calendrier (régénéré seulement si les données ont changé)."""
+    def generer(chemin):
+        conn = create_connection()
+        if not conn:
+            raise Error("Erreur de connexion")
+        try:
+            cursor = conn.cursor()
+            # Récupérer les infos du tournoi
+            cursor.execute("SELECT nom, date_debut, date_fin, lieu FROM tournois WHERE id=%s", (tournoi_id,))
+            tournoi = cursor.fetchone()
+            
+            # Récupérer les matchs
+            cursor.execute("""
+                SELECT e1.nom, e2.nom, m.date_match, m.lieu, g.nom, m.phase
+                FROM matchs m
+                JOIN equipes e1 ON m.equipe1_id = e1.id
+                JOIN equipes e2 ON m.equipe2_id = e2.id
+                LEFT JOIN groupes g ON m.groupe_id = g.id
+                WHERE m.tournoi_id = %s
+                ORDER BY m.date_match
+            """, (tournoi_id,))
+            matchs = cursor.fetchall()
+        finally:
+            conn.close()
+        _pdf_calendrier(tournoi, matchs).output(chemin, 'F')
     
-    # Mélanger les équipes
-    random.shuffle(eqs)
+    try:
+        return get_exports().obtenir('calendrier', tournoi_id, generer)
+    except Error as e:
+        print(f"Erreur export du calendrier: {e}")
+        return None
+
+def _lire_fichier(chemin):
+    if not chemin:
+        return None
+    with open(chemin, 'rb') as f:
+        return f.read()
+
+def generer_fiche_equipe_pdf(equipe_id):
+    return _lire_fichier(exporter_fiche_equipe(equipe_id))
+
+def generer_calendrier_pdf(tournoi_id):
+    return _lire_fichier(exporter_calendrier(tournoi_id))
+
+# ----------------- Tirage automatique -----------------
+def calculer_tirage(equipes, equipes_par_groupe):
+    """Répartit aléatoirement les équipes (id, nom) en groupes.
+
+    Retourne la liste des noms de groupes et les affectations
+    (equipe_id, nom, groupe, numero) dans l'ordre du tirage.
+    """
+    equipes = list(equipes)
+    random.shuffle(equipes)
     
     # Créer les groupes (A, B, C, ...)
-    nb_groupes = (len(eqs) + equipes_par_groupe - 1) // equipes_par_groupe
+    nb_groupes = (len(equipes) + equipes_par_groupe - 1) // equipes_par_groupe
     groupes = [f"Groupe {chr(65+i)}" for i in range(nb_groupes)]
     
-    # Créer les groupes dans la base
-    for nom_groupe in groupes:
-        cursor.execute("INSERT IGNORE INTO groupes (nom, tournoi_id) VALUES (%s, %s)", (nom_groupe, tournoi_id))
+    # Assigner les équipes aux groupes avec numéros aléatoires entre 1 et 99
+    affectations = []
+    for i, (equipe_id, nom) in enumerate(equipes):
+        affectations.append((equipe_id, nom, groupes[i % nb_groupes], random.randint(1, 99)))
+    return groupes, affectations
+
+def effectuer_tirage(tournoi_id):
+    """Calcule et enregistre le tirage en une seule transaction, sans interface.
+
+    Retourne (succès, message, résultat) où résultat contient les groupes
+    et les affectations du tirage.
+    """
+    eligibilite = get_eligibilite_equipes(tournoi_id)
+    if not eligibilite:
+        return False, "Aucune équipe dans ce tournoi", None
     
-    # Assigner les équipes aux groupes avec numéros aléatoires
-    for i, e in enumerate(eqs):
-        groupe = groupes[i % len(groupes)]
-        # Récupérer l'ID du groupe
-        cursor.execute("SELECT id FROM groupes WHERE nom=%s AND tournoi_id=%s", (groupe, tournoi_id))
-        groupe_id = cursor.fetchone()[0]
-        
-        # Assigner un numéro aléatoire entre 1 et 99
-        numero_equipe = random.randint(1, 99)
-        cursor.execute("UPDATE equipes SET groupe=%s, numero=%s WHERE id=%s", 
-                      (groupe, numero_equipe, e[0]))
+    equipes_non_eligibles = [f"{eq['nom']} ({eq['raison']})" for eq in eligibilite if not eq['eligible']]
+    if equipes_non_eligibles:
+        return False, f"Équipes non éligibles: {', '.join(equipes_non_eligibles)}", None
     
-    conn.commit()
-    conn.close()
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT equipes_par_groupe FROM tournois WHERE id=%s", (tournoi_id,))
+            result = cursor.fetchone()
+            equipes_par_groupe = (result[0] if result else None) or 4
+            
+            groupes, affectations = calculer_tirage(
+                [(eq['id'], eq['nom']) for eq in eligibilite], equipes_par_groupe
+            )
+            
+            cursor.executemany(
+                "INSERT IGNORE INTO groupes (nom, tournoi_id) VALUES (%s, %s)",
+                [(nom_groupe, tournoi_id) for nom_groupe in groupes]
+            )
+            cursor.executemany(
+                "UPDATE equipes SET groupe=%s, numero=%s WHERE id=%s",
+                [(groupe, numero, equipe_id) for equipe_id, _, groupe, numero in affectations]
+            )
+    except Error as e:
+        return False, f"Erreur lors du tirage: {e}", None
+    
+    invalider_tournoi(tournoi_id)
+    maj_index_recherche(tournoi_id=tournoi_id)
+    return True, "Tirage terminé avec succès!", {'groupes': groupes, 'affectations': affectations}
+
+def afficher_animation_tirage(affectations, duree_max=12.0):
+    """Rejoue un tirage déjà enregistré ; l'animation est purement CSS (côté navigateur)."""
+    if not affectations:
+        return
+    pas = min(0.6, duree_max / len(affectations))
     
-    # Afficher le résultat du tirage
-    st.success("Tirage terminé avec succès!")
-    st.balloons()
+    par_groupe = {}
+    for ordre, (equipe_id, nom, groupe, numero) in enumerate(affectations):
+        par_groupe.setdefault(groupe, []).append((ordre, nom, numero))
+    
+    blocs = []
+    for groupe in sorted(par_groupe):
+        lignes = "".join(
+            f'<div class="tirage-equipe" style="animation-delay:{ordre * pas:.2f}s">'
+            f'{escape(nom)} <small>#{numero if numero is not None else "-"}</small></div>'
+            for ordre, nom, numero in par_groupe[groupe]
+        )
+        blocs.append(f'<div class="tirage-groupe"><h4>{escape(groupe)}</h4>{lignes}</div>')
     
-    return groupes
+    st.markdown(f"""
+        <style>
+        .tirage-grille {{ display: flex; flex-wrap: wrap; gap: 12px; }}
+        .tirage-groupe {{ background: white; border-radius: 10px; padding: 10px 16px; min-width: 180px;
+                          box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1); }}
+        .tirage-equipe {{ opacity: 0; animation: tirage-apparition 0.5s ease-out forwards; padding: 2px 0; }}
+        @keyframes tirage-apparition {{
+            from {{ opacity: 0; transform: translateY(-12px) scale(0.9); }}
+            to {{ opacity: 1; transform: none; }}
+        }}
+        </style>
+        <div class="tirage-grille">{"".join(blocs)}</div>
+    """, unsafe_allow_html=True)
 
 # ----------------- Génération automatique des matchs -----------------
-def generer_matchs_groupes(tournoi_id):
+def calendrier_round_robin(equipes_ids):
+    """Méthode du cercle : liste de journées équilibrées de paires (equipe1, equipe2).
+
+    Chaque équipe joue au plus une fois par journée ; avec un nombre impair
+    d'équipes, une équipe est exempte à chaque journée.
+    """
+    equipes = list(equipes_ids)
+    if len(equipes) % 2:
+        equipes.append(None)
+    n = len(equipes)
+    journees = []
+    for j in range(n - 1):
+        paires = []
+        for i in range(n // 2):
+            a, b = equipes[i], equipes[n - 1 - i]
+            if a is None or b is None:
+                continue
+            # Alterner domicile/extérieur pour l'équipe fixe du cercle
+            paires.append((b, a) if i == 0 and j % 2 else (a, b))
+        journees.append(paires)
+        equipes = [equipes[0], equipes[-1]] + equipes[1:-1]
+    return journees
+
+def planifier_matchs(journees_par_groupe, nb_terrains, debut, duree_creneau):
+    """Répartit les journées de tous les groupes en créneaux de `nb_terrains` matchs simultanés.
+
+    Retourne des tuples (groupe_id, equipe1_id, equipe2_id, date_match, lieu).
+    Un créneau ne contient que des matchs d'une même journée : aucune équipe
+    n'y joue deux fois.
+    """
+    nb_journees = max((len(j) for j in journees_par_groupe.values()), default=0)
+    planning = []
+    creneau = 0
+    for k in range(nb_journees):
+        matchs_journee = [
+            (groupe_id, e1, e2)
+            for groupe_id, journees in journees_par_groupe.items() if k < len(journees)
+            for e1, e2 in journees[k]
+        ]
+        for i in range(0, len(matchs_journee), nb_terrains):
+            date_match = debut + creneau * duree_creneau
+            for terrain, (groupe_id, e1, e2) in enumerate(matchs_journee[i:i + nb_terrains], start=1):
+                planning.append((groupe_id, e1, e2, date_match, f"Terrain {terrain}"))
+            creneau += 1
+    return planning
+
+def generer_matchs_groupes(tournoi_id, nb_terrains=1, debut=None, duree_creneau=timedelta(hours=2)):
+    """Génère le calendrier des phases de groupes (toutes les équipes se rencontrent).
+
+    Peut être relancé : les rencontres déjà présentes ne sont pas recréées et
+    les nouvelles sont planifiées après le dernier match existant.
+    """
     eqs = get_equipes(tournoi_id)
     if not eqs:
         return False
@@ -1000,93 +3022,687 @@ def generer_matchs_groupes(tournoi_id):
     # Récupérer les groupes
     groupes = {}
     for eq in eqs:
-        if eq[2] not in groupes:
-            groupes[eq[2]] = []
-        groupes[eq[2]].append(eq[0])
+        if eq[2]:
+            groupes.setdefault(eq[2], []).append(eq[0])
+    
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, nom FROM groupes WHERE tournoi_id=%s", (tournoi_id,))
+            groupes_ids = {nom: groupe_id for groupe_id, nom in cursor.fetchall()}
+            
+            cursor.execute("""
+                SELECT equipe1_id, equipe2_id, date_match
+                FROM matchs
+                WHERE tournoi_id=%s AND groupe_id IS NOT NULL
+            """, (tournoi_id,))
+            existants = cursor.fetchall()
+            deja_planifies = {frozenset((e1, e2)) for e1, e2, _ in existants}
+            
+            journees_par_groupe = {}
+            for nom_groupe, equipes_ids in groupes.items():
+                if nom_groupe not in groupes_ids:
+                    continue
+                journees = [
+                    [p for p in paires if frozenset(p) not in deja_planifies]
+                    for paires in calendrier_round_robin(equipes_ids)
+                ]
+                journees_par_groupe[groupes_ids[nom_groupe]] = [j for j in journees if j]
+            
+            if debut is None:
+                debut = datetime.now() + timedelta(days=1)  # Commencer demain
+                dates = [d for _, _, d in existants if d is not None]
+                if dates:
+                    debut = max(debut, max(dates) + duree_creneau)
+            
+            planning = planifier_matchs(journees_par_groupe, max(1, int(nb_terrains)), debut, duree_creneau)
+            if planning:
+                cursor.executemany("""
+                    INSERT INTO matchs (tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, lieu, phase)
+                    VALUES (%s, %s, %s, %s, %s, %s, 'Phase de groupes')
+                """, [(tournoi_id, e1, e2, groupe_id, date_match, lieu)
+                      for groupe_id, e1, e2, date_match, lieu in planning])
+    except Error as e:
+        print(f"Erreur génération calendrier: {e}")
+        return False
+    invalider_tournoi(tournoi_id)
+    maj_index_recherche(tournoi_id=tournoi_id)
+    return True
+
+# ----------------- Recherche intelligente -----------------
+SEUIL_SIMILARITE = 0.5
+# Rechargement complet de l'index après ce délai (écritures d'autres processus, SQL direct)
+RECHERCHE_TTL = float(os.environ.get('TOURNOI_RECHERCHE_TTL', 300))
+
+def normaliser_texte(texte):
+    """Minuscules sans accents, espaces réduits (« Éric  Dupré » → « eric dupre »)."""
+    decompose = unicodedata.normalize('NFKD', str(texte or ''))
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return ' '.join(sans_accents.casefold().split())
+
+def _trigrammes(texte):
+    # Les espaces de bordure font des débuts de mots des trigrammes à part entière
+    texte = f"  {texte.replace(' ', '  ')} "
+    return {texte[i:i + 3] for i in range(len(texte) - 2)}
+
+class IndexRecherche:
+    """Index trigrammes en mémoire des équipes, joueurs et matchs de tous les tournois.
+
+    Chaque document est identifié par (type, id) et garde le tuple renvoyé
+    par rechercher_global(). La recherche ignore les accents, classe les
+    résultats (exact, préfixe, début de mot, sous-chaîne, puis
+    ressemblance par trigrammes) et l'index se met à jour document par
+    document après les écritures de ce processus. Les autres écritures
+    sont rattrapées par reconstruire(), relancée après RECHERCHE_TTL.
+    """
+
+    def __init__(self):
+        self._documents = {}
+        self._postings = {}
+        self._lock = threading.RLock()
+        # Sérialise la première construction sans bloquer _lock pendant le chargement
+        self._construction = threading.Lock()
+        self._generation = 0
+        self._en_reconstruction = False
+        self.construit_a = None
+        self.pret = False
+
+    def _retirer(self, cle):
+        document = self._documents.pop(cle, None)
+        if document is None:
+            return
+        for tg in document['trigrammes']:
+            cles = self._postings.get(tg)
+            if cles is not None:
+                cles.discard(cle)
+                if not cles:
+                    del self._postings[tg]
+
+    def indexer(self, type_doc, doc_id, texte, tournoi_id, resultat, equipes=()):
+        cle = (type_doc, doc_id)
+        normalise = normaliser_texte(texte)
+        trigrammes = _trigrammes(normalise)
+        with self._lock:
+            self._retirer(cle)
+            self._documents[cle] = {
+                'texte': normalise,
+                'trigrammes': trigrammes,
+                'tournoi_id': tournoi_id,
+                'equipes': frozenset(equipes),
+                'resultat': resultat,
+                'generation': self._generation,
+            }
+            for tg in trigrammes:
+                self._postings.setdefault(tg, set()).add(cle)
+
+    def retirer(self, type_doc, doc_id):
+        with self._lock:
+            self._retirer((type_doc, doc_id))
+
+    def retirer_equipe(self, equipe_id):
+        """Retire une équipe et tous les documents (joueurs, matchs) qui la concernent."""
+        with self._lock:
+            for cle in [c for c, d in self._documents.items() if equipe_id in d['equipes']]:
+                self._retirer(cle)
+
+    def reconstruire(self, charger):
+        """Réindexe tout via charger(index) puis retire les documents disparus de la base.
+
+        Les recherches continuent pendant le chargement. Un document indexé
+        pendant la reconstruction (écriture concurrente) porte la nouvelle
+        génération et n'est pas retiré. Si charger() renvoie False (base
+        indisponible), l'index garde son contenu. Retourne True si réussi.
+        """
+        with self._lock:
+            self._en_reconstruction = True
+            self._generation += 1
+            generation = self._generation
+        try:
+            if charger(self) is False:
+                return False
+            with self._lock:
+                for cle in [c for c, d in self._documents.items() if d['generation'] < generation]:
+                    self._retirer(cle)
+                self.construit_a = time.monotonic()
+                self.pret = True
+            return True
+        finally:
+            with self._lock:
+                self._en_reconstruction = False
+
+    def construire(self, charger):
+        """Première construction : un seul appelant charge, les autres attendent le résultat."""
+        with self._construction:
+            if self.pret:
+                return True
+            return self.reconstruire(charger)
+
+    def a_reconstruire(self, ttl):
+        """True pour un seul appelant quand l'index a dépassé son TTL."""
+        with self._lock:
+            if (self._en_reconstruction or self.construit_a is None
+                    or time.monotonic() - self.construit_a < ttl):
+                return False
+            self._en_reconstruction = True
+            return True
+
+    @staticmethod
+    def _score(requete, texte):
+        if texte == requete:
+            return 4.0
+        if texte.startswith(requete):
+            return 3.0
+        if f" {requete}" in f" {texte}":
+            return 2.0
+        if requete in texte:
+            return 1.5
+        return 0.0
+
+    def rechercher(self, terme, tournoi_id=None):
+        """Retourne {type: [(score, resultat), ...]} trié par pertinence."""
+        requete = normaliser_texte(terme)
+        resultats = {}
+        if not requete:
+            return resultats
+        trigrammes = _trigrammes(requete)
+        with self._lock:
+            if len(requete) < 3:
+                # Trop court pour les trigrammes : sous-chaîne sur tous les documents
+                candidats = {cle: 0 for cle in self._documents}
+            else:
+                candidats = {}
+                for tg in trigrammes:
+                    for cle in self._postings.get(tg, ()):
+                        candidats[cle] = candidats.get(cle, 0) + 1
+            for cle, communs in candidats.items():
+                document = self._documents[cle]
+                if tournoi_id and document['tournoi_id'] != tournoi_id:
+                    continue
+                score = self._score(requete, document['texte'])
+                if not score:
+                    similarite = communs / len(trigrammes)
+                    if similarite < SEUIL_SIMILARITE:
+                        continue
+                    score = similarite
+                resultats.setdefault(cle[0], []).append((score, document['texte'], document['resultat']))
+        return {
+            type_doc: [(score, resultat) for score, _, resultat in sorted(liste, key=lambda r: (-r[0], r[1]))]
+            for type_doc, liste in resultats.items()
+        }
+
+    def stats(self):
+        with self._lock:
+            age = time.monotonic() - self.construit_a if self.construit_a is not None else None
+            return {'documents': len(self._documents), 'trigrammes': len(self._postings), 'pret': self.pret,
+                    'age': age, 'ttl': RECHERCHE_TTL}
+
+@st.cache_resource
+def get_index_recherche():
+    return IndexRecherche()
+
+def _charger_documents(cursor, index, tournoi_id=None, equipe_id=None, joueur_id=None, match_id=None):
+    """Indexe les documents correspondant au filtre (tout si aucun filtre)."""
+    if joueur_id is None and match_id is None:
+        filtre, params = "1=1", ()
+        if tournoi_id is not None:
+            filtre, params = "e.tournoi_id=%s", (tournoi_id,)
+        elif equipe_id is not None:
+            filtre, params = "e.id=%s", (equipe_id,)
+        cursor.execute(f"SELECT e.id, e.nom, e.groupe, e.tournoi_id FROM equipes e WHERE {filtre}", params)
+        for eid, nom, groupe, tid in cursor.fetchall():
+            index.indexer('equipes', eid, nom, tid, (eid, nom, groupe), equipes=(eid,))
+    
+    if match_id is None:
+        filtre, params = "1=1", ()
+        if joueur_id is not None:
+            filtre, params = "j.id=%s", (joueur_id,)
+        elif tournoi_id is not None:
+            filtre, params = "e.tournoi_id=%s", (tournoi_id,)
+        elif equipe_id is not None:
+            filtre, params = "e.id=%s", (equipe_id,)
+        cursor.execute(f"""
+            SELECT j.id, j.nom, j.numero, e.nom, e.tournoi_id, e.id
+            FROM joueurs j
+            JOIN equipes e ON j.equipe_id = e.id
+            WHERE {filtre}
+        """, params)
+        for jid, nom, numero, equipe_nom, tid, eid in cursor.fetchall():
+            index.indexer('joueurs', jid, nom, tid, (jid, nom, numero, equipe_nom), equipes=(eid,))
     
-    # Créer les matchs pour chaque groupe (toutes les équipes se rencontrent)
+    if joueur_id is None:
+        filtre, params = "1=1", ()
+        if match_id is not None:
+            filtre, params = "m.id=%s", (match_id,)
+        elif tournoi_id is not None:
+            filtre, params = "m.tournoi_id=%s", (tournoi_id,)
+        elif equipe_id is not None:
+            filtre, params = "(m.equipe1_id=%s OR m.equipe2_id=%s)", (equipe_id, equipe_id)
+        cursor.execute(f"""
+            SELECT m.id, e1.nom, e2.nom, m.date_match, m.tournoi_id, e1.id, e2.id
+            FROM matchs m
+            JOIN equipes e1 ON m.equipe1_id = e1.id
+            JOIN equipes e2 ON m.equipe2_id = e2.id
+            WHERE {filtre}
+        """, params)
+        for mid, nom1, nom2, date_match, tid, e1, e2 in cursor.fetchall():
+            index.indexer('matchs', mid, f"{nom1} vs {nom2}", tid, (mid, nom1, nom2, date_match), equipes=(e1, e2))
+
+def maj_index_recherche(tournoi_id=None, equipe_id=None, joueur_id=None, match_id=None):
+    """Réindexe les documents touchés par une écriture (sans effet tant que l'index n'est pas construit)."""
+    index = get_index_recherche()
+    if not index.pret:
+        return
+    conn = create_connection()
+    if conn:
+        try:
+            _charger_documents(conn.cursor(), index, tournoi_id, equipe_id, joueur_id, match_id)
+        except Error as e:
+            print(f"Erreur mise à jour index de recherche: {e}")
+        finally:
+            conn.close()
+
+def _charger_index(index):
     conn = create_connection()
     if not conn:
         return False
-    
+    try:
+        _charger_documents(conn.cursor(), index)
+        return True
+    except Error as e:
+        print(f"Erreur reconstruction index de recherche: {e}")
+        return False
+    finally:
+        conn.close()
+
+def reconstruire_index_recherche():
+    """Recharge tout l'index de recherche depuis la base."""
+    return get_index_recherche().reconstruire(_charger_index)
+
+def _reconstruire_en_arriere_plan():
+    # Thread du pool de lectures : pas de st.error depuis create_connection
+    _hors_streamlit.set(True)
+    reconstruire_index_recherche()
+
+def _index_recherche_pret():
+    index = get_index_recherche()
+    if not index.pret:
+        if not index.construire(_charger_index):
+            return None
+    elif index.a_reconstruire(RECHERCHE_TTL):
+        # Les recherches continuent sur l'index courant pendant le rechargement
+        get_executeur_lectures().submit(_reconstruire_en_arriere_plan)
+    return index
+
+def rechercher_global(term, tournoi_id=None, page=1, par_page=20):
+    """Recherche équipes, joueurs et matchs (insensible aux accents), classés et paginés.
+
+    Retourne les mêmes tuples qu'auparavant par catégorie, plus 'total' :
+    le nombre de résultats de chaque catégorie avant pagination.
+    """
+    index = _index_recherche_pret()
+    if index is None:
+        return {}
+    trouves = index.rechercher(term, tournoi_id)
+    debut = (max(page, 1) - 1) * par_page
+    results = {'total': {}}
+    for categorie in ('equipes', 'joueurs', 'matchs'):
+        liste = trouves.get(categorie, [])
+        results['total'][categorie] = len(liste)
+        results[categorie] = [resultat for _, resultat in liste[debut:debut + par_page]]
+    return results
+
+# ----------------- Résumé des tournois -----------------
+RESUME_MATERIALISE = os.environ.get('TOURNOI_RESUME_MATERIALISE', '1') == '1'
+# Âge maximal (s) d'une ligne de resume_tournois : couvre les écritures des autres processus
+RESUME_TTL = float(os.environ.get('TOURNOI_RESUME_TTL', 300))
+
+COLONNES_RESUME = ["id", "nom", "format_finales", "date_creation", "nb_equipes", "nb_matchs",
+                   "matchs_joues", "droits_percus", "meilleur_buteur", "buts_meilleur_buteur"]
+
+# Agrégats de tous les tournois (ou d'une liste d'ids) en une requête groupée
+SQL_RESUME_TOURNOIS = """
+    SELECT t.id AS tournoi_id, COALESCE(eq.nb, 0) AS nb_equipes, COALESCE(m.nb, 0) AS nb_matchs,
+           COALESCE(m.joues, 0) AS matchs_joues, COALESCE(d.percu, 0) AS droits_percus,
+           b.joueur AS meilleur_buteur, b.buts AS buts_meilleur_buteur
+    FROM tournois t
+    LEFT JOIN (SELECT tournoi_id, COUNT(*) AS nb FROM equipes GROUP BY tournoi_id) eq
+           ON eq.tournoi_id = t.id
+    LEFT JOIN (SELECT tournoi_id, COUNT(*) AS nb, SUM(score1 IS NOT NULL) AS joues
+               FROM matchs GROUP BY tournoi_id) m
+           ON m.tournoi_id = t.id
+    LEFT JOIN (SELECT tournoi_id, SUM(CASE WHEN paye THEN montant ELSE 0 END) AS percu
+               FROM droits_match GROUP BY tournoi_id) d
+           ON d.tournoi_id = t.id
+    LEFT JOIN (
+        SELECT tournoi_id, joueur, buts
+        FROM (
+            SELECT s.tournoi_id, j.nom AS joueur, s.buts,
+                   ROW_NUMBER() OVER (PARTITION BY s.tournoi_id ORDER BY s.buts DESC, j.nom) AS rang
+            FROM stats_joueurs_tournoi s
+            JOIN joueurs j ON s.joueur_id = j.id
+        ) classes
+        WHERE rang = 1 AND buts > 0
+    ) b ON b.tournoi_id = t.id
+"""
+
+@st.cache_resource
+def _etat_resumes():
+    # Version du cache à laquelle chaque résumé matérialisé a été recalculé
+    return {'versions': {}, 'table_prete': False, 'lock': threading.Lock()}
+
+def _table_resume_prete(cursor):
+    etat = _etat_resumes()
+    if not etat['table_prete']:
+        cursor.execute(schema.DDL_RESUME_TOURNOIS)
+        etat['table_prete'] = True
+
+def rafraichir_resume_tournois(tournoi_ids=None, conn=None):
+    """Recalcule la table matérialisée resume_tournois (tous les tournois si tournoi_ids est None).
+
+    Utilise `conn` si elle est fournie (et la valide), sinon une transaction du pool.
+    """
+    if conn is None:
+        with transaction() as conn:
+            rafraichir_resume_tournois(tournoi_ids, conn)
+        return
+    etat = _etat_resumes()
+    versions = {tid: version_tournoi(tid) for tid in (tournoi_ids or [])}
     cursor = conn.cursor()
-    date_match = datetime.now() + timedelta(days=1)  # Commencer demain
-    
-    for nom_groupe, equipes_ids in groupes.items():
-        # Récupérer l'ID du groupe
-        cursor.execute("SELECT id FROM groupes WHERE nom=%s AND tournoi_id=%s", (nom_groupe, tournoi_id))
-        groupe_id = cursor.fetchone()
-        if not groupe_id:
-            continue
-        groupe_id = groupe_id[0]
-        
-        # Créer tous les matchs possibles dans le groupe
-        for i in range(len(equipes_ids)):
-            for j in range(i+1, len(equipes_ids)):
-                cursor.execute("""
-                    INSERT INTO matchs (tournoi_id, equipe1_id, equipe2_id, groupe_id, date_match, phase)
-                    VALUES (%s, %s, %s, %s, %s, 'Phase de groupes')
-                """, (tournoi_id, equipes_ids[i], equipes_ids[j], groupe_id, date_match))
-                date_match += timedelta(hours=2)  # Espacer les matchs de 2 heures
-    
+    _table_resume_prete(cursor)
+    sql = f"""
+        REPLACE INTO resume_tournois (tournoi_id, nb_equipes, nb_matchs, matchs_joues,
+                                      droits_percus, meilleur_buteur, buts_meilleur_buteur)
+        {SQL_RESUME_TOURNOIS}
+    """
+    if tournoi_ids is None:
+        cursor.execute(sql)
+    else:
+        placeholders = ", ".join(["%s"] * len(tournoi_ids))
+        cursor.execute(f"{sql} WHERE t.id IN ({placeholders})", tuple(tournoi_ids))
     conn.commit()
-    conn.close()
-    return True
+    with etat['lock']:
+        etat['versions'].update(versions)
 
-# ----------------- Recherche intelligente -----------------
-def rechercher_global(term, tournoi_id=None):
+def get_resume_tournois(materialise=RESUME_MATERIALISE):
+    """Résumé de chaque tournoi (équipes, matchs, matchs joués, droits perçus, meilleur buteur).
+
+    En mode matérialisé, les tournois modifiés par ce processus depuis le
+    dernier calcul (version du cache changée), sans résumé ou dont le résumé
+    a plus de RESUME_TTL secondes sont recalculés avant la lecture de la
+    table, sur la même connexion. Retourne une liste de dicts dont les clés
+    sont COLONNES_RESUME.
+    """
     conn = create_connection()
-    if conn:
-        cursor = conn.cursor()
-        results = {}
-        
-        # Recherche dans les équipes
-        if tournoi_id:
-            cursor.execute("SELECT id, nom, groupe FROM equipes WHERE tournoi_id=%s AND nom LIKE %s", 
-                          (tournoi_id, f"%{term}%"))
-        else:
-            cursor.execute("SELECT id, nom, groupe FROM equipes WHERE nom LIKE %s", (f"%{term}%",))
-        results['equipes'] = cursor.fetchall()
-        
-        # Recherche dans les joueurs
-        if tournoi_id:
-            cursor.execute("""
-                SELECT j.id, j.nom, j.numero, e.nom 
-                FROM joueurs j 
-                JOIN equipes e ON j.equipe_id = e.id 
-                WHERE e.tournoi_id=%s AND j.nom LIKE %s
-            """, (tournoi_id, f"%{term}%"))
-        else:
+    if not conn:
+        return []
+    cursor = conn.cursor()
+    try:
+        if materialise:
+            etat = _etat_resumes()
+            _table_resume_prete(cursor)
             cursor.execute("""
-                SELECT j.id, j.nom, j.numero, e.nom 
-                FROM joueurs j 
-                JOIN equipes e ON j.equipe_id = e.id 
-                WHERE j.nom LIKE %s
-            """, (f"%{term}%",))
-        results['joueurs'] = cursor.fetchall()
-        
-        # Recherche dans les matchs
-        if tournoi_id:
+                SELECT t.id, r.tournoi_id IS NULL OR r.maj_le < NOW() - INTERVAL %s SECOND
+                FROM tournois t
+                LEFT JOIN resume_tournois r ON r.tournoi_id = t.id
+            """, (int(RESUME_TTL),))
+            lignes = cursor.fetchall()
+            with etat['lock']:
+                perimes = [tid for tid, expire in lignes
+                           if expire or etat['versions'].get(tid) != version_tournoi(tid)]
+            if perimes:
+                rafraichir_resume_tournois(perimes, conn)
             cursor.execute("""
-                SELECT m.id, e1.nom, e2.nom, m.date_match 
-                FROM matchs m 
-                JOIN equipes e1 ON m.equipe1_id = e1.id 
-                JOIN equipes e2 ON m.equipe2_id = e2.id 
-                WHERE m.tournoi_id=%s AND (e1.nom LIKE %s OR e2.nom LIKE %s)
-            """, (tournoi_id, f"%{term}%", f"%{term}%"))
+                SELECT t.id, t.nom, t.format_finales, t.date_creation,
+                       r.nb_equipes, r.nb_matchs, r.matchs_joues, r.droits_percus,
+                       r.meilleur_buteur, r.buts_meilleur_buteur
+                FROM tournois t
+                JOIN resume_tournois r ON r.tournoi_id = t.id
+                ORDER BY t.date_creation DESC
+            """)
         else:
-            cursor.execute("""
-                SELECT m.id, e1.nom, e2.nom, m.date_match 
-                FROM matchs m 
-                JOIN equipes e1 ON m.equipe1_id = e1.id 
-                JOIN equipes e2 ON m.equipe2_id = e2.id 
-                WHERE e1.nom LIKE %s OR e2.nom LIKE %s
-            """, (f"%{term}%", f"%{term}%"))
-        results['matchs'] = cursor.fetchall()
-        
+            cursor.execute(f"""
+                SELECT t.id, t.nom, t.format_finales, t.date_creation,
+                       r.nb_equipes, r.nb_matchs, r.matchs_joues, r.droits_percus,
+                       r.meilleur_buteur, r.buts_meilleur_buteur
+                FROM tournois t
+                JOIN ({SQL_RESUME_TOURNOIS}) r ON r.tournoi_id = t.id
+                ORDER BY t.date_creation DESC
+            """)
+        resumes = [dict(zip(COLONNES_RESUME, row)) for row in cursor.fetchall()]
+    except Error as e:
+        print(f"Erreur résumé des tournois: {e}")
+        resumes = []
+    finally:
         conn.close()
-        return results
-    return {}
+    return resumes
+
+# ----------------- Tâches de fond -----------------
+TACHES_CONFIG = {
+    'workers': int(os.environ.get('TOURNOI_TACHES_WORKERS', 2)),
+    'rafraichissement': float(os.environ.get('TOURNOI_TACHES_RAFRAICHISSEMENT', 1)),
+    # Chaque processus rafraîchit maj_le de ses tâches actives toutes les `battement` secondes ;
+    # une tâche active sans nouvelle depuis `expiration` secondes appartient à un processus mort.
+    'battement': float(os.environ.get('TOURNOI_TACHES_BATTEMENT', 10)),
+    'expiration': float(os.environ.get('TOURNOI_TACHES_EXPIRATION', 60)),
+}
+
+STATUTS_TERMINAUX = ('termine', 'echec', 'interrompu')
+
+def _tache_tirage(tournoi_id, progression):
+    progression(10, "Vérification des équipes")
+    return effectuer_tirage(tournoi_id)
+
+def _tache_calendrier(tournoi_id, progression, nb_terrains=1):
+    progression(10, "Planification des rencontres")
+    if generer_matchs_groupes(tournoi_id, nb_terrains):
+        return True, "Calendrier généré avec succès", None
+    return False, "Erreur lors de la génération du calendrier", None
+
+def _tache_phases_finales(tournoi_id, progression):
+    progression(10, "Qualification des équipes")
+    succes, message = generer_phases_finales(tournoi_id)
+    return succes, message, None
+
+def _tache_export_calendrier(tournoi_id, progression):
+    progression(10, "Génération du PDF")
+    chemin = exporter_calendrier(tournoi_id)
+    if chemin:
+        return True, "Calendrier exporté", chemin
+    return False, "Erreur lors de l'export du calendrier", None
+
+def _tache_export_fiches(tournoi_id, progression):
+    chemin = exporter_fiches_tournoi(tournoi_id, progression)
+    if chemin:
+        return True, "Fiches exportées", chemin
+    return False, "Erreur lors de l'export des fiches", None
+
+# Type de tâche -> fonction(tournoi_id, progression, **paramètres) retournant (succès, message, résultat)
+OPERATIONS_TACHES = {
+    'tirage': _tache_tirage,
+    'calendrier': _tache_calendrier,
+    'phases_finales': _tache_phases_finales,
+    'export_calendrier': _tache_export_calendrier,
+    'export_fiches': _tache_export_fiches,
+}
+
+class ExecuteurTaches:
+    """Exécute les opérations longues hors du thread Streamlit.
+
+    Chaque tâche est enregistrée dans la table `taches` avec une clé
+    d'idempotence (type, tournoi, empreinte des paramètres) : tant qu'une
+    tâche est active, la même demande soumise à nouveau, depuis ce processus
+    ou un autre (double clic, rafraîchissement), renvoie la tâche existante
+    au lieu de relancer l'opération. Une tâche finie libère sa clé en la
+    suffixant de son id. L'interface lit l'avancement et le résultat dans la
+    table.
+    
+    Plusieurs processus peuvent partager la table : chacun signale ses
+    tâches actives (battement sur maj_le) et seules les tâches dont le
+    battement a expiré sont déclarées interrompues.
+    """
+
+    def __init__(self, workers=2, rafraichissement=1.0, battement=10.0, expiration=60.0):
+        self.rafraichissement = rafraichissement
+        self.battement = battement
+        self.expiration = expiration
+        self.instance = uuid.uuid4().hex[:8]
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tache')
+        try:
+            with transaction() as conn:
+                conn.cursor().execute(schema.DDL_TACHES)
+        except Error as e:
+            print(f"Erreur initialisation des tâches: {e}")
+        self._battre()
+        threading.Thread(target=self._boucle_battement, name='tache-battement', daemon=True).start()
+
+    def _battre(self):
+        """Rafraîchit les tâches actives de ce processus et interrompt celles des processus morts."""
+        try:
+            with transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE taches SET maj_le=CURRENT_TIMESTAMP
+                    WHERE statut IN ('en_attente', 'en_cours') AND instance = %s
+                """, (self.instance,))
+                cursor.execute("""
+                    UPDATE taches SET statut='interrompu', message='Processus arrêté'
+                    WHERE statut IN ('en_attente', 'en_cours') AND instance <> %s
+                      AND maj_le < CURRENT_TIMESTAMP - INTERVAL %s SECOND
+                """, (self.instance, int(self.expiration)))
+        except Error as e:
+            print(f"Erreur battement des tâches: {e}")
+
+    def _boucle_battement(self):
+        while True:
+            time.sleep(self.battement)
+            self._battre()
+
+    def soumettre(self, type_tache, tournoi_id, **parametres):
+        """Crée (ou retrouve) la tâche et la lance ; retourne son id, ou None en cas d'erreur."""
+        params_json = json.dumps(parametres, sort_keys=True, default=str)
+        # Empreinte de taille fixe : la colonne cle est limitée à 191 caractères
+        empreinte = hashlib.sha256(params_json.encode('utf-8')).hexdigest()[:32]
+        cle = f"{type_tache}:{tournoi_id}:{empreinte}"
+        try:
+            with transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, statut FROM taches WHERE cle=%s FOR UPDATE", (cle,))
+                existante = cursor.fetchone()
+                if existante and existante[1] in ('en_attente', 'en_cours'):
+                    return existante[0]
+                if existante:
+                    # Tâche finie : sa clé est libérée pour la nouvelle demande
+                    cursor.execute("UPDATE taches SET cle=CONCAT(cle, '#', id) WHERE id=%s", (existante[0],))
+                cursor.execute("""
+                    INSERT IGNORE INTO taches (cle, type, tournoi_id, parametres, instance)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (cle, type_tache, tournoi_id, params_json, self.instance))
+                if cursor.rowcount != 1:
+                    # Soumise au même instant par une autre session
+                    cursor.execute("SELECT id FROM taches WHERE cle=%s", (cle,))
+                    return cursor.fetchone()[0]
+                tache_id = cursor.lastrowid
+        except Error as e:
+            print(f"Erreur soumission de la tâche {type_tache}: {e}")
+            return None
+        self._executor.submit(self._executer, tache_id, type_tache, tournoi_id, parametres)
+        return tache_id
+
+    def _mettre_a_jour(self, tache_id, **colonnes):
+        conn = create_connection()
+        if conn:
+            try:
+                cursor = conn.cursor()
+                assignations = ", ".join(f"{colonne}=%s" for colonne in colonnes)
+                cursor.execute(f"UPDATE taches SET {assignations} WHERE id=%s",
+                               tuple(colonnes.values()) + (tache_id,))
+                conn.commit()
+            except Error as e:
+                print(f"Erreur mise à jour de la tâche {tache_id}: {e}")
+            finally:
+                conn.close()
+
+    def _executer(self, tache_id, type_tache, tournoi_id, parametres):
+        # Thread du pool : les erreurs de connexion vont dans le message de la tâche
+        _hors_streamlit.set(True)
+        self._mettre_a_jour(tache_id, statut='en_cours', progression=0)
+        
+        def progression(pourcentage, message=None):
+            self._mettre_a_jour(tache_id, progression=max(0, min(99, int(pourcentage))), message=message)
+        
+        try:
+            succes, message, resultat = OPERATIONS_TACHES[type_tache](tournoi_id, progression, **parametres)
+        except Exception as e:
+            succes, message, resultat = False, f"Erreur inattendue: {e}", None
+        self._mettre_a_jour(
+            tache_id,
+            statut='termine' if succes else 'echec',
+            progression=100 if succes else 0,
+            message=(message or '')[:255],
+            resultat=json.dumps(resultat, default=str) if resultat is not None else None,
+        )
+
+    def etat(self, tache_id):
+        """Dict (id, type, tournoi_id, statut, progression, message, resultat) ou None."""
+        conn = create_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT id, type, tournoi_id, statut, progression, message, resultat
+                FROM taches WHERE id=%s
+            """, (tache_id,))
+            tache = cursor.fetchone()
+        finally:
+            conn.close()
+        if tache and tache['resultat'] is not None:
+            tache['resultat'] = json.loads(tache['resultat'])
+        return tache
+
+@st.cache_resource
+def get_taches():
+    return ExecuteurTaches(**TACHES_CONFIG)
+
+def lancer_tache(nom, type_tache, tournoi_id, **parametres):
+    """Soumet une tâche et la rattache à la session sous `nom` (voir suivre_tache)."""
+    tache_id = get_taches().soumettre(type_tache, tournoi_id, **parametres)
+    if tache_id is None:
+        st.error("Impossible de lancer la tâche")
+        return
+    st.session_state.setdefault('taches', {})[nom] = tache_id
+
+def _afficher_avancement(tache_id):
+    tache = get_taches().etat(tache_id)
+    if not tache:
+        return
+    if tache['statut'] in STATUTS_TERMINAUX:
+        # Relancer toute la page pour afficher le résultat
+        st.rerun()
+    st.progress(tache['progression'] / 100, text=tache['message'] or "En attente...")
+
+_avancement_auto = fragment_mesure(_afficher_avancement, TACHES_CONFIG['rafraichissement'])
+
+def suivre_tache(nom):
+    """Affiche l'avancement de la tâche `nom` de la session.
+
+    Retourne la tâche (dict de ExecuteurTaches.etat) une seule fois, quand
+    elle est terminée ; None tant qu'elle tourne ou s'il n'y en a pas.
+    """
+    taches = st.session_state.setdefault('taches', {})
+    tache_id = taches.get(nom)
+    if tache_id is None:
+        return None
+    tache = get_taches().etat(tache_id)
+    if not tache or tache['statut'] in STATUTS_TERMINAUX:
+        del taches[nom]
+        return tache
+    if _avancement_auto:
+        _avancement_auto(tache_id)
+    else:
+        st.progress(tache['progression'] / 100, text=tache['message'] or "En attente...")
+        st.button("🔄 Actualiser", key=f"actualiser_{nom}")
+    return None
 
 # ----------------- Fonctions d'administration -----------------
 def show_tournament_management():
@@ -1100,7 +3716,7 @@ def show_tournament_management():
             nom = st.text_input("Nom du tournoi*")
             format_finales = st.selectbox(
                 "Format des finales",
-                ["Élimination directe", "Double élimination", "Round-robin"]
+                FORMATS_FINALES
             )
             eq_pg = st.number_input("Équipes par groupe", min_value=2, max_value=10, value=4)
             eq_qual = st.number_input("Équipes qualifiées par groupe", min_value=1, max_value=eq_pg-1, value=2)
@@ -1137,6 +3753,88 @@ def show_tournament_management():
     with tab3:
         st.subheader("Configuration avancée")
         st.info("Fonctionnalités avancées de gestion des tournois")
+        
+        st.write("### Pool de connexions MySQL")
+        stats = get_pool().stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Emprunts", stats['checkouts'])
+        col2.metric("Attente moyenne", f"{stats['avg_wait'] * 1000:.1f} ms")
+        col3.metric("Débordements", stats['overflow'])
+        col4.metric("Connexions ouvertes", f"{stats['opened']} / {stats['size'] + stats['max_overflow']}")
+        st.json(stats)
+        
+        st.write("### Requêtes SQL")
+        registre = get_pool().registre
+        requetes = registre.stats()
+        if requetes:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Requêtes distinctes", len(requetes))
+            col2.metric("Exécutions", sum(r['executions'] for r in requetes))
+            col3.metric("Préparées", sum(r['preparees'] for r in requetes))
+            st.dataframe(pd.DataFrame(requetes[:20]).round(2))
+        else:
+            st.info("Aucune requête enregistrée")
+        if st.button("Réinitialiser les compteurs SQL"):
+            registre.reinitialiser()
+            st.rerun()
+        
+        st.write("### Cache des lectures")
+        stats_cache = get_cache().stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Entrées", f"{stats_cache['entries']} / {stats_cache['maxsize']}")
+        col2.metric("Taux de succès", f"{stats_cache['hit_rate'] * 100:.1f}%")
+        col3.metric("TTL", f"{stats_cache['ttl']:.0f} s")
+        
+        st.write("### Index de recherche")
+        stats_index = get_index_recherche().stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Documents", stats_index['documents'])
+        col2.metric("Âge", f"{stats_index['age']:.0f} s" if stats_index['age'] is not None else "non construit")
+        col3.metric("Rechargement", f"{stats_index['ttl']:.0f} s")
+        if st.button("🔁 Reconstruire l'index de recherche"):
+            if reconstruire_index_recherche():
+                st.success("Index de recherche reconstruit")
+            else:
+                st.error("Échec de la reconstruction de l'index")
+        
+        st.write("### Vue publique")
+        stats_public = get_instantanes().stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Instantanés", stats_public['instantanes'])
+        col2.metric("Lectures / calculs", f"{stats_public['lectures']} / {stats_public['calculs']}")
+        col3.metric("Intervalle", f"{stats_public['intervalle']:.0f} s")
+        
+        st.write("### Profil des pages")
+        afficher_profil_pages()
+        
+        st.write("### Schéma de la base")
+        conn = create_connection()
+        if conn:
+            try:
+                version = schema.version_actuelle(conn)
+                derniere = schema.MIGRATIONS[-1][0]
+                st.write(f"Version du schéma : **{version}** / {derniere}")
+                if version < derniere and st.button("⬆️ Appliquer les migrations"):
+                    appliquees = schema.migrer(conn)
+                    st.success(f"Migrations appliquées : {', '.join(str(v) for v, _ in appliquees)}")
+                if st.button("🔁 Recalculer les statistiques joueurs"):
+                    success, message = reconstruire_stats_joueurs()
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(message)
+                if st.button("🔍 Vérifier les plans d'exécution"):
+                    plans = pd.DataFrame(schema.verifier_plans(conn))
+                    complets = plans[plans['parcours_complet']]
+                    if complets.empty:
+                        st.success("Aucun parcours complet de table")
+                    else:
+                        st.warning(f"{complets['requete'].nunique()} requête(s) avec parcours complet")
+                    st.dataframe(plans)
+            except Error as e:
+                st.error(f"Erreur schéma: {e}")
+            finally:
+                conn.close()
 
 def show_user_management():
     st.title("👥 Gestion des Utilisateurs")
@@ -1236,22 +3934,21 @@ def show_user_management():
 def show_global_stats():
     st.title("📊 Statistiques Globales")
     
-    # Récupérer les données de tous les tournois
-    tournois = get_tournois()
+    # Récupérer les agrégats de tous les tournois en une requête
+    resumes = get_resume_tournois()
     
-    if tournois:
+    if resumes:
         st.subheader("Aperçu des tournois")
-        tournoi_data = []
-        for t in tournois:
-            nb_equipes = count_equipes(t[0])
-            tournoi_data.append({
-                "Tournoi": t[1],
-                "Équipes": nb_equipes,
-                "Format": t[3],
-                "Créé le": t[2]
-            })
-        
-        df_tournois = pd.DataFrame(tournoi_data)
+        df_tournois = pd.DataFrame([{
+            "Tournoi": r['nom'],
+            "Équipes": r['nb_equipes'],
+            "Matchs": r['nb_matchs'],
+            "Matchs joués": r['matchs_joues'],
+            "Droits perçus (€)": float(r['droits_percus'] or 0),
+            "Meilleur buteur": f"{r['meilleur_buteur']} ({r['buts_meilleur_buteur']})" if r['meilleur_buteur'] else "-",
+            "Format": r['format_finales'],
+            "Créé le": r['date_creation']
+        } for r in resumes])
         st.dataframe(df_tournois)
         
         # Graphique du nombre d'équipes par tournoi
@@ -1308,17 +4005,67 @@ def main():
         st.session_state.current_tournoi = None
         st.session_state.current_equipe = None
         st.session_state.visiteur_id = None
+    if 'profil_session' not in st.session_state:
+        st.session_state.profil_session = uuid.uuid4().hex[:8]
 
-    # Menu principal
-    if not st.session_state.logged_in:
-        show_login_page()
-    else:
-        if st.session_state.user_role == 'admin':
-            show_admin_dashboard()
-        elif st.session_state.user_role in ['organizer', 'viewer']:
-            show_organizer_dashboard()
+    # Menu principal (mesuré pour le profil des pages)
+    with mesurer_rerun():
+        if not st.session_state.logged_in:
+            show_login_page()
         else:
-            st.error("Rôle utilisateur non reconnu")
+            if st.session_state.user_role == 'admin':
+                show_admin_dashboard()
+            elif st.session_state.user_role in ['organizer', 'viewer']:
+                show_organizer_dashboard()
+            else:
+                st.error("Rôle utilisateur non reconnu")
+
+def afficher_acces_public():
+    """Vue publique servie depuis les instantanés partagés (aucune requête par spectateur)."""
+    tournois = instantane_tournois_publics()
+    
+    if tournois:
+        st.subheader("Tournois en cours et à venir")
+        for tournoi in tournois:
+            with st.expander(f"{tournoi[1]} - {tournoi[2]} au {tournoi[3]} à {tournoi[4]}"):
+                st.write(f"Statut: {tournoi[6]}")
+                st.write(f"Description: {tournoi[5]}")
+                
+                instantane = instantane_tournoi_public(tournoi[0])
+                
+                # Afficher le classement
+                st.subheader("Classement")
+                classement = instantane['classement']
+                if classement:
+                    df_classement = pd.DataFrame(classement, columns=[
+                        "Équipe", "Groupe", "MJ", "V", "N", "D", "BP", "BC", "Pts"
+                    ])
+                    st.dataframe(df_classement)
+                else:
+                    st.info("Classement non disponible")
+                
+                # Afficher les prochains matchs
+                st.subheader("Prochains matchs")
+                matchs = instantane['prochains_matchs']
+                if matchs:
+                    for match in matchs:
+                        st.write(f"{match[0]} vs {match[1]} - {match[2]} à {match[3]}")
+                else:
+                    st.info("Aucun match programmé")
+                
+                # Bouton d'abonnement pour les visiteurs
+                if st.session_state.visiteur_id:
+                    if st.button(f"S'abonner à {tournoi[1]}", key=f"sub_{tournoi[0]}"):
+                        success, message = subscribe_visiteur_to_tournoi(st.session_state.visiteur_id, tournoi[0])
+                        if success:
+                            st.success(message)
+                        else:
+                            st.error(message)
+    else:
+        st.info("Aucun tournoi disponible pour le moment")
+
+# Rafraîchissement automatique de la vue publique (relit seulement les instantanés)
+_acces_public_auto = fragment_mesure(afficher_acces_public, INSTANTANE_CONFIG['intervalle'])
 
 def show_login_page():
     st.title("⚽ Système de Gestion de Tournois")
@@ -1362,45 +4109,10 @@ def show_login_page():
     
     with tab3:
         st.header("Accès Public aux Tournois")
-        tournois = get_tournois_public()
-        
-        if tournois:
-            st.subheader("Tournois en cours et à venir")
-            for tournoi in tournois:
-                with st.expander(f"{tournoi[1]} - {tournoi[2]} au {tournoi[3]} à {tournoi[4]}"):
-                    st.write(f"Statut: {tournoi[6]}")
-                    st.write(f"Description: {tournoi[5]}")
-                    
-                    # Afficher le classement
-                    st.subheader("Classement")
-                    classement = get_classement_public(tournoi[0])
-                    if classement:
-                        df_classement = pd.DataFrame(classement, columns=[
-                            "Équipe", "Groupe", "MJ", "V", "N", "D", "BP", "BC", "Pts"
-                        ])
-                        st.dataframe(df_classement)
-                    else:
-                        st.info("Classement non disponible")
-                    
-                    # Afficher les prochains matchs
-                    st.subheader("Prochains matchs")
-                    matchs = get_prochains_matchs(tournoi[0])
-                    if matchs:
-                        for match in matchs:
-                            st.write(f"{match[0]} vs {match[1]} - {match[2]} à {match[3]}")
-                    else:
-                        st.info("Aucun match programmé")
-                    
-                    # Bouton d'abonnement pour les visiteurs
-                    if st.session_state.visiteur_id:
-                        if st.button(f"S'abonner à {tournoi[1]}", key=f"sub_{tournoi[0]}"):
-                            success, message = subscribe_visiteur_to_tournoi(st.session_state.visiteur_id, tournoi[0])
-                            if success:
-                                st.success(message)
-                            else:
-                                st.error(message)
+        if _acces_public_auto:
+            _acces_public_auto()
         else:
-            st.info("Aucun tournoi disponible pour le moment")
+            afficher_acces_public()
 
 def show_organizer_dashboard():
     st.sidebar.title(f"👋 Bonjour {st.session_state.user_name}")
@@ -1484,41 +4196,37 @@ def show_dashboard():
         st.warning("Veuillez sélectionner un tournoi dans la sidebar")
         return
     
-    tournoi_details = get_tournoi_details(st.session_state.current_tournoi)
-    if not tournoi_details:
+    apercu = get_apercu_tournoi(st.session_state.current_tournoi)
+    if not apercu:
         st.error("Tournoi non trouvé")
         return
     
-    st.title(f"📊 Dashboard - {tournoi_details[1]}")
+    st.title(f"📊 Dashboard - {apercu['nom']}")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        nb_equipes = count_equipes(st.session_state.current_tournoi)
-        st.metric("Nombre d'équipes", nb_equipes)
+        st.metric("Nombre d'équipes", apercu['nb_equipes'])
     
     with col2:
-        groupes = get_groupes(st.session_state.current_tournoi)
-        st.metric("Nombre de groupes", len(groupes))
+        st.metric("Nombre de groupes", apercu['nb_groupes'])
     
     with col3:
-        matchs = get_matchs(st.session_state.current_tournoi)
-        st.metric("Nombre de matchs", len(matchs))
+        st.metric("Nombre de matchs", apercu['nb_matchs'])
     
     with col4:
-        droits = get_droits_match(st.session_state.current_tournoi)
-        if droits:
-            payes = sum(1 for d in droits if d[3])
-            pourcentage = (payes / len(droits)) * 100
-            st.metric("Droits payés", f"{pourcentage:.1f}%")
+        if apercu['nb_droits']:
+            pourcentage = (apercu['nb_payes'] / apercu['nb_droits']) * 100
+            st.metric("Droits payés", f"{pourcentage:.1f}%",
+                      help=f"{apercu['montant_percu']} / {apercu['montant_total']} €")
         else:
             st.metric("Droits payés", "0%")
     
     # Derniers matchs
     st.subheader("📅 Derniers matchs")
-    matchs = get_matchs(st.session_state.current_tournoi)
+    matchs = apercu['derniers_matchs']
     if matchs:
-        for match in matchs[-5:]:
+        for match in matchs:
             score_text = f"{match[5]} - {match[6]}" if match[5] is not None and match[6] is not None else "À venir"
             st.write(f"**{match[1]}** vs **{match[2]}** ({match[3]}) - {score_text}")
     else:
@@ -1531,7 +4239,7 @@ def show_creer_tournoi():
         nom = st.text_input("Nom du tournoi*")
         format_finales = st.selectbox(
             "Format des finales",
-            ["Élimination directe", "Double élimination", "Round-robin"]
+            FORMATS_FINALES
         )
         eq_pg = st.number_input("Équipes par groupe", min_value=2, max_value=10, value=4)
         eq_qual = st.number_input("Équipes qualifiées par groupe", min_value=1, max_value=eq_pg-1, value=2)
@@ -1557,8 +4265,8 @@ def show_equipes():
     
     st.title("👥 Gestion des Équipes")
     
-    # Récupérer les équipes du tournoi
-    equipes = get_equipes(st.session_state.current_tournoi)
+    # Récupérer les équipes du tournoi avec leur nombre de joueurs (une seule requête)
+    equipes = get_equipes_avec_nb_joueurs(st.session_state.current_tournoi)
     
     # Ajouter un sélecteur d'équipe courant
     if equipes:
@@ -1573,7 +4281,7 @@ def show_equipes():
     else:
         st.session_state.current_equipe = None
     
-    tab1, tab2 = st.tabs(["Ajouter des équipes", "Liste des équipes"])
+    tab1, tab2, tab3 = st.tabs(["Ajouter des équipes", "Liste des équipes", "Import CSV/Excel"])
     
     # Le reste du code reste inchangé...
     with tab1:
@@ -1600,8 +4308,7 @@ def show_equipes():
                     st.write(f"**{eq[1]}**")
                     st.write(f"Groupe: {eq[2] or 'Non assigné'} - Numéro: {eq[3] or 'N/A'}")
                 with col2:
-                    joueurs = get_joueurs(eq[0])
-                    st.write(f"{len(joueurs)} joueurs")
+                    st.write(f"{eq[4]} joueurs")
                 with col3:
                     # Bouton pour définir comme équipe courante
                     if st.button("👥 Sélectionner", key=f"select_{eq[0]}"):
@@ -1610,17 +4317,49 @@ def show_equipes():
                         st.rerun()
                 with col4:
                     if st.button("📋 PDF", key=f"pdf_{eq[0]}"):
-                        pdf_data = generer_fiche_equipe_pdf(eq[0])
-                        if pdf_data:
-                            st.download_button(
-                                label="Télécharger",
-                                data=pdf_data,
-                                file_name=f"fiche_equipe_{eq[1]}.pdf",
-                                mime="application/pdf",
-                                key=f"dl_{eq[0]}"
-                            )
+                        chemin = exporter_fiche_equipe(eq[0])
+                        if chemin:
+                            with open(chemin, 'rb') as pdf_file:
+                                st.download_button(
+                                    label="Télécharger",
+                                    data=pdf_file,
+                                    file_name=f"fiche_equipe_{eq[1]}.pdf",
+                                    mime="application/pdf",
+                                    key=f"dl_{eq[0]}"
+                                )
+            
+            if st.button("📦 Exporter toutes les fiches (ZIP)"):
+                lancer_tache('export_fiches', 'export_fiches', st.session_state.current_tournoi)
+            
+            tache = suivre_tache('export_fiches')
+            if tache and tache['statut'] == 'termine' and os.path.exists(tache['resultat']):
+                with open(tache['resultat'], 'rb') as zip_file:
+                    st.download_button(
+                        label="Télécharger l'archive",
+                        data=zip_file,
+                        file_name=f"fiches_equipes_{st.session_state.current_tournoi}.zip",
+                        mime="application/zip",
+                        key="dl_fiches_zip"
+                    )
+            elif tache:
+                st.error(tache['message'])
         else:
             st.info("Aucune équipe dans ce tournoi")
+    
+    with tab3:
+        st.subheader("Importer équipes et joueurs")
+        st.write("Colonnes attendues : `equipe`, `joueur`, `numero`, `poste` "
+                 "(une ligne par joueur ; une ligne sans joueur crée seulement l'équipe).")
+        fichier = st.file_uploader("Fichier CSV ou Excel", type=["csv", "xlsx", "xls"])
+        if fichier and st.button("📥 Importer"):
+            success, rapport = importer_effectifs(st.session_state.current_tournoi, fichier)
+            if success:
+                st.success(f"{rapport['equipes_creees']} équipes et {rapport['joueurs_ajoutes']} joueurs importés")
+            else:
+                st.error("Import échoué")
+            if rapport['erreurs']:
+                st.warning(f"{len(rapport['erreurs'])} ligne(s) ignorée(s)")
+                st.dataframe(pd.DataFrame(rapport['erreurs'], columns=["Ligne", "Erreur"]))
 
 def show_droits_match():
     if not st.session_state.current_tournoi:
@@ -1710,10 +4449,7 @@ def show_joueurs():
         with st.form("add_player"):
             nom = st.text_input("Nom du joueur*")
             numero = st.number_input("Numéro*", min_value=1, max_value=99, step=1)
-            poste = st.selectbox(
-                "Poste",
-                ["Gardien", "Défenseur", "Milieu", "Attaquant", "Entraîneur", "Remplaçant"]
-            )
+            poste = st.selectbox("Poste", POSTES)
             
             if st.form_submit_button("Ajouter le joueur"):
                 if nom and numero:
@@ -1744,8 +4480,8 @@ def show_joueurs():
                         new_numero = st.number_input("Numéro", value=j[2], key=f"num_{j[0]}")
                         new_poste = st.selectbox(
                             "Poste",
-                            ["Gardien", "Défenseur", "Milieu", "Attaquant", "Entraîneur", "Remplaçant"],
-                            index=["Gardien", "Défenseur", "Milieu", "Attaquant", "Entraîneur", "Remplaçant"].index(j[3]),
+                            POSTES,
+                            index=POSTES.index(j[3]),
                             key=f"pos_{j[0]}"
                         )
                         if st.form_submit_button("Modifier"):
@@ -1800,21 +4536,36 @@ def show_tirage():
     
     st.title("🎲 Tirage au Sort")
     
-    if st.button("🔀 Effectuer le tirage au sort"):
-        groupes = tirage_groupes(st.session_state.current_tournoi)
-        if groupes:
-            st.success(f"Groupes créés: {', '.join(groupes)}")
+    col1, col2 = st.columns(2)
+    lancer = col1.button("🔀 Effectuer le tirage au sort")
+    revoir = col2.button("▶️ Revoir le tirage")
+    
+    if lancer:
+        lancer_tache('tirage', 'tirage', st.session_state.current_tournoi)
+    
+    tache = suivre_tache('tirage')
+    if tache and tache['statut'] == 'termine':
+        # Conserver le résultat pour que l'animation le rejoue côté navigateur
+        st.session_state.dernier_tirage = tache['resultat']
+        st.success(tache['message'])
+        st.balloons()
+        st.success(f"Groupes créés: {', '.join(tache['resultat']['groupes'])}")
+        afficher_animation_tirage(tache['resultat']['affectations'])
+    elif tache:
+        st.error(tache['message'])
+    elif revoir:
+        # Rejouer le tirage enregistré en base, sans le recalculer
+        equipes = [e for e in get_equipes(st.session_state.current_tournoi) if e[2]]
+        afficher_animation_tirage([(e[0], e[1], e[2], e[3]) for e in equipes])
     
     # Afficher les groupes existants
-    groupes = get_groupes(st.session_state.current_tournoi)
+    groupes = get_equipes_par_groupe(st.session_state.current_tournoi)
     if groupes:
         st.subheader("Groupes existants")
-        for groupe in groupes:
-            with st.expander(f"Groupe {groupe[1]}"):
-                equipes = get_equipes(st.session_state.current_tournoi)
-                equipes_groupe = [e for e in equipes if e[2] == groupe[1]]
+        for groupe_id, groupe_nom, equipes_groupe in groupes:
+            with st.expander(f"Groupe {groupe_nom}"):
                 for eq in equipes_groupe:
-                    st.write(f"• {eq[1]} (Numéro: {eq[3]})")
+                    st.write(f"• {eq[1]} (Numéro: {eq[2]})")
 
 def show_calendrier():
     if not st.session_state.current_tournoi:
@@ -1823,11 +4574,15 @@ def show_calendrier():
     
     st.title("📅 Calendrier des Matchs")
     
+    nb_terrains = st.number_input("Nombre de terrains disponibles", min_value=1, max_value=20, value=1)
     if st.button("🔄 Générer le calendrier automatiquement"):
-        if generer_matchs_groupes(st.session_state.current_tournoi):
-            st.success("Calendrier généré avec succès")
-        else:
-            st.error("Erreur lors de la génération du calendrier")
+        lancer_tache('calendrier', 'calendrier', st.session_state.current_tournoi, nb_terrains=int(nb_terrains))
+    
+    tache = suivre_tache('calendrier')
+    if tache and tache['statut'] == 'termine':
+        st.success(tache['message'])
+    elif tache:
+        st.error(tache['message'])
     
     # Afficher les matchs
     matchs = get_matchs(st.session_state.current_tournoi)
@@ -1840,16 +4595,24 @@ def show_calendrier():
     
     # Bouton pour exporter le calendrier en PDF
     if st.button("📥 Exporter le calendrier en PDF"):
-        pdf_data = generer_calendrier_pdf(st.session_state.current_tournoi)
-        if pdf_data:
-            tournoi_nom = get_tournoi_details(st.session_state.current_tournoi)[1]
+        lancer_tache('export_calendrier', 'export_calendrier', st.session_state.current_tournoi)
+    
+    tache = suivre_tache('export_calendrier')
+    if tache and tache['statut'] != 'termine':
+        st.error(tache['message'])
+    elif tache and os.path.exists(tache['resultat']):
+        tournoi_nom = get_tournoi_details(st.session_state.current_tournoi)[1]
+        with open(tache['resultat'], 'rb') as pdf_file:
             st.download_button(
                 label="Télécharger le calendrier",
-                data=pdf_data,
+                data=pdf_file,
                 file_name=f"calendrier_{tournoi_nom}.pdf",
                 mime="application/pdf"
             )
 
+TAILLE_PAGE_RESULTATS = 20
+TAILLE_SELECTION_SAISIE = 50
+
 def show_resultats():
     if not st.session_state.current_tournoi:
         st.warning("Veuillez sélectionner un tournoi dans la sidebar")
@@ -1857,18 +4620,21 @@ def show_resultats():
     
     st.title("⚽ Résultats des Matchs")
     
-    matchs = get_matchs(st.session_state.current_tournoi)
-    if matchs:
-        matchs_non_joues = [m for m in matchs if m[5] is None]
+    tournoi_id = st.session_state.current_tournoi
+    nb_matchs, nb_joues = count_matchs(tournoi_id)
+    if nb_matchs:
+        # Seuls les prochains matchs à saisir sont chargés, indexés par id
+        matchs_non_joues, _ = get_matchs_page(tournoi_id, False, limite=TAILLE_SELECTION_SAISIE)
         
         if matchs_non_joues:
+            options = {m[0]: m for m in matchs_non_joues}
             selected_match = st.selectbox(
-                "Sélectionner un match à saisir",
-                options=[m[0] for m in matchs_non_joues],
-                format_func=lambda x: next(f"{m[1]} vs {m[2]} - {m[4]}" for m in matchs_non_joues if m[0] == x)
+                f"Sélectionner un match à saisir ({nb_matchs - nb_joues} restant(s))",
+                options=list(options),
+                format_func=lambda x: f"{options[x][1]} vs {options[x][2]} - {options[x][4]}"
             )
             
-            match_details = next((m for m in matchs_non_joues if m[0] == selected_match), None)
+            match_details = options.get(selected_match)
             if match_details:
                 col1, col2 = st.columns(2)
                 with col1:
@@ -1885,11 +4651,25 @@ def show_resultats():
         else:
             st.info("Tous les matchs ont été joués")
         
-        # Afficher les résultats
-        st.subheader("Résultats")
-        matchs_joues = [m for m in matchs if m[5] is not None]
+        # Afficher les résultats page par page (curseurs conservés en session)
+        st.subheader(f"Résultats ({nb_joues})")
+        curseurs = st.session_state.setdefault('curseurs_resultats', {}).setdefault(tournoi_id, [None])
+        matchs_joues, suivant = get_matchs_page(tournoi_id, True, curseurs[-1], TAILLE_PAGE_RESULTATS)
         for match in matchs_joues:
             st.write(f"**{match[1]}** {match[5]} - {match[6]} **{match[2]}** ({match[4]})")
+        
+        nb_pages = max(1, -(-nb_joues // TAILLE_PAGE_RESULTATS))
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if len(curseurs) > 1 and st.button("⬅️ Précédent"):
+                curseurs.pop()
+                st.rerun()
+        with col2:
+            st.write(f"Page {len(curseurs)} / {nb_pages}")
+        with col3:
+            if suivant and st.button("Suivant ➡️"):
+                curseurs.append(suivant)
+                st.rerun()
     else:
         st.info("Aucun match programmé")
 
@@ -1900,11 +4680,15 @@ def show_statistiques():
     
     st.title("📊 Statistiques")
     
+    donnees = lire_en_parallele(
+        buteurs=(get_meilleurs_buteurs, st.session_state.current_tournoi, 10),
+        joueurs=(get_meilleurs_joueurs, st.session_state.current_tournoi, 10),
+    )
     tab1, tab2 = st.tabs(["Meilleurs buteurs", "Meilleurs joueurs"])
     
     with tab1:
         st.subheader("Meilleurs buteurs")
-        buteurs = get_meilleurs_buteurs(st.session_state.current_tournoi, 10)
+        buteurs = donnees['buteurs']
         if buteurs:
             df = pd.DataFrame(buteurs, columns=["Joueur", "Équipe", "Buts"])
             st.dataframe(df)
@@ -1915,7 +4699,7 @@ def show_statistiques():
     
     with tab2:
         st.subheader("Meilleurs joueurs")
-        joueurs = get_meilleurs_joueurs(st.session_state.current_tournoi, 10)
+        joueurs = donnees['joueurs']
         if joueurs:
             df = pd.DataFrame(joueurs, columns=["Joueur", "Équipe", "Homme du match", "Points"])
             st.dataframe(df)
@@ -1932,6 +4716,7 @@ def show_statistiques_avancees():
     st.title("📈 Statistiques Avancées")
     
     st.subheader("Classement par groupe")
+    st.caption(f"Départage : {', '.join(CRITERES_DEPARTAGE)}")
     groupes = get_groupes(st.session_state.current_tournoi)
     if groupes:
         for groupe in groupes:
@@ -1942,7 +4727,7 @@ def show_statistiques_avancees():
                         "Équipe", "MJ", "V", "N", "D", "BP", "BC", "Pts"
                     ])
                     df["Diff"] = df["BP"] - df["BC"]
-                    st.dataframe(df.sort_values(by=["Pts", "Diff"], ascending=[False, False]))
+                    st.dataframe(df)
                 else:
                     st.info("Aucun classement disponible")
     
@@ -1958,20 +4743,62 @@ def show_phase_finale():
     st.title("🏆 Phase Finale")
     
     if st.button("🎯 Générer les phases finales"):
-        if generer_phases_finales(st.session_state.current_tournoi):
-            st.success("Phases finales générées avec succès")
-        else:
-            st.error("Erreur lors de la génération des phases finales")
-    
-    phases = get_phases_finales(st.session_state.current_tournoi)
-    if phases:
-        for niveau in ['Huitième', 'Quart', 'Demi', 'Finale', 'Petite finale']:
-            matchs_niveau = [p for p in phases if p[1] == niveau]
-            if matchs_niveau:
-                st.subheader(niveau)
-                for match in matchs_niveau:
-                    score_text = f"{match[4]} - {match[5]}" if match[4] is not None else "À venir"
-                    st.write(f"**{match[2]}** vs **{match[3]}** - {score_text} - {match[6]}")
+        lancer_tache('phases_finales', 'phases_finales', st.session_state.current_tournoi)
+    
+    tache = suivre_tache('phases_finales')
+    if tache and tache['statut'] == 'termine':
+        st.success(tache['message'])
+    elif tache:
+        st.error(tache['message'])
+    
+    arbre = get_arbre_tableau(st.session_state.current_tournoi)
+    if arbre:
+        for niveau, matchs_niveau in arbre.niveaux.items():
+            st.subheader(niveau)
+            for match in matchs_niveau:
+                if match.statut == 'exempt':
+                    st.write(f"**{match.equipe1}** - exempt, qualifié d'office")
+                    continue
+                equipe1, equipe2 = match.libelles
+                score_text = f"{match.score1} - {match.score2}" if match.score1 is not None else "À venir"
+                st.write(f"**{equipe1}** vs **{equipe2}** - {score_text} - {match.date_match}")
+        
+        # Saisie des résultats : le vainqueur passe automatiquement au match suivant
+        a_jouer = {n.id: n for n in arbre.noeuds.values() if n.a_jouer and n.equipe1_id and n.equipe2_id}
+        if a_jouer:
+            st.subheader("Saisir un résultat")
+            selected = st.selectbox(
+                "Match",
+                options=list(a_jouer),
+                format_func=lambda x: f"{a_jouer[x].niveau} : {a_jouer[x].equipe1} vs {a_jouer[x].equipe2}"
+            )
+            match = a_jouer[selected]
+            suivant = arbre.match_suivant(selected)
+            if suivant:
+                st.caption(f"Le vainqueur jouera : {suivant.niveau} ({' vs '.join(suivant.libelles)})")
+            col1, col2 = st.columns(2)
+            score1 = col1.number_input(match.equipe1, min_value=0, key="pf_score1")
+            score2 = col2.number_input(match.equipe2, min_value=0, key="pf_score2")
+            gagnant_id = None
+            if score1 == score2 and match.tableau != 'poule':
+                vainqueur = st.radio("Vainqueur (tirs au but)", [match.equipe1, match.equipe2], horizontal=True)
+                gagnant_id = match.equipe1_id if vainqueur == match.equipe1 else match.equipe2_id
+            if st.button("Enregistrer le résultat"):
+                if enregistrer_score_phase_finale(selected, score1, score2, gagnant_id):
+                    st.success("Résultat enregistré")
+                    st.rerun()
+                else:
+                    st.error("Erreur lors de l'enregistrement du résultat")
+        
+        # Parcours d'une équipe encore en lice
+        en_lice = arbre.equipes_en_lice()
+        if en_lice:
+            with st.expander("🧭 Parcours d'une équipe"):
+                equipe_id = st.selectbox("Équipe", options=en_lice, format_func=lambda x: arbre.noms[x])
+                prochain = arbre.match_en_cours(equipe_id)
+                st.write("**Chemin vers la finale :** " + " → ".join(n.niveau for n in arbre.chemin_finale(prochain.id)))
+                adversaires = sorted(arbre.noms[e] for e in arbre.adversaires_restants(equipe_id))
+                st.write(f"**Adversaires possibles ({len(adversaires)}) :** {', '.join(adversaires)}")
     else:
         st.info("Aucune phase finale programmée")
 
@@ -1986,14 +4813,12 @@ def show_groupes_matchs():
     
     with tab1:
         st.subheader("Groupes du tournoi")
-        groupes = get_groupes(st.session_state.current_tournoi)
+        groupes = get_equipes_par_groupe(st.session_state.current_tournoi)
         if groupes:
-            for groupe in groupes:
-                with st.expander(f"Groupe {groupe[1]}"):
-                    equipes = get_equipes(st.session_state.current_tournoi)
-                    equipes_groupe = [e for e in equipes if e[2] == groupe[1]]
+            for groupe_id, groupe_nom, equipes_groupe in groupes:
+                with st.expander(f"Groupe {groupe_nom}"):
                     for eq in equipes_groupe:
-                        st.write(f"• {eq[1]} (Numéro: {eq[3]})")
+                        st.write(f"• {eq[1]} (Numéro: {eq[2]})")
         else:
             st.info("Aucun groupe créé")
     
@@ -2062,5 +4887,7 @@ def apply_custom_styles():
     """, unsafe_allow_html=True)
 
 # ----------------- Point d'entrée principal -----------------
+instrumenter_module(globals())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file